@@ -1,4 +1,22 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.shortcuts import redirect
+from django.urls import path
+from django.utils.translation import gettext_lazy as _
+
+from .exports import (
+    CATALOG_COLUMNS,
+    ENQUIRY_COLUMNS,
+    ENQUIRY_UNTRUSTED,
+    EXPORT_FORMATS,
+    catalog_rows,
+    enquiry_rows,
+    export_response,
+    parse_date_range,
+)
 from .models import (
     Product,
     ProductVariant,
@@ -7,13 +25,166 @@ from .models import (
     TeamMember,
     Enquiry,        # ✅ ADD THIS
 )
+from .pagination import EstimatedCountPaginator
+
+
+# ============================
+# LARGE TABLES
+# ============================
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    Changelist whose cost does not grow with the table: bounded COUNT,
+    no second "full result" COUNT, no facet counts.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    @property
+    def media(self):
+        # select2 for AutocompleteFilter
+        return super().media + AutocompleteSelect(None, self.admin_site).media
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Related-object filter rendered as an admin autocomplete box (options
+    fetched as you type) instead of one link per related row. The related
+    model's admin needs ``search_fields``.
+    """
+    template = "admin/biologist_app/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+        self.widget_id = f"id_filter_{field_path}"
+
+    def field_choices(self, field, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None and not self.lookup_val_isnull,
+            "query_string": changelist.get_query_string(
+                remove=[self.lookup_kwarg, self.lookup_kwarg_isnull]
+            ),
+            "display": _("All"),
+        }
+        if self.include_empty_choice:
+            yield {
+                "selected": bool(self.lookup_val_isnull),
+                "query_string": changelist.get_query_string(
+                    {self.lookup_kwarg_isnull: "True"}, [self.lookup_kwarg]
+                ),
+                "display": self.empty_value_display,
+            }
+
+    @property
+    def rendered_widget(self):
+        formfield = self.field.formfield(
+            widget=AutocompleteSelect(self.field, self.admin_site)
+        )
+        formfield.widget.is_required = False  # allow clearing
+        value = self.lookup_val[-1] if self.lookup_val else None
+        try:
+            return formfield.widget.render(self.lookup_kwarg, value, {"id": self.widget_id})
+        except ValueError:  # garbage id in the query string
+            return formfield.widget.render(self.lookup_kwarg, None, {"id": self.widget_id})
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """Tabular inline that loads ``per_page`` related rows (``?<prefix>_page=N``)."""
+    per_page = 25
+    template = "admin/biologist_app/edit_inline/paginated_tabular.html"
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset_class = super().get_formset(request, obj, **kwargs)
+        per_page = self.per_page
+
+        class PaginatedFormSet(formset_class):
+            def get_queryset(self):
+                if not hasattr(self, "_queryset"):
+                    paginator = Paginator(super().get_queryset(), per_page)
+                    page_param = f"{self.prefix}_page"
+                    self.page = paginator.get_page(request.GET.get(page_param))
+                    self.page_links = []
+                    for number in paginator.get_elided_page_range(self.page.number):
+                        url = None
+                        if number not in (self.page.number, paginator.ELLIPSIS):
+                            params = request.GET.copy()
+                            params[page_param] = number
+                            url = f"?{params.urlencode()}"
+                        self.page_links.append((number, url))
+                    self._queryset = self.page.object_list
+                return self._queryset
+
+        return PaginatedFormSet
+
+
+# ============================
+# STREAMING EXPORTS
+# ============================
+class ExportMixin:
+    """Adds ``<changelist>/export/?format=csv|xlsx`` for users who can view."""
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "export/",
+                self.admin_site.admin_view(self.export_view),
+                name="%s_%s_export" % info,
+            ),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            fmt = "csv"
+        return self.export(request, fmt)
 
 
 # ============================
 # PRODUCT VARIANT INLINE
 # ============================
-class ProductVariantInline(admin.TabularInline):
+class ProductVariantFormSet(BaseInlineFormSet):
+    """
+    One default variant per product (a partial unique index): ticking a
+    new default replaces the old one, which may sit on another page.
+    """
+
+    def clean(self):
+        super().clean()
+        defaults = [
+            form for form in self.forms
+            if getattr(form, "cleaned_data", None)
+            and form.cleaned_data.get("is_default")
+            and not form.cleaned_data.get("DELETE")
+        ]
+        if len(defaults) > 1:
+            raise ValidationError("Only one variant can be the default.")
+
+    def save(self, commit=True):
+        # Rows are saved in form order, so clear the old default first or
+        # the new one may be written while it is still set
+        promoted = any(
+            "is_default" in form.changed_data and form.cleaned_data.get("is_default")
+            for form in self.forms
+            if getattr(form, "cleaned_data", None)
+        )
+        if commit and promoted and self.instance.pk:
+            self.instance.variants.filter(is_default=True).update(is_default=False)
+        return super().save(commit)
+
+
+class ProductVariantInline(PaginatedTabularInline):
     model = ProductVariant
+    formset = ProductVariantFormSet
     extra = 0
     fields = (
         "catalog_number",
@@ -22,14 +193,14 @@ class ProductVariantInline(admin.TabularInline):
         "price",
         "is_default",
     )
-    ordering = ("quantity",)
+    ordering = ("quantity", "id")  # stable pages
 
 
 # ============================
 # PRODUCT ADMIN
 # ============================
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ExportMixin, ScalableModelAdmin):
     list_display = (
         "name",
         "category",
@@ -37,9 +208,12 @@ class ProductAdmin(admin.ModelAdmin):
         "is_new",
     )
 
+    # SubCategory.__str__ reads its category
+    list_select_related = ("category", "subcategory__category")
+
     list_filter = (
-        "category",
-        "subcategory",
+        ("category", AutocompleteFilter),
+        ("subcategory", AutocompleteFilter),
         "is_new",
     )
 
@@ -51,8 +225,14 @@ class ProductAdmin(admin.ModelAdmin):
         "slug": ("name",)
     }
 
+    autocomplete_fields = ("category", "subcategory")
+
     inlines = [ProductVariantInline]
 
+    def export(self, request, fmt):
+        # One row per variant – the import_products sheet layout
+        return export_response(fmt, "catalog", CATALOG_COLUMNS, catalog_rows())
+
 
 # ============================
 # CATEGORY ADMIN
@@ -60,6 +240,7 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("name", "slug")
+    search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
 
 
@@ -69,14 +250,16 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(SubCategory)
 class SubCategoryAdmin(admin.ModelAdmin):
     list_display = ("name", "category")
+    list_select_related = ("category",)
     list_filter = ("category",)
+    search_fields = ("name", "category__name")
 
 
 # ============================
 # ENQUIRY ADMIN  ✅ NEW
 # ============================
 @admin.register(Enquiry)
-class EnquiryAdmin(admin.ModelAdmin):
+class EnquiryAdmin(ExportMixin, ScalableModelAdmin):
     list_display = (
         "name",
         "email",
@@ -85,11 +268,17 @@ class EnquiryAdmin(admin.ModelAdmin):
         "created_at",
     )
 
+    # ProductVariant.__str__ reads its product
+    list_select_related = ("product", "variant__product")
+
     list_filter = (
         "created_at",
-        "product",
+        ("product", AutocompleteFilter),
     )
 
+    autocomplete_fields = ("product",)
+    raw_id_fields = ("variant",)
+
     search_fields = (
         "name",
         "email",
@@ -101,6 +290,18 @@ class EnquiryAdmin(admin.ModelAdmin):
 
     ordering = ("-created_at",)
 
+    def export(self, request, fmt):
+        try:
+            date_from, date_to = parse_date_range(request.GET)
+        except ValueError:
+            self.message_user(request, "Dates must be YYYY-MM-DD.", messages.ERROR)
+            return redirect("admin:biologist_app_enquiry_changelist")
+
+        return export_response(
+            fmt, "enquiries", ENQUIRY_COLUMNS, enquiry_rows(date_from, date_to),
+            untrusted=ENQUIRY_UNTRUSTED,
+        )
+
 
 # ============================
 # TEAM MEMBER ADMIN
@@ -0,0 +1,178 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from .caching import (
+    TEAM,
+    acached_count,
+    cached_for_catalog,
+    catalog_cache_page,
+    versioned_condition,
+)
+from .facets import facet_counts, requested_facets
+from .instrumentation import TimedJSONRenderer
+from .models import Product
+from .pagination import ProductCursorPagination
+from .serializers import ProductSerializer
+from .views import (
+    CategoryViewSet,
+    ProductViewSet,
+    TeamMemberViewSet,
+    build_category_tree,
+)
+
+# Async twins of the catalog read endpoints, mounted instead of the sync
+# viewsets when ASYNC_CATALOG_VIEWS is on (the ASGI profile). They reuse
+# the viewsets' querysets, serializers and paginators, so responses are
+# byte-for-byte the same JSON; rows and counts come from the async ORM
+# and only the inherently sync steps (filter backends, search index,
+# facets, cursor pages) run through sync_to_async.
+
+renderer = TimedJSONRenderer()
+
+
+# ==============================
+# PLUMBING
+# ==============================
+def json_response(data, status=200):
+    response = HttpResponse(
+        renderer.render(data), status=status, content_type="application/json"
+    )
+    patch_vary_headers(response, ("Accept",))
+    return response
+
+
+def api_errors(view_func):
+    """DRF's exception handling (404 / 400 bodies) for plain async views."""
+
+    @wraps(view_func)
+    async def wrapped(request, *args, **kwargs):
+        try:
+            return await view_func(request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            response = exception_handler(exc, {})
+            return json_response(response.data, response.status_code)
+
+    return wrapped
+
+
+def viewset_for(viewset_class, request, action, **kwargs):
+    """A viewset instance set up as DRF would for ``action`` (no dispatch)."""
+    view = viewset_class(action=action, format_kwarg=None, args=(), kwargs=kwargs)
+    view.request = Request(request)
+    view.headers = {}
+    return view
+
+
+async def paginate(view, queryset, count):
+    """
+    ``view.paginator.paginate_queryset`` for page numbers, with the total
+    from ``await count(queryset)`` and the page rows from the async ORM.
+    """
+    paginator = view.paginator
+    request = view.request
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return [obj async for obj in queryset]
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await count(queryset)
+    number = paginator.get_page_number(request, django_paginator)
+    try:
+        paginator.page = django_paginator.page(number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(
+            paginator.invalid_page_message.format(page_number=number, message=str(exc))
+        )
+    paginator.request = request
+    return [obj async for obj in paginator.page.object_list]
+
+
+async def acount(queryset):
+    return await queryset.acount()
+
+
+# ==============================
+# PRODUCTS
+# ==============================
+@require_safe
+@versioned_condition()
+@catalog_cache_page()
+@api_errors
+async def product_list(request):
+    view = viewset_for(ProductViewSet, request, "list")
+    queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+
+    if isinstance(view.paginator, ProductCursorPagination):
+        rows = await sync_to_async(view.paginator.paginate_queryset)(
+            queryset, view.request, view
+        )
+    else:
+        rows = await paginate(view, queryset, acached_count)
+
+    serializer = view.get_serializer(rows, many=True)
+    data = view.paginator.get_paginated_response(serializer.data).data
+    facets = requested_facets(request.GET)
+    if facets:
+        data["facets"] = await sync_to_async(facet_counts)(
+            view.facet_source(queryset), facets
+        )
+    return json_response(data)
+
+
+@require_safe
+@versioned_condition()
+@catalog_cache_page()
+@api_errors
+async def product_detail_by_slug(request, slug):
+    queryset = (
+        Product.objects
+        .select_related("category", "subcategory")
+        .prefetch_related("variants")
+    )
+    try:
+        product = await queryset.aget(slug=slug)
+    except Product.DoesNotExist:
+        raise Http404("No Product matches the given query.")
+    return json_response(ProductSerializer(product).data)
+
+
+# ==============================
+# CATEGORIES
+# ==============================
+@require_safe
+@versioned_condition()
+@catalog_cache_page()
+@api_errors
+async def category_list(request):
+    view = viewset_for(CategoryViewSet, request, "list")
+    rows = await paginate(view, view.get_queryset(), acount)
+    serializer = view.get_serializer(rows, many=True)
+    return json_response(view.paginator.get_paginated_response(serializer.data).data)
+
+
+@require_safe
+@versioned_condition()
+async def category_tree(request):
+    tree = await sync_to_async(cached_for_catalog)("category-tree", build_category_tree)
+    return json_response(tree)
+
+
+# ==============================
+# TEAM
+# ==============================
+@require_safe
+@versioned_condition(TEAM)
+@api_errors
+async def team_list(request):
+    view = viewset_for(TeamMemberViewSet, request, "list")
+    rows = await paginate(view, view.get_queryset(), acount)
+    serializer = view.get_serializer(rows, many=True)
+    return json_response(view.paginator.get_paginated_response(serializer.data).data)
@@ -0,0 +1,47 @@
+"""
+WSGI / ASGI application factories for ``manage.py benchmark_concurrency``:
+the project's own entry points, plus an optional artificial delay before
+every SQL query (BENCHMARK_DB_LATENCY_MS) standing in for the round trip
+to a remote database.
+
+    gunicorn "biologist_app.bench_server:wsgi()"
+    uvicorn --factory biologist_app.bench_server:asgi
+"""
+import os
+import time
+
+LATENCY_ENV = "BENCHMARK_DB_LATENCY_MS"
+
+
+def _delay_queries():
+    latency = float(os.environ.get(LATENCY_ENV) or 0) / 1000
+    if not latency:
+        return
+
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Once per wrapper (it reconnects many times), and outermost so
+        # execute_wrapper() blocks still pop their own wrapper
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(install, weak=False)
+
+
+def wsgi():
+    from biologist_project.wsgi import application
+
+    _delay_queries()
+    return application
+
+
+def asgi():
+    from biologist_project.asgi import application
+
+    _delay_queries()
+    return application
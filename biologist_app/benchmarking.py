@@ -0,0 +1,373 @@
+import http.client
+import math
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import count, cycle
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.settings import api_settings
+
+from .importing import CatalogImporter, CatalogRow
+from .models import Product
+
+try:
+    import resource
+except ImportError:  # not on Windows – process RSS is then omitted
+    resource = None
+
+# ==============================
+# SYNTHETIC CATALOG
+# ==============================
+CATEGORY_NAMES = [
+    "Nucleic Acid Purification", "PCR & qPCR", "Cloning", "Protein Expression",
+    "Western Blot", "Cell Culture", "Electrophoresis", "Antibodies",
+    "Transfection", "Sequencing Prep", "Bio Transformation", "Microbiology",
+]
+SUBCATEGORY_NAMES = [
+    "Kits", "Reagents", "Enzymes", "Buffers", "Markers", "Consumables",
+    "Accessories", "Standards",
+]
+NAME_PREFIXES = ["Bio", "Pure", "Ultra", "Rapid", "Hi-Fi", "Max", "Pro", "Easy"]
+NAME_TARGETS = [
+    "Plasmid", "Genomic DNA", "Total RNA", "Protein", "Taq", "Ladder",
+    "Agarose", "Competent Cell", "Lysis", "Transfer",
+]
+NAME_KINDS = [
+    "Mini Kit", "Midi Kit", "Master Mix", "Buffer", "Reagent", "Polymerase",
+    "Stain", "Membrane", "Column", "Kit",
+]
+QUANTITIES = [
+    "10 preps/kit", "50 preps/kit", "100 preps/kit", "250 preps/kit",
+    "100 µl", "500 µl", "1 ml", "5 ml", "100 rxn", "500 rxn",
+]
+# Variants per product – most products have one or two pack sizes.
+VARIANT_FANOUT = [(1, 40), (2, 30), (3, 15), (4, 6), (5, 4), (6, 2), (8, 2), (12, 1)]
+PRICE_ON_REQUEST = 0.25
+
+
+def synthetic_name(i):
+    """Unique, readable product name for index ``i``."""
+    combos = len(NAME_PREFIXES) * len(NAME_TARGETS) * len(NAME_KINDS)
+    prefix = NAME_PREFIXES[i % len(NAME_PREFIXES)]
+    target = NAME_TARGETS[(i // len(NAME_PREFIXES)) % len(NAME_TARGETS)]
+    kind = NAME_KINDS[(i // (len(NAME_PREFIXES) * len(NAME_TARGETS))) % len(NAME_KINDS)]
+    return f"{prefix} {target} {kind} {i // combos + 1}"
+
+
+def synthetic_catalog_rows(products, duplicate_ratio=0.1, categories=8, seed=42):
+    """
+    Yield CatalogRows for ``products`` products. ``duplicate_ratio`` of
+    them reuse an earlier name under another category (the same-name
+    duplicates the list deduplicates). Deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    category_names = CATEGORY_NAMES[:max(1, min(categories, len(CATEGORY_NAMES)))]
+    sizes, weights = zip(*VARIANT_FANOUT)
+    numbers = count(1)
+    names = []
+    used = {}  # name → categories it already has a product in
+
+    for i in range(products):
+        name = synthetic_name(i)
+        category = rng.choice(category_names)
+        if names and rng.random() < duplicate_ratio:
+            # same name in another category = a separate product row
+            earlier = rng.choice(names)
+            free = [c for c in category_names if c not in used[earlier]]
+            if free:
+                name, category = earlier, rng.choice(free)
+        names.append(name)
+        used.setdefault(name, set()).add(category)
+        subcategory = "" if rng.random() < 0.1 else f"{category} {rng.choice(SUBCATEGORY_NAMES)}"
+
+        fanout = rng.choices(sizes, weights)[0]
+        first_quantity = rng.randrange(len(QUANTITIES))
+        for v in range(fanout):
+            quantity = QUANTITIES[(first_quantity + v) % len(QUANTITIES)]
+            price = None
+            if rng.random() >= PRICE_ON_REQUEST:
+                # log-uniform ₹500 – ₹1.5L, like the real sheet
+                price = Decimal(str(round(math.exp(rng.uniform(math.log(500), math.log(150000))), 2)))
+            yield CatalogRow(
+                product_name=name,
+                category_name=category,
+                subcategory_name=subcategory,
+                catalog_number=f"SYN{next(numbers):08d}",
+                quantity=quantity,
+                unit="",
+                price=price,
+            )
+
+
+def generate_catalog(products, chunk_size=1000, **options):
+    """Write a synthetic catalog through the bulk importer; returns its stats."""
+    importer = CatalogImporter(chunk_size=chunk_size)
+    return importer.run(synthetic_catalog_rows(products, **options))
+
+
+# ==============================
+# BENCHMARK RUNNER
+# ==============================
+def percentile(sorted_values, pct):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _sample(rng, size):
+    """Random (slug, name) pairs without ORDER BY RANDOM() on a big table."""
+    bounds = Product.objects.order_by("pk").values_list("pk", flat=True)
+    first, last = bounds.first(), bounds.last()
+    if first is None:
+        return []
+    ids = [rng.randint(first, last) for _ in range(size * 2)]
+    return list(
+        Product.objects.filter(pk__in=ids, is_canonical=True)
+        .values_list("slug", "name")[:size]
+    )
+
+
+def benchmark_scenarios(rng, samples=50):
+    """name → callable(i) returning the URL of request ``i``."""
+    products = _sample(rng, samples) or [("missing", "kit")]
+    pages = max(1, min(50, Product.objects.canonical().count() // api_settings.PAGE_SIZE))
+    terms = [rng.choice(name.split()) for _, name in products]
+
+    return {
+        "products": lambda i: f"/api/products/?page={rng.randint(1, pages)}",
+        "products_search": lambda i: f"/api/products/?{urlencode({'search': rng.choice(terms)})}",
+        "categories": lambda i: "/api/categories/",
+        "category_tree": lambda i: "/api/categories/tree/",
+        "product_slug": lambda i: f"/api/products/slug/{rng.choice(products)[0]}/",
+        "team": lambda i: "/api/team/",
+    }
+
+
+def run_benchmark(endpoints=None, requests=100, warmup=5, memory_samples=5,
+                  cached=False, seed=42):
+    """
+    Drive each endpoint in-process with the test client and return
+    per-endpoint latency percentiles (ms), queries per request and peak
+    Python allocation (KB). Unless ``cached``, a unique throwaway query
+    parameter makes every request a response-cache miss.
+    """
+    rng = random.Random(seed)
+    scenarios = benchmark_scenarios(rng)
+    endpoints = endpoints or list(scenarios)
+    client = Client()
+    run_id = f"{time.time_ns():x}"  # never reuse an earlier run's cache entries
+    bust = count()
+
+    def url_for(name, i):
+        url = scenarios[name](i)
+        if cached:
+            return url
+        return f"{url}{'&' if '?' in url else '?'}_bench={run_id}-{next(bust)}"
+
+    results = {}
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        for name in endpoints:
+            for i in range(warmup):
+                client.get(url_for(name, i))
+
+            latencies, queries, errors = [], [], 0
+            for i in range(requests):
+                url = url_for(name, i)
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                if response.status_code != 200:
+                    errors += 1
+
+            # Separate pass: tracemalloc slows every allocation down
+            peak = 0
+            for i in range(memory_samples):
+                url = url_for(name, i)
+                tracemalloc.start()
+                client.get(url)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            latencies.sort()
+            results[name] = {
+                "requests": requests,
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "mean_ms": round(statistics.fmean(latencies), 3),
+                "queries_per_request": round(statistics.fmean(queries), 2),
+                "max_queries": max(queries),
+                "peak_memory_kb": round(peak / 1024, 1),
+            }
+
+    return {
+        "endpoints": results,
+        "process_max_rss_kb": (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        ),
+    }
+
+
+# ==============================
+# CONCURRENT THROUGHPUT (REAL SERVERS)
+# ==============================
+SERVER_HOST = "127.0.0.1"
+SERVER_START_TIMEOUT = 60
+READY_PATH = "/api/categories/tree/"
+
+
+def server_command(profile, port, workers):
+    """Current deployment (sync gunicorn) vs the ASGI profile (uvicorn)."""
+    if profile == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "biologist_app.bench_server:wsgi()",
+            "--bind", f"{SERVER_HOST}:{port}", "--workers", str(workers),
+            "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "--factory", "biologist_app.bench_server:asgi",
+        "--host", SERVER_HOST, "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+
+
+def _get(conn, url):
+    conn.request("GET", url, headers={"Host": "localhost", "Accept": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+@contextmanager
+def running_server(profile, port, workers=1, db_latency_ms=0):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+        BENCHMARK_DB_LATENCY_MS=str(db_latency_ms),
+    )
+    proc = subprocess.Popen(
+        server_command(profile, port, workers),
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        start_new_session=True,  # so the whole worker tree can be stopped
+    )
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(
+                    f"{profile} server exited:\n{proc.stderr.read().decode(errors='replace')}"
+                )
+            try:
+                conn = http.client.HTTPConnection(SERVER_HOST, port, timeout=30)
+                status = _get(conn, READY_PATH)
+                conn.close()
+                if status == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{profile} server not ready after {SERVER_START_TIMEOUT}s")
+            time.sleep(0.2)
+        yield proc
+    finally:
+        if proc.poll() is None:
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+
+
+def _load_worker(port, urls, offset, step, deadline):
+    conn = http.client.HTTPConnection(SERVER_HOST, port, timeout=60)
+    latencies, errors = [], 0
+    i = offset
+    while time.perf_counter() < deadline:
+        url = urls[i % len(urls)]
+        i += step
+        started = time.perf_counter()
+        try:
+            ok = _get(conn, url) == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()  # reconnects on the next request
+        latencies.append((time.perf_counter() - started) * 1000)
+        errors += not ok
+    conn.close()
+    return latencies, errors
+
+
+def run_load(port, urls, concurrency, duration):
+    """``concurrency`` keep-alive clients hammering ``urls`` for ``duration`` s."""
+    started = time.perf_counter()
+    deadline = started + duration
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(
+            lambda n: _load_worker(port, urls, n, concurrency, deadline),
+            range(concurrency),
+        ))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for worker_latencies, _ in results for ms in worker_latencies)
+    errors = sum(worker_errors for _, worker_errors in results)
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_concurrency_benchmark(profiles=("wsgi", "asgi"), endpoints=None, concurrency=32,
+                              duration=10, workers=1, db_latency_ms=0, port=8765,
+                              cached=False, seed=42):
+    """
+    Start each server profile for real and measure throughput / latency
+    of ``concurrency`` simultaneous clients over the same request mix.
+    Unless ``cached``, every URL is a response-cache miss.
+    """
+    rng = random.Random(seed)
+    scenarios = benchmark_scenarios(rng)
+    endpoints = endpoints or ["products", "product_slug", "categories", "team"]
+    run_id = f"{time.time_ns():x}"
+    urls = []
+    for i, name in zip(range(20000), cycle(endpoints)):
+        url = scenarios[name](i)
+        if not cached:
+            url = f"{url}{'&' if '?' in url else '?'}_bench={run_id}-{i}"
+        urls.append(url)
+
+    results = {}
+    for profile in profiles:
+        with running_server(profile, port, workers, db_latency_ms):
+            # warm-up (imports, first connections) on a cached endpoint
+            run_load(port, [READY_PATH], concurrency, 1)
+            results[profile] = run_load(port, urls, concurrency, duration)
+    return results
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Product
+
+BOOTSTRAP_LOCK_KEY = "catalog:bootstrap:lock"
+BOOTSTRAP_LOCK_ID = 7_170_001  # pg_advisory_lock key
+BOOTSTRAP_LOCK_TIMEOUT = 1800
+
+
+@contextmanager
+def bootstrap_lock(using=DEFAULT_DB_ALIAS):
+    """
+    Serialize bootstrap runs. Postgres: session advisory lock, shared by
+    every instance on the database. Elsewhere: the shared cache.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [BOOTSTRAP_LOCK_ID])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [BOOTSTRAP_LOCK_ID])
+        return
+
+    while not cache.add(BOOTSTRAP_LOCK_KEY, 1, timeout=BOOTSTRAP_LOCK_TIMEOUT):
+        time.sleep(1)
+    try:
+        yield
+    finally:
+        cache.delete(BOOTSTRAP_LOCK_KEY)
+
+
+def seed_catalog(file_path, **command_options):
+    """
+    Import ``file_path`` if the catalog is empty. Concurrent callers wait
+    for the lock, then find the catalog seeded and return False.
+    """
+    with bootstrap_lock():
+        if Product.objects.exists():
+            return False
+        call_command("import_products", file=str(file_path), **command_options)
+        return True
@@ -0,0 +1,249 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+from .instrumentation import note_cache
+
+
+# ==============================
+# DATA VERSIONS
+# ==============================
+# Every cached catalog response is keyed on this version, so bumping it
+# invalidates all of them at once – across every worker sharing the cache.
+CATALOG = "catalog"
+TEAM = "team"
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+
+def get_version(scope=CATALOG):
+    """
+    Current version of ``scope`` (nanosecond timestamp of its last change).
+    A missing key – first boot or culled entry – starts a fresh version,
+    which simply invalidates whatever was cached before.
+    """
+    key = f"{scope}:version"
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(scope=CATALOG):
+    cache.set(f"{scope}:version", time.time_ns(), timeout=None)
+
+
+def get_catalog_version():
+    return get_version(CATALOG)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG)
+
+
+def bump_team_version():
+    bump_version(TEAM)
+
+
+def cached_for_catalog(name, build, timeout=CATALOG_CACHE_TIMEOUT):
+    """Materialize ``build()`` once per catalog version (shared by workers)."""
+    key = f"catalog:v{get_catalog_version()}:{name}"
+    value = cache.get(key)
+    note_cache(name, value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+def _count_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    raw = f"{queryset.db}|{sql}|{params!r}"
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f"catalog:v{get_catalog_version()}:count:{digest}"
+
+
+def cached_count(queryset, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    ``queryset.count()`` memoised per catalog version and per SQL – i.e.
+    per filter / search combination – so paginated lists skip COUNT(*).
+    """
+    if queryset.query.is_empty():  # e.g. a search with no hits
+        return 0
+    key = _count_key(queryset)
+
+    count = cache.get(key)
+    note_cache("count", count is not None)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+async def acached_count(queryset, timeout=CATALOG_CACHE_TIMEOUT):
+    """``cached_count`` for async views (``acount()`` on a miss)."""
+    if queryset.query.is_empty():
+        return 0
+    key = _count_key(queryset)
+
+    count = await cache.aget(key)
+    note_cache("count", count is not None)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, timeout)
+    return count
+
+
+# ==============================
+# RESPONSE CACHE
+# ==============================
+def catalog_cache_key(request, version=None):
+    if version is None:
+        version = get_catalog_version()
+    raw = "|".join([
+        request.method,
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),
+    ])
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f"catalog:v{version}:{digest}"
+
+
+def shareable(response):
+    """
+    Whether one response can be served to every client. Only JSON is:
+    the browsable API's HTML carries the viewer's username and CSRF
+    token, and a response setting cookies belongs to its client.
+    """
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and response.get("Content-Type", "").startswith("application/json")
+    )
+
+
+VALIDATORS = ("ETag", "Last-Modified")
+
+
+def _cached(response):
+    """
+    A stored response without the validators of the viewer it was first
+    rendered for – ``condition()`` only sets headers that are missing, so
+    every viewer would otherwise be handed (and revalidate against) the
+    first viewer's ETag.
+    """
+    if response is not None:
+        for header in VALIDATORS:
+            if header in response:
+                del response[header]
+    return response
+
+
+def catalog_cache_page(timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Like ``cache_page`` but keyed on the catalog version instead of
+    relying on the TTL, so admin edits and imports show up immediately.
+    The key ignores Vary, so only ``shareable`` (JSON) responses are
+    stored. Wraps sync and async views alike.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view_func(request, *args, **kwargs)
+
+                key = catalog_cache_key(request)
+                response = _cached(await cache.aget(key))
+                note_cache("response", response is not None)
+                if response is not None:
+                    return response
+
+                # async views return rendered responses
+                response = await view_func(request, *args, **kwargs)
+                if shareable(response):
+                    await cache.aset(key, response, timeout)
+                return response
+
+            return async_wrapped
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+
+            key = catalog_cache_key(request)
+            response = _cached(cache.get(key))
+            note_cache("response", response is not None)
+            if response is not None:
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            def store(rendered):
+                # Content-Type is only known once the renderer has run
+                if shareable(rendered):
+                    cache.set(key, rendered, timeout)
+
+            if hasattr(response, "render") and callable(response.render):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+
+        return wrapped
+
+    return decorator
+
+
+# ==============================
+# CONDITIONAL GET (ETAG / LAST-MODIFIED)
+# ==============================
+def versioned_condition(scope=CATALOG):
+    """
+    ``condition()`` driven by a data version: a matching If-None-Match or
+    If-Modified-Since gets a 304 before any query or serialization runs.
+    The ETag also covers path, query string and Accept, since each is a
+    different representation, and the viewer's session / Authorization,
+    since the browsable API page shows who is logged in.
+    """
+    def version_for(request):
+        versions = getattr(request, "_data_versions", None)
+        if versions is None:
+            versions = request._data_versions = {}
+        if scope not in versions:
+            versions[scope] = get_version(scope)
+        return versions[scope]
+
+    def etag(request, *args, **kwargs):
+        raw = "|".join([
+            scope,
+            str(version_for(request)),
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+            request.META.get("HTTP_AUTHORIZATION", ""),
+        ])
+        return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        # Last-Modified has whole-second resolution: a version from the
+        # current second could be followed by another bump in that same
+        # second, which If-Modified-Since could not tell apart. Leave it
+        # out until the second has passed; the ETag still revalidates.
+        version = version_for(request)
+        if version // 10**9 >= time.time_ns() // 10**9:
+            return None
+        return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
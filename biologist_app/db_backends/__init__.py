@@ -0,0 +1,54 @@
+"""
+Django's PostgreSQL / SQLite backends, plus connection checkout timing:
+each checkout (from the psycopg pool, or a brand new connection) is added
+to the current request's metrics and to the checkout histogram, and the
+pool's own wait / timeout / reconnect counters are merged into
+/api/metrics/ on every registry flush.
+"""
+import time
+
+from ..metrics import registry
+
+# psycopg_pool.ConnectionPool.pop_stats() key → (counter, scale)
+POOL_COUNTERS = {
+    "requests_num": ("biologist_db_pool_checkouts_total", 1),
+    "requests_queued": ("biologist_db_pool_waits_total", 1),
+    "requests_wait_ms": ("biologist_db_pool_wait_seconds_total", 0.001),
+    "requests_errors": ("biologist_db_pool_timeouts_total", 1),
+    "connections_num": ("biologist_db_pool_connections_opened_total", 1),
+    "connections_lost": ("biologist_db_pool_connections_lost_total", 1),
+}
+
+# alias → the pool this process checked connections out of
+_pools = {}
+
+
+class TimedConnectionMixin:
+    def get_new_connection(self, conn_params):
+        # loaded while models are still being defined: import DRF-side lazily
+        from ..instrumentation import note_connect
+
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        elapsed = time.perf_counter() - started
+
+        pool = getattr(self, "pool", None)
+        if pool is not None:
+            _pools[self.alias] = pool
+        note_connect(elapsed)
+        registry.record_checkout(self.alias, "pool" if pool else "connect", elapsed)
+        return connection
+
+
+def pool_stats():
+    """Pool counters since the previous call, for the metrics registry."""
+    for alias, pool in list(_pools.items()):
+        labels = f'alias="{alias}"'
+        stats = pool.pop_stats()
+        for key, (name, scale) in POOL_COUNTERS.items():
+            value = stats.get(key, 0)
+            if value:
+                yield name, labels, value * scale
+
+
+registry.add_collector(pool_stats)
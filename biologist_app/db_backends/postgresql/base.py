@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from .. import TimedConnectionMixin
+
+
+class DatabaseWrapper(TimedConnectionMixin, base.DatabaseWrapper):
+    pass
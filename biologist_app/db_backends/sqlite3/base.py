@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from .. import TimedConnectionMixin
+
+
+class DatabaseWrapper(TimedConnectionMixin, base.DatabaseWrapper):
+    pass
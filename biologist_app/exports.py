@@ -0,0 +1,169 @@
+import csv
+import io
+import re
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Enquiry, ProductVariant
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ("csv", "xlsx")
+XLSX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+
+# Headers normalize (strip / lower / spaces → _) to the columns
+# import_products reads, so the export can be imported as-is.
+CATALOG_COLUMNS = (
+    ("Product Name", "product__name"),
+    ("Category", "product__category__name"),
+    ("Subcategory", "product__subcategory__name"),
+    ("Catalog Number", "catalog_number"),
+    ("Quantity", "quantity"),
+    ("Unit", "unit"),
+    ("Price", "price"),
+)
+
+ENQUIRY_COLUMNS = (
+    ("Created At", "created_at"),
+    ("Name", "name"),
+    ("Email", "email"),
+    ("Phone", "phone"),
+    ("Product", "product__name"),
+    ("Catalog Number", "variant__catalog_number"),
+    ("Message", "message"),
+)
+# Typed into the public enquiry form by anyone
+ENQUIRY_UNTRUSTED = {"name", "email", "phone", "message"}
+
+# Cells starting with these run as formulas in Excel / LibreOffice
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# "+91 98765 43210", "(030) 123-456": left as typed, not escaped
+PLAIN_PHONE = re.compile(r"[+(]?\d[\d\s()+-]*")
+
+
+# ==============================
+# ROWS (CHUNKED, NO MODEL INSTANCES)
+# ==============================
+def _plain(value):
+    """Aware datetimes → naive local time (XLSX cannot store a tz)."""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def _escape_formula(value, lookup):
+    """Prefix ``'`` so a spreadsheet shows the text instead of running it."""
+    if not isinstance(value, str) or not value.startswith(FORMULA_PREFIXES):
+        return value
+    if lookup == "phone" and PLAIN_PHONE.fullmatch(value):
+        return value
+    return "'" + value
+
+
+def _rows(queryset, columns):
+    lookups = [lookup for _, lookup in columns]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [_plain(value) for value in row]
+
+
+def catalog_rows():
+    # Creation order, so a re-import recreates products in the same order
+    return _rows(ProductVariant.objects.order_by("product_id", "id"), CATALOG_COLUMNS)
+
+
+def parse_date_range(params):
+    """``?from=&to=`` (YYYY-MM-DD, inclusive) → dates; ValueError if malformed."""
+    dates = []
+    for key in ("from", "to"):
+        raw = params.get(key)
+        value = parse_date(raw) if raw else None
+        if raw and value is None:
+            raise ValueError(f"Invalid date: {raw}")
+        dates.append(value)
+    return dates
+
+
+def enquiry_rows(date_from=None, date_to=None):
+    """Enquiries received on ``date_from`` … ``date_to`` (inclusive dates)."""
+    queryset = Enquiry.objects.order_by("created_at", "id")
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        queryset = queryset.filter(created_at__gte=start)
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        queryset = queryset.filter(created_at__lt=end)
+    return _rows(queryset, ENQUIRY_COLUMNS)
+
+
+# ==============================
+# RESPONSES
+# ==============================
+def csv_response(filename, columns, rows, untrusted=()):
+    """
+    Stream CSV a chunk of rows at a time; nothing is held in memory.
+    CSV has no cell types, so ``untrusted`` columns are formula-escaped.
+    """
+    escape = [lookup if lookup in untrusted else None for _, lookup in columns]
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for header, _ in columns])
+        for i, row in enumerate(rows, 1):
+            writer.writerow([
+                _escape_formula(value, lookup) if lookup else value
+                for value, lookup in zip(row, escape)
+            ])
+            if i % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(filename, columns, rows):
+    """
+    XLSX is a zip and can only be sent once complete, so rows go through
+    openpyxl's write-only (streaming) writer into a temp file, which is
+    then streamed back. Cells are typed, so text is stored verbatim: a
+    leading ``=`` is written as a string cell rather than a formula.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+
+    def cell(value):
+        if isinstance(value, str) and value.startswith("="):
+            value = WriteOnlyCell(sheet, value)
+            value.data_type = "s"
+        return value
+
+    sheet.append([header for header, _ in columns])
+    for row in rows:
+        sheet.append([cell(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE
+    )
+
+
+def export_response(fmt, name, columns, rows, untrusted=()):
+    stamp = timezone.localdate().isoformat()
+    filename = f"{name}-{stamp}.{fmt}"
+    if fmt == "xlsx":
+        return xlsx_response(filename, columns, rows)
+    return csv_response(filename, columns, rows, untrusted)
@@ -0,0 +1,126 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import ProductVariant
+
+FACETS_PARAM = "facets"
+FACET_NAMES = ("category", "subcategory", "price")
+
+# Filters each facet leaves out: it counts what picking one of its values
+# would give under the *other* active filters (a subcategory implies its
+# category, so the category facet drops both).
+FACET_IGNORES = {
+    "category": ("category", "subcategory"),
+    "subcategory": ("subcategory",),
+    "price": ("price_min", "price_max", "price_on_request"),
+}
+
+# (key, min inclusive, max exclusive) – a product falls in every band one
+# of its variants is priced in; "on_request" = no priced variant (POR).
+PRICE_BANDS = (
+    ("under_10000", None, 10000),
+    ("10000_25000", 10000, 25000),
+    ("25000_50000", 25000, 50000),
+    ("50000_100000", 50000, 100000),
+    ("100000_plus", 100000, None),
+)
+
+
+def requested_facets(params):
+    """``?facets=category,price`` → known facet names, in FACET_NAMES order."""
+    requested = {
+        part.strip() for part in params.get(FACETS_PARAM, "").split(",")
+    }
+    if "all" in requested:
+        return list(FACET_NAMES)
+    return [name for name in FACET_NAMES if name in requested]
+
+
+# =========================
+# CATEGORY / SUBCATEGORY
+# =========================
+def _category_facets(queryset, names):
+    """Both taxonomy facets from a single GROUP BY (category, subcategory)."""
+    rows = (
+        queryset.order_by()
+        .values("category_id", "category__name", "subcategory_id", "subcategory__name")
+        .annotate(count=Count("pk"))
+    )
+    categories = {}
+    subcategories = {}
+    for row in rows:
+        category = categories.setdefault(
+            row["category_id"],
+            {"id": row["category_id"], "name": row["category__name"], "count": 0},
+        )
+        category["count"] += row["count"]
+        if row["subcategory_id"] is not None:
+            subcategories[row["subcategory_id"]] = {
+                "id": row["subcategory_id"],
+                "name": row["subcategory__name"],
+                "category": row["category_id"],
+                "count": row["count"],
+            }
+
+    def ordered(items):
+        return sorted(items, key=lambda item: (-item["count"], item["name"]))
+
+    facets = {}
+    if "category" in names:
+        facets["category"] = ordered(categories.values())
+    if "subcategory" in names:
+        facets["subcategory"] = ordered(subcategories.values())
+    return facets
+
+
+# =========================
+# PRICE BANDS
+# =========================
+def _priced_variants(low=None, high=None):
+    variants = ProductVariant.objects.filter(
+        product=OuterRef("pk"), price__isnull=False
+    )
+    if low is not None:
+        variants = variants.filter(price__gte=low)
+    if high is not None:
+        variants = variants.filter(price__lt=high)
+    return Exists(variants)
+
+
+def _price_facets(queryset):
+    """Every band counted in one conditional aggregate."""
+    aggregates = {
+        key: Count("pk", filter=Q(_priced_variants(low, high)))
+        for key, low, high in PRICE_BANDS
+    }
+    aggregates["on_request"] = Count("pk", filter=~Q(_priced_variants()))
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    bands = [
+        {"key": key, "min": low, "max": high, "count": counts[key]}
+        for key, low, high in PRICE_BANDS
+    ]
+    bands.append(
+        {"key": "on_request", "min": None, "max": None, "count": counts["on_request"]}
+    )
+    return bands
+
+
+def facet_counts(filtered, names):
+    """
+    Per-facet counts. ``filtered(ignore)`` returns the list's filtered,
+    deduplicated queryset – the rows it pages through – without the
+    query params in ``ignore``, and the same queryset object whenever
+    that leaves the same filters: the taxonomy facets then share one
+    GROUP BY.
+    """
+    facets = {}
+    taxonomy = {}
+    for name in ("category", "subcategory"):
+        if name in names:
+            queryset = filtered(FACET_IGNORES[name])
+            taxonomy.setdefault(id(queryset), (queryset, []))[1].append(name)
+    for queryset, group in taxonomy.values():
+        facets.update(_category_facets(queryset, group))
+    if "price" in names:
+        facets["price"] = _price_facets(filtered(FACET_IGNORES["price"]))
+    return {name: facets[name] for name in names}
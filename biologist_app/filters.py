@@ -0,0 +1,74 @@
+from django.db.models import Exists, F, OuterRef
+from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Product, ProductVariant
+
+ORDERING_PARAM = "ordering"
+
+
+# =========================
+# FILTERS
+# =========================
+class ProductFilter(filters.FilterSet):
+    """
+    ``?price_min=`` / ``?price_max=`` keep products with a variant priced
+    in that range; price-on-request products never match a price,
+    ``?price_on_request=true`` lists them.
+    """
+
+    price_min = filters.NumberFilter(method="filter_price")
+    price_max = filters.NumberFilter(method="filter_price")
+    price_on_request = filters.BooleanFilter(field_name="min_price", lookup_expr="isnull")
+
+    class Meta:
+        model = Product
+        fields = ["category", "subcategory"]
+
+    def filter_price(self, queryset, name, value):
+        low = self.form.cleaned_data.get("price_min")
+        high = self.form.cleaned_data.get("price_max")
+        if low is None or high is None:
+            # One bound: comparing it with the product's price bounds is exact
+            if name == "price_min":
+                return queryset.filter(max_price__gte=value)
+            return queryset.filter(min_price__lte=value)
+
+        if name == "price_max":
+            return queryset  # applied with price_min
+        # Overlapping bounds (variants at 10 and 250 vs 100–200) aren't
+        # enough – one variant must be priced inside the range
+        in_range = ProductVariant.objects.filter(
+            product=OuterRef("pk"), price__gte=low, price__lte=high
+        )
+        return queryset.filter(max_price__gte=low, min_price__lte=high).filter(
+            Exists(in_range)
+        )
+
+
+# =========================
+# ORDERING
+# =========================
+class ProductOrderingFilter(BaseFilterBackend):
+    """
+    ``?ordering=price`` – cheapest first (lowest variant price);
+    ``?ordering=-price`` – dearest first (highest variant price);
+    ``?ordering=name`` – the default. Price-on-request products go last
+    either way; unknown values are ignored.
+    """
+
+    ORDERINGS = {
+        "name": ("name",),
+        "price": (F("min_price").asc(nulls_last=True), "id"),
+        "-price": (F("max_price").desc(nulls_last=True), "-id"),
+    }
+
+    @staticmethod
+    def requested(request):
+        return request.query_params.get(ORDERING_PARAM, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.ORDERINGS.get(self.requested(request))
+        if ordering is None:
+            return queryset
+        return queryset.order_by(*ordering)
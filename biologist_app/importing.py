@@ -0,0 +1,349 @@
+import hashlib
+from collections import Counter, namedtuple
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .caching import bump_catalog_version
+from .models import (
+    Category,
+    SubCategory,
+    Product,
+    ProductVariant,
+    CatalogImportRun,
+    ImportFingerprint,
+    normalize_catalog_number,
+)
+
+# One normalized spreadsheet row – everything the importer needs.
+CatalogRow = namedtuple(
+    "CatalogRow",
+    [
+        "product_name",
+        "category_name",
+        "subcategory_name",
+        "catalog_number",
+        "quantity",
+        "unit",
+        "price",
+    ],
+)
+
+VARIANT_FIELDS = ["product_id", "quantity", "unit", "price"]
+
+# Bump when row normalization changes so old fingerprints stop matching.
+FINGERPRINT_VERSION = "1"
+
+
+# ==============================
+# READING
+# ==============================
+def _pandas():
+    # pandas (and numpy) cost ~0.5s to import – only load them when a
+    # sheet is actually read.
+    import pandas
+
+    return pandas
+
+
+def clean(value):
+    if _pandas().isna(value):
+        return ""
+    return str(value).strip()
+
+
+def clean_price(value):
+    if _pandas().isna(value):
+        return None
+    value = str(value).strip().lower()
+    if value in ["por", "p.o.r", "n/a", "na", ""]:
+        return None
+    try:
+        return Decimal(value)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def read_catalog_frame(file_path):
+    pd = _pandas()
+    if str(file_path).lower().endswith(".csv"):
+        # Text as-is (keeps leading zeros in catalog numbers)
+        df = pd.read_csv(file_path, dtype=str)
+    else:
+        df = pd.read_excel(file_path)
+
+    # Normalize column names
+    df.columns = (
+        df.columns.str.strip()
+        .str.lower()
+        .str.replace(" ", "_")
+    )
+    return df
+
+
+def iter_catalog_rows(df):
+    """
+    Yield a CatalogRow per sheet row, or None for rows the importer
+    skips (no product name or catalog number).
+    """
+    for _, row in df.iterrows():
+        product_name = clean(row.get("product_name"))
+        catalog_number = clean(
+            row.get("catalog_number") or row.get("catalog_no")
+        )
+        if not product_name or not catalog_number:
+            yield None
+            continue
+
+        yield CatalogRow(
+            product_name=product_name,
+            category_name=clean(row.get("category")),
+            subcategory_name=clean(row.get("subcategory")),
+            catalog_number=catalog_number,
+            quantity=clean(row.get("quantity")),
+            unit=clean(row.get("unit")) or "",
+            price=clean_price(row.get("price")),
+        )
+
+
+# ==============================
+# BULK WRITE ENGINE
+# ==============================
+class CatalogImporter:
+    """
+    Set-based equivalent of the old row-by-row get_or_create /
+    update_or_create import: existing keys are preloaded into dicts and
+    each chunk is written with bulk_create / bulk_update in a single
+    transaction, so the query count per chunk is fixed.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.stats = Counter()
+        self.categories = {}       # slug → Category
+        self.subcategories = {}    # (category_id, name) → SubCategory
+
+    def run(self, rows):
+        self.categories = {c.slug: c for c in Category.objects.all()}
+        self.subcategories = {
+            (s.category_id, s.name): s for s in SubCategory.objects.all()
+        }
+
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.stats["rows_skipped"] += sum(1 for row in chunk if row is None)
+            chunk = [row for row in chunk if row is not None]
+            if chunk:
+                with transaction.atomic():
+                    self.import_chunk(chunk)
+
+        if self.stats["products_created"] or self.stats["variants_created"] or self.stats["variants_updated"]:
+            bump_catalog_version()
+        return self.stats
+
+    # ───────── per chunk ─────────
+    def import_chunk(self, rows):
+        categories = self.resolve_categories(rows)
+        subcategories = self.resolve_subcategories(rows, categories)
+        products, touched = self.resolve_products(rows, categories, subcategories)
+        touched |= self.write_variants(rows, products)
+
+        # bulk writes bypass signals – refresh derived columns once per chunk
+        names = Product.objects.filter(pk__in=touched).values_list("name", flat=True)
+        Product.objects.refresh_canonical(names)
+        Product.objects.filter(pk__in=touched).refresh_search()
+        Product.objects.filter(pk__in=touched).refresh_price_bounds()
+
+    def resolve_categories(self, rows):
+        new = {}
+        per_row = []
+        for row in rows:
+            slug = slugify(row.category_name or "Uncategorized")
+            if slug not in self.categories and slug not in new:
+                new[slug] = Category(
+                    slug=slug, name=row.category_name or "Uncategorized"
+                )
+            per_row.append(slug)
+
+        for category in Category.objects.bulk_create(new.values()):
+            self.categories[category.slug] = category
+        return [self.categories[slug] for slug in per_row]
+
+    def resolve_subcategories(self, rows, categories):
+        new = {}
+        per_row = []
+        for row, category in zip(rows, categories):
+            if not row.subcategory_name:
+                per_row.append(None)
+                continue
+            key = (category.id, row.subcategory_name)
+            if key not in self.subcategories and key not in new:
+                new[key] = SubCategory(category=category, name=row.subcategory_name)
+            per_row.append(key)
+
+        for subcategory in SubCategory.objects.bulk_create(new.values()):
+            self.subcategories[(subcategory.category_id, subcategory.name)] = subcategory
+        return [self.subcategories[key] if key else None for key in per_row]
+
+    def resolve_products(self, rows, categories, subcategories):
+        """(name, category_id) → product id; existing products win."""
+        names = {row.product_name for row in rows}
+        existing = {}
+        for pk, name, category_id in (
+            Product.objects.filter(name__in=names)
+            .order_by("id")
+            .values_list("id", "name", "category_id")
+        ):
+            existing.setdefault((name, category_id), pk)
+
+        new = {}
+        for row, category, subcategory in zip(rows, categories, subcategories):
+            key = (row.product_name, category.id)
+            if key in existing or key in new:
+                continue
+            new[key] = Product(
+                name=row.product_name,
+                category=category,
+                subcategory=subcategory,
+            )
+
+        Product.objects.allocate_slugs(new.values())
+        for key, product in zip(new, Product.objects.bulk_create(new.values())):
+            existing[key] = product.pk
+
+        self.stats["products_created"] += len(new)
+        return existing, {product.pk for product in new.values()}
+
+    def write_variants(self, rows, products):
+        numbers = {row.catalog_number for row in rows}
+        variants = {
+            v.catalog_number: v
+            for v in ProductVariant.objects.filter(catalog_number__in=numbers)
+        }
+        new = {}
+        changed = {}
+        touched = set()
+
+        for row in rows:
+            values = {
+                "product_id": products[(row.product_name, self.category_id(row))],
+                "quantity": row.quantity,
+                "unit": row.unit,
+                "price": row.price,
+            }
+            variant = new.get(row.catalog_number) or variants.get(row.catalog_number)
+            if variant is None:
+                variant = ProductVariant(
+                    catalog_number=row.catalog_number,
+                    catalog_number_normalized=normalize_catalog_number(row.catalog_number),
+                    **values,
+                )
+                new[row.catalog_number] = variant
+                touched.add(variant.product_id)
+                self.stats["variants_created"] += 1
+                continue
+
+            if all(getattr(variant, field) == value for field, value in values.items()):
+                self.stats["variants_unchanged"] += 1
+                continue
+
+            touched.update({variant.product_id, values["product_id"]})
+            for field, value in values.items():
+                setattr(variant, field, value)
+            if variant.pk is not None:
+                changed[variant.pk] = variant
+            self.stats["variants_updated"] += 1
+
+        ProductVariant.objects.bulk_create(new.values())
+        ProductVariant.objects.bulk_update(changed.values(), VARIANT_FIELDS)
+        return touched
+
+    def category_id(self, row):
+        return self.categories[slugify(row.category_name or "Uncategorized")].id
+
+
+# ==============================
+# INCREMENTAL IMPORT (FINGERPRINTS)
+# ==============================
+CatalogDiff = namedtuple("CatalogDiff", ["added", "changed", "removed", "unchanged"])
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256(FINGERPRINT_VERSION.encode())
+    with open(file_path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_fingerprint(row):
+    raw = "\x1f".join("" if value is None else str(value) for value in row)
+    return hashlib.sha1(f"{FINGERPRINT_VERSION}\x1f{raw}".encode()).hexdigest()
+
+
+def last_import_run():
+    return CatalogImportRun.objects.order_by("-id").first()
+
+
+def latest_rows(rows):
+    """catalog number → last row for it (later rows win, as in the import)."""
+    latest = {}
+    for row in rows:
+        if row is not None:
+            latest[row.catalog_number] = row
+    return latest
+
+
+def diff_catalog(latest):
+    previous = dict(
+        ImportFingerprint.objects.values_list("catalog_number", "fingerprint")
+    )
+    added, changed = [], []
+    unchanged = 0
+    for number, row in latest.items():
+        fingerprint = previous.pop(number, None)
+        if fingerprint is None:
+            added.append(row)
+        elif fingerprint != row_fingerprint(row):
+            changed.append(row)
+        else:
+            unchanged += 1
+    return CatalogDiff(added, changed, sorted(previous), unchanged)
+
+
+def save_fingerprints(rows, removed=(), batch_size=1000):
+    ImportFingerprint.objects.bulk_create(
+        [
+            ImportFingerprint(
+                catalog_number=row.catalog_number,
+                fingerprint=row_fingerprint(row),
+            )
+            for row in rows
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["catalog_number"],
+        update_fields=["fingerprint"],
+    )
+    removed = list(removed)
+    for i in range(0, len(removed), batch_size):
+        ImportFingerprint.objects.filter(
+            catalog_number__in=removed[i:i + batch_size]
+        ).delete()
+
+
+def remove_variants(catalog_numbers, batch_size=500):
+    """Delete variants dropped from the sheet (signals keep derived data)."""
+    catalog_numbers = list(catalog_numbers)
+    deleted = 0
+    for i in range(0, len(catalog_numbers), batch_size):
+        count, _ = ProductVariant.objects.filter(
+            catalog_number__in=catalog_numbers[i:i + batch_size]
+        ).delete()
+        deleted += count
+    return deleted
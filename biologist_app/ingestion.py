@@ -0,0 +1,334 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import request_started
+from django.db import DataError, IntegrityError, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Enquiry, Product, ProductVariant
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recent (
+    idempotency_key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    client INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recent_fingerprint ON recent (fingerprint, client);
+"""
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+FLUSH_LOCK_KEY = "enquiry:flush:lock"
+RESUME_UID = "enquiry_spool_resume"
+
+# Without an Idempotency-Key header, an identical submission less than
+# this many seconds after the last one shares its key – enough to absorb
+# double-clicks. Each repeat restarts the window.
+DEDUP_WINDOW = 600
+# How long a client Idempotency-Key stays bound to its submission
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key reused for a different submission."""
+
+
+# ==============================
+# SPOOL (LOCAL SQLITE JOURNAL)
+# ==============================
+def spool_path():
+    return Path(settings.ENQUIRY_SPOOL_PATH)
+
+
+def _connect():
+    path = spool_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")  # an accepted enquiry survives a crash
+    conn.executescript(SPOOL_SCHEMA)
+    return conn
+
+
+def client_idempotency_key(request):
+    """The ``Idempotency-Key`` header (hashed past 64 chars), or None."""
+    supplied = request.META.get(IDEMPOTENCY_HEADER, "").strip()
+    if not supplied:
+        return None
+    if len(supplied) <= 64:
+        return supplied
+    return hashlib.sha256(supplied.encode()).hexdigest()
+
+
+def _fingerprint(data):
+    raw = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _recent_key(conn, fingerprint, client_key, now):
+    """
+    Key of the submission this one repeats, or None if it is new. A
+    client key must come back with the payload it was first sent with.
+    """
+    if client_key is not None:
+        row = conn.execute(
+            "SELECT fingerprint FROM recent WHERE idempotency_key = ? AND client = 1",
+            (client_key,),
+        ).fetchone()
+        if row and row[0] != fingerprint:
+            raise IdempotencyConflict(client_key)
+        return client_key if row else None
+
+    row = conn.execute(
+        "SELECT idempotency_key FROM recent WHERE fingerprint = ? AND client = 0",
+        (fingerprint,),
+    ).fetchone()
+    if row:
+        conn.execute(
+            "UPDATE recent SET expires_at = ? WHERE idempotency_key = ?",
+            (now + DEDUP_WINDOW, row[0]),
+        )
+        return row[0]
+    return None
+
+
+def spool_enquiry(data, client_key=None):
+    """
+    Append a validated enquiry to the spool. Returns ``(key, added)``;
+    ``added`` is False for a repeat of a recent submission, which is
+    dropped. Raises ``IdempotencyConflict`` when ``client_key`` was
+    already used for different data.
+    """
+    fingerprint = _fingerprint(data)
+    payload = dict(data, created_at=timezone.now())
+    now = time.time()
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM recent WHERE expires_at < ?", (now,))
+            key = _recent_key(conn, fingerprint, client_key, now)
+            if key is not None:
+                conn.execute("COMMIT")
+                return key, False
+
+            key = client_key or uuid.uuid4().hex
+            ttl = IDEMPOTENCY_TTL if client_key else DEDUP_WINDOW
+            conn.execute(
+                "INSERT INTO recent (idempotency_key, fingerprint, client, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, fingerprint, client_key is not None, now + ttl),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO spool (idempotency_key, payload) VALUES (?, ?)",
+                (key, json.dumps(payload, cls=DjangoJSONEncoder)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        added = cursor.rowcount == 1
+        row_id = cursor.lastrowid
+
+    if added:
+        flusher.wake(full_batch=row_id % settings.ENQUIRY_FLUSH_BATCH == 0)
+    return key, added
+
+
+def pending_count(table="spool"):
+    """Enquiries waiting in the spool (or parked in ``dead_letter``)."""
+    if not spool_path().exists():
+        return 0
+    with closing(_connect()) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+# ==============================
+# FLUSH (SPOOL → DATABASE)
+# ==============================
+# Errors that belong to one row; anything else (connection lost, …)
+# leaves the whole batch spooled for the next pass.
+ROW_ERRORS = (IntegrityError, DataError)
+
+
+def _enquiry(key, payload):
+    data = json.loads(payload)
+    data["created_at"] = parse_datetime(data["created_at"])
+    return Enquiry(idempotency_key=key, **data)
+
+
+def _write_batch(rows):
+    """
+    bulk_create one batch of spool rows. When the database rejects it,
+    retry row by row to find the culprits. Returns ``(row, error)`` for
+    every row that cannot be written.
+    """
+    failed = []
+    pending = []
+    for row in rows:
+        try:
+            pending.append((row, _enquiry(row[1], row[2])))
+        except (ValueError, TypeError, KeyError) as exc:  # payload from an older release
+            failed.append((row, exc))
+
+    # ids were only type-checked on the request path
+    enquiries = [enquiry for _, enquiry in pending]
+    product_ids = {e.product_id for e in enquiries if e.product_id}
+    variant_ids = {e.variant_id for e in enquiries if e.variant_id}
+    products = set(
+        Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True)
+    ) if product_ids else set()
+    variants = set(
+        ProductVariant.objects.filter(pk__in=variant_ids).values_list("pk", flat=True)
+    ) if variant_ids else set()
+    for enquiry in enquiries:
+        if enquiry.product_id not in products:
+            enquiry.product_id = None
+        if enquiry.variant_id not in variants:
+            enquiry.variant_id = None
+
+    # Replays of already written keys are dropped here rather than with
+    # ignore_conflicts, which on SQLite would also swallow NOT NULL errors.
+    written = set(
+        Enquiry.objects.filter(
+            idempotency_key__in=[e.idempotency_key for e in enquiries]
+        ).values_list("idempotency_key", flat=True)
+    )
+    pending = [(row, e) for row, e in pending if e.idempotency_key not in written]
+
+    try:
+        with transaction.atomic():
+            Enquiry.objects.bulk_create([enquiry for _, enquiry in pending])
+        return failed
+    except ROW_ERRORS:
+        pass
+
+    for row, enquiry in pending:
+        try:
+            with transaction.atomic():
+                enquiry.save(force_insert=True)
+        except ROW_ERRORS as exc:
+            # written meanwhile by another flush (e.g. drain_enquiries)
+            if not Enquiry.objects.filter(idempotency_key=enquiry.idempotency_key).exists():
+                failed.append((row, exc))
+    return failed
+
+
+def flush_spool(batch_size=None):
+    """
+    Move spooled enquiries into the database, ``batch_size`` per
+    bulk_create. Rows leave the spool only after their batch commits, so a
+    crash replays the batch and the unique idempotency key drops repeats
+    (at-least-once, no duplicates). Rows the database rejects are moved
+    to the ``dead_letter`` table so they cannot block the ones behind
+    them. Returns the number of rows drained.
+    """
+    batch_size = batch_size or settings.ENQUIRY_FLUSH_BATCH
+    if not spool_path().exists():
+        return 0
+
+    drained = 0
+    with closing(_connect()) as conn:
+        while True:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, payload FROM spool ORDER BY id LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                break
+            failed = _write_batch(rows)
+            for (_, key, _), exc in failed:
+                # the message may quote the row's personal data; dead_letter has it
+                logger.error(
+                    "Enquiry %s rejected (%s), moved to dead_letter", key, type(exc).__name__
+                )
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO dead_letter (idempotency_key, payload, error, failed_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (key, payload, repr(exc), timezone.now().isoformat())
+                    for (_, key, payload), exc in failed
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM spool WHERE id = ?", [(row[0],) for row in rows]
+            )
+            conn.execute("COMMIT")
+            drained += len(rows) - len(failed)
+    return drained
+
+
+class SpoolFlusher:
+    """
+    Per-process daemon thread: flushes every ENQUIRY_FLUSH_INTERVAL
+    seconds, or straight away once a full batch is waiting. The cache
+    lock keeps gunicorn workers from flushing at the same time.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self, full_batch=False):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="enquiry-flusher", daemon=True
+                )
+                self._thread.start()
+        if full_batch:
+            self._event.set()
+
+    def _run(self):
+        while True:
+            self._event.wait(settings.ENQUIRY_FLUSH_INTERVAL)
+            self._event.clear()
+            if not cache.add(FLUSH_LOCK_KEY, 1, timeout=300):
+                continue
+            try:
+                flush_spool()
+            except Exception:  # rows stay spooled; the next pass retries
+                logger.exception("Enquiry spool flush failed")
+            finally:
+                cache.delete(FLUSH_LOCK_KEY)
+                connections.close_all()  # this thread's connections only
+
+
+flusher = SpoolFlusher()
+
+
+def resume_spooled(sender, **kwargs):
+    """
+    ``request_started`` receiver, once per process: enquiries left in the
+    spool by a crash or deploy are flushed without waiting for the next
+    submission to start the flusher.
+    """
+    request_started.disconnect(dispatch_uid=RESUME_UID)
+    if pending_count():
+        flusher.wake(full_batch=True)
@@ -0,0 +1,327 @@
+import heapq
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework import exceptions, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import registry
+
+logger = logging.getLogger("biologist_app.requests")
+
+# Metrics of the request being handled on this thread / task (None when
+# the request is not instrumented, which makes every hook a no-op).
+_current = ContextVar("request_metrics", default=None)
+
+SLOW_SQL_CHARS = 1000
+
+
+# ==============================
+# PER-REQUEST METRICS
+# ==============================
+class RequestMetrics:
+    """
+    Where one request spent its time. Each query costs two clock reads,
+    and only the ``keep`` slowest statements (SQL text, no params) are
+    remembered.
+    """
+
+    __slots__ = (
+        "started", "total", "queries", "db_time", "connects", "connect_time",
+        "serialize_time", "render_time", "caches", "keep", "_worst",
+    )
+
+    def __init__(self, keep=5):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.connects = 0
+        self.connect_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.caches = {}
+        self.keep = keep
+        self._worst = []  # min-heap of (seconds, n, sql)
+
+    def add_query(self, sql, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        if self.keep:
+            entry = (elapsed, self.queries, sql)
+            if len(self._worst) < self.keep:
+                heapq.heappush(self._worst, entry)
+            elif elapsed > self._worst[0][0]:
+                heapq.heapreplace(self._worst, entry)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def worst_queries(self):
+        return [
+            {"ms": round(elapsed * 1000, 2), "sql": sql[:SLOW_SQL_CHARS]}
+            for elapsed, _, sql in sorted(self._worst, reverse=True)
+        ]
+
+    def server_timing(self):
+        parts = [f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"']
+        if self.connects:
+            parts.append(
+                f'conn;dur={self.connect_time * 1000:.1f};desc="{self.connects} checkouts"'
+            )
+        parts += [
+            f"serialize;dur={self.serialize_time * 1000:.1f}",
+            f"render;dur={self.render_time * 1000:.1f}",
+        ]
+        if self.caches:
+            states = " ".join(f"{name}={state}" for name, state in self.caches.items())
+            parts.append(f'cache;desc="{states}"')
+        parts.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        return {
+            "total_ms": round(self.total * 1000, 1),
+            "db_ms": round(self.db_time * 1000, 1),
+            "queries": self.queries,
+            "connect_ms": round(self.connect_time * 1000, 1),
+            "serialize_ms": round(self.serialize_time * 1000, 1),
+            "render_ms": round(self.render_time * 1000, 1),
+            "cache": self.caches,
+            "worst_queries": self.worst_queries(),
+        }
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Every connection carries the recorder permanently. Connections are
+    per thread, but the contextvar follows the request into the threads
+    async views run their ORM calls in.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def route_name(request):
+    """Metrics label: the URL name (or view path), not the raw path."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unmatched"
+
+
+def current_metrics():
+    return _current.get()
+
+
+def note_connect(seconds):
+    """Record a DB connection checkout (from the pool, or a new connection)."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.connects += 1
+        metrics.connect_time += seconds
+
+
+def note_cache(name, hit):
+    """Record a cache lookup (``name`` = which cache) on the current request."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.caches[name] = "hit" if hit else "miss"
+
+
+# ==============================
+# SERIALIZATION / RENDER TIMING
+# ==============================
+class TimedSerializerMixin:
+    """
+    Counts ``.data`` – model instances → primitives – towards the
+    request's serialize time (queries it triggers are also in db time).
+    Nested serializers go through ``to_representation`` and are not
+    counted twice.
+    """
+
+    @property
+    def data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return super().data
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serialize_time += time.perf_counter() - started
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records the encoding time as render time."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_time += time.perf_counter() - started
+
+
+# ==============================
+# MIDDLEWARE
+# ==============================
+class _RequestState:
+    __slots__ = ("started", "wants_timing", "metrics", "token")
+
+    def __init__(self, started, wants_timing):
+        self.started = started
+        self.wants_timing = wants_timing
+        self.metrics = None
+        self.token = None
+
+
+class RequestMetricsMiddleware:
+    """
+    Instruments a REQUEST_METRICS_SAMPLE_RATE share of requests (plus
+    every request that may get a Server-Timing header) and:
+
+    * adds ``Server-Timing`` (db / serialize / render / cache / total) –
+      for staff users when SERVER_TIMING is "staff", for everyone when
+      "all", never when "off";
+    * logs a JSON line on ``biologist_app.requests`` with the slowest
+      queries once SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES is reached;
+    * feeds every request into the per-route metrics registry (query
+      and cache figures come from the instrumented ones only).
+
+    Requests that are not sampled only pay for two clock reads, and
+    are still logged (without query detail) when slow. Runs natively in
+    both WSGI and ASGI stacks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        self.server_timing = settings.SERVER_TIMING
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.slow_queries = settings.SLOW_REQUEST_QUERIES
+        self.keep = settings.SLOW_REQUEST_WORST_QUERIES
+
+    def may_want_timing(self, request):
+        if self.server_timing == "all":
+            return True
+        if self.server_timing != "staff":
+            return False
+        # Staff come with a session cookie (admin) or a JWT; anonymous
+        # traffic never needs the header.
+        return (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or "HTTP_AUTHORIZATION" in request.META
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.end(state)
+        show = state.wants_timing and self.show_timing(request)
+        return self.finish(request, response, state, show)
+
+    async def __acall__(self, request):
+        state = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.end(state)
+        # resolving the user may hit the database
+        show = state.wants_timing and await sync_to_async(self.show_timing)(request)
+        return self.finish(request, response, state, show)
+
+    def begin(self, request):
+        state = _RequestState(time.perf_counter(), self.may_want_timing(request))
+        if state.wants_timing or random.random() < self.sample_rate:
+            state.metrics = RequestMetrics(self.keep)
+            state.token = _current.set(state.metrics)
+        return state
+
+    def end(self, state):
+        if state.metrics is not None:
+            _current.reset(state.token)
+
+    def finish(self, request, response, state, show_timing):
+        metrics = state.metrics
+        if metrics is None:
+            elapsed = time.perf_counter() - state.started
+            registry.record_request(
+                route_name(request), request.method, response.status_code, elapsed
+            )
+            if elapsed >= self.slow_seconds:
+                self.log_slow(request, response, {
+                    "total_ms": round(elapsed * 1000, 1), "sampled": False,
+                })
+            return response
+
+        metrics.finish()
+        registry.record_request(
+            route_name(request), request.method, response.status_code,
+            metrics.total, metrics,
+        )
+        if show_timing:
+            response["Server-Timing"] = metrics.server_timing()
+        if metrics.total >= self.slow_seconds or metrics.queries >= self.slow_queries:
+            self.log_slow(request, response, dict(metrics.as_dict(), sampled=True))
+        return response
+
+    def show_timing(self, request):
+        if self.server_timing == "all":
+            return True
+        # DRF copies the JWT-authenticated user onto the Django request;
+        # async views skip DRF authentication, so check the token here.
+        user = getattr(request, "user", None)
+        if (user is None or not user.is_authenticated) and "HTTP_AUTHORIZATION" in request.META:
+            try:
+                authenticated = JWTAuthentication().authenticate(Request(request))
+            except exceptions.APIException:
+                authenticated = None
+            if authenticated:
+                user = authenticated[0]
+        return bool(user is not None and user.is_staff)
+
+    def log_slow(self, request, response, details):
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **details,
+        }))
@@ -0,0 +1,88 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from biologist_app.benchmarking import run_benchmark
+from biologist_app.models import Product, ProductVariant
+
+ENDPOINTS = ["products", "products_search", "categories", "category_tree", "product_slug", "team"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the catalog API in-process; prints JSON (p50/p95/p99, queries, memory)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=ENDPOINTS,
+            help="Endpoint to run (repeatable; default: all)"
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per endpoint")
+        parser.add_argument("--memory-samples", type=int, default=5, help="Requests traced for peak memory")
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Let requests hit the response cache (default: every request is a miss)"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", type=str, help="Also write the JSON report here")
+        parser.add_argument(
+            "--compare",
+            type=str,
+            help="Earlier JSON report – print p50/p95 change per endpoint"
+        )
+
+    def handle(self, *args, **options):
+        if not Product.objects.exists():
+            raise CommandError("❌ No products – run generate_catalog first")
+
+        result = run_benchmark(
+            endpoints=options["endpoint"],
+            requests=options["requests"],
+            warmup=options["warmup"],
+            memory_samples=options["memory_samples"],
+            cached=options["cached"],
+            seed=options["seed"],
+        )
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "products": Product.objects.count(),
+            "variants": ProductVariant.objects.count(),
+            "cached": options["cached"],
+            "seed": options["seed"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            **result,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(report, options["compare"])
+
+    def compare(self, report, path):
+        with open(path) as fh:
+            baseline = json.load(fh)["endpoints"]
+
+        self.stderr.write(f"\n📊 vs {path}")
+        for name, now in report["endpoints"].items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ("p50_ms", "p95_ms", "queries_per_request"):
+                delta = now[key] - before[key]
+                pct = f" ({delta / before[key]:+.0%})" if before[key] else ""
+                changes.append(f"{key} {before[key]} → {now[key]}{pct}")
+            self.stderr.write(f"{name:16} " + " | ".join(changes))
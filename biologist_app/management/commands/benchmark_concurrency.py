@@ -0,0 +1,94 @@
+import importlib.util
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from biologist_app.benchmarking import run_concurrency_benchmark
+from biologist_app.models import Product
+
+from .benchmark_api import ENDPOINTS
+
+PROFILES = ("wsgi", "asgi")
+SERVERS = {"wsgi": "gunicorn", "asgi": "uvicorn"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of the sync WSGI deployment vs the ASGI profile under "
+        "concurrent clients (starts real servers on localhost)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=PROFILES,
+            help="Server profile to run (repeatable; default: both)"
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=ENDPOINTS,
+            help="Endpoint in the request mix (repeatable; default: products, product_slug, categories, team)"
+        )
+        parser.add_argument("--concurrency", type=int, default=32, help="Simultaneous clients")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per profile")
+        parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="Artificial delay (ms) before every SQL query, to mimic a remote database"
+        )
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Let requests hit the response cache (default: every request is a miss)"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+
+    def handle(self, *args, **options):
+        if not Product.objects.exists():
+            raise CommandError("❌ No products – run generate_catalog first")
+        profiles = options["profile"] or list(PROFILES)
+        for profile in profiles:
+            if importlib.util.find_spec(SERVERS[profile]) is None:
+                raise CommandError(f"❌ {SERVERS[profile]} is not installed ({profile} profile)")
+
+        try:
+            results = run_concurrency_benchmark(
+                profiles=profiles,
+                endpoints=options["endpoint"],
+                concurrency=options["concurrency"],
+                duration=options["duration"],
+                workers=options["workers"],
+                db_latency_ms=options["db_latency"],
+                port=options["port"],
+                cached=options["cached"],
+                seed=options["seed"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(f"❌ {exc}")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"📊 {options['concurrency']} clients × {options['duration']:g}s, "
+            f"{options['workers']} worker(s), +{options['db_latency']:g} ms per query\n"
+        )
+        for profile, result in results.items():
+            if not result["requests"]:
+                self.stdout.write(f"{profile.upper()}  no completed requests ({result['errors']} errors)")
+                continue
+            self.stdout.write(
+                f"{profile.upper()}  {result['rps']:.1f} req/s | "
+                f"p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | "
+                f"p99 {result['p99_ms']:.1f} ms | {result['errors']} errors"
+            )
+        if len(results) == 2 and results["wsgi"]["rps"]:
+            ratio = results["asgi"]["rps"] / results["wsgi"]["rps"]
+            self.stdout.write(self.style.SUCCESS(f"✅ ASGI / WSGI throughput: {ratio:.2f}×"))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from biologist_app.bootstrap import seed_catalog
+
+
+class Command(BaseCommand):
+    help = "Seed an empty catalog from the bundled Excel sheet (safe to run concurrently)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            type=str,
+            default=settings.CATALOG_SEED_FILE,
+            help="Excel file to seed from"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🌱 Checking catalog...")
+        if seed_catalog(options["file"], stdout=self.stdout, stderr=self.stderr):
+            self.stdout.write(self.style.SUCCESS("✅ Database seeded successfully"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ DB already seeded – nothing to do"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from biologist_app.snapshot import write_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write the precompressed full-catalog snapshot and its manifest"
+
+    def handle(self, *args, **options):
+        manifest = write_catalog_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Snapshot {manifest['url']} "
+                f"({manifest['product_count']} products, {manifest['size']} bytes)"
+            )
+        )
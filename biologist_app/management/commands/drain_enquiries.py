@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from biologist_app.ingestion import flush_spool, pending_count
+
+
+class Command(BaseCommand):
+    help = "Write every buffered enquiry from the local spool to the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ENQUIRY_FLUSH_BATCH,
+            help="Enquiries written per bulk_create"
+        )
+
+    def handle(self, *args, **options):
+        drained = flush_spool(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Drained {drained} enquiries ({pending_count()} still spooled, "
+                f"{pending_count('dead_letter')} in dead_letter)"
+            )
+        )
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from biologist_app.benchmarking import generate_catalog
+from biologist_app.models import Product
+
+
+class Command(BaseCommand):
+    help = "Fill an empty database with a synthetic catalog for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=1000,
+            help="Number of products (e.g. 1000 / 10000 / 100000)"
+        )
+        parser.add_argument(
+            "--duplicate-ratio",
+            type=float,
+            default=0.1,
+            help="Share of products that reuse an earlier name in another category"
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=8,
+            help="Number of categories (max 12)"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed – the same seed gives the same catalog"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows written per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if Product.objects.exists():
+            raise CommandError(
+                "❌ Catalog is not empty – use a fresh database (e.g. `manage.py flush`)"
+            )
+
+        started = time.perf_counter()
+        stats = generate_catalog(
+            options["products"],
+            chunk_size=options["chunk_size"],
+            duplicate_ratio=options["duplicate_ratio"],
+            categories=options["categories"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🧪 Synthetic catalog: {stats['products_created']} products, "
+                f"{stats['variants_created']} variants "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
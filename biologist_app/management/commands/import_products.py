@@ -1,10 +1,19 @@
 import os
-import pandas as pd
-from decimal import Decimal, InvalidOperation
 from django.core.management.base import BaseCommand, CommandError
-from django.utils.text import slugify
 
-from biologist_app.models import Category, SubCategory, Product, ProductVariant
+from biologist_app.importing import (
+    CatalogImporter,
+    diff_catalog,
+    file_digest,
+    iter_catalog_rows,
+    last_import_run,
+    latest_rows,
+    read_catalog_frame,
+    remove_variants,
+    save_fingerprints,
+)
+from biologist_app.models import CatalogImportRun
+from biologist_app.snapshot import write_catalog_snapshot
 
 
 class Command(BaseCommand):
@@ -15,7 +24,28 @@ class Command(BaseCommand):
             "--file",
             type=str,
             required=True,
-            help="Path to Excel file"
+            help="Path to Excel file (or a CSV export)"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows written per transaction (bulk_create / bulk_update)"
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only apply rows added, changed or removed since the last import"
+        )
+        parser.add_argument(
+            "--remove-missing",
+            action="store_true",
+            help="With --incremental, delete variants whose rows left the sheet"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the diff against the last import and write nothing"
         )
 
     def handle(self, *args, **options):
@@ -27,104 +57,108 @@ class Command(BaseCommand):
         if not os.path.exists(file_path):
             raise CommandError(f"❌ Excel file not found: {file_path}")
 
-        self.stdout.write(f"\n📄 Reading Excel: {file_path}\n")
-
-        df = pd.read_excel(file_path)
+        incremental = options["incremental"] or options["dry_run"]
+        digest = file_digest(file_path)
 
-        # Normalize column names
-        df.columns = (
-            df.columns.str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
+        # ⚡ Same file as last time → nothing to do (no Excel parsing at all),
+        # unless variants it kept are now to be removed
+        last = last_import_run()
+        unchanged = last is not None and last.file_digest == digest and not (
+            options["remove_missing"] and last.stats.get("variants_kept")
         )
+        if incremental and not options["dry_run"] and unchanged:
+            self.stdout.write(
+                self.style.SUCCESS("✅ Sheet unchanged since last import – skipping")
+            )
+            return
+
+        self.stdout.write(f"\n📄 Reading Excel: {file_path}\n")
+
+        df = read_catalog_frame(file_path)
 
         self.stdout.write(
             self.style.SUCCESS(f"✅ Columns detected: {list(df.columns)}")
         )
 
-        def clean(value):
-            if pd.isna(value):
-                return ""
-            return str(value).strip()
-
-        def clean_price(value):
-            if pd.isna(value):
-                return None
-            value = str(value).strip().lower()
-            if value in ["por", "p.o.r", "n/a", "na", ""]:
-                return None
-            try:
-                return Decimal(value)
-            except (InvalidOperation, ValueError):
-                return None
-
-        created_products = 0
-        created_variants = 0
-
-        for _, row in df.iterrows():
-            product_name = clean(row.get("product_name"))
-            category_name = clean(row.get("category"))
-            subcategory_name = clean(row.get("subcategory"))
-
-            catalog_number = clean(
-                row.get("catalog_number") or row.get("catalog_no")
-            )
-
-            quantity = clean(row.get("quantity"))
-            unit = clean(row.get("unit")) or ""
-            price = clean_price(row.get("price"))
+        if incremental:
+            self.import_incremental(df, digest, options)
+        else:
+            self.import_full(df, digest, options)
 
-            if not product_name or not catalog_number:
-                continue
+    def import_full(self, df, digest, options):
+        rows = list(iter_catalog_rows(df))
 
-            # ───────── CATEGORY (slug-safe) ─────────
-            category_slug = slugify(category_name or "Uncategorized")
+        importer = CatalogImporter(chunk_size=options["chunk_size"])
+        stats = importer.run(rows)
 
-            category, _ = Category.objects.get_or_create(
-                slug=category_slug,
-                defaults={
-                    "name": category_name or "Uncategorized"
-                }
-            )
+        # New baseline for --incremental; rows no longer in the sheet are
+        # forgotten rather than treated as removals later on.
+        latest = latest_rows(rows)
+        save_fingerprints(latest.values(), removed=diff_catalog(latest).removed)
+        CatalogImportRun.objects.create(
+            file_digest=digest, mode="full", stats=dict(stats)
+        )
+        self.report(stats)
+        self.write_snapshot()
 
-            # ───────── SUBCATEGORY (NO SLUG FIELD) ─────────
-            subcategory = None
-            if subcategory_name:
-                subcategory, _ = SubCategory.objects.get_or_create(
-                    name=subcategory_name,
-                    category=category
-                )
-
-            # ───────── PRODUCT (UNIQUE BY NAME + CATEGORY) ─────────
-            product, created = Product.objects.get_or_create(
-                name=product_name,
-                category=category,
-                defaults={
-                    "subcategory": subcategory
-                }
-            )
+    def import_incremental(self, df, digest, options):
+        latest = latest_rows(iter_catalog_rows(df))
+        diff = diff_catalog(latest)
 
-            if created:
-                created_products += 1
-
-            # ───────── VARIANT (UNIQUE BY CATALOG NUMBER) ─────────
-            _, v_created = ProductVariant.objects.update_or_create(
-                catalog_number=catalog_number,
-                defaults={
-                    "product": product,
-                    "quantity": quantity,
-                    "unit": unit,
-                    "price": price,
-                }
-            )
+        self.stdout.write(
+            f"\n🔍 Diff vs last import: {len(diff.added)} added, "
+            f"{len(diff.changed)} changed, {len(diff.removed)} removed, "
+            f"{diff.unchanged} unchanged\n"
+        )
 
-            if v_created:
-                created_variants += 1
+        if options["dry_run"]:
+            for row in diff.added:
+                self.stdout.write(f"+ {row.catalog_number}  {row.product_name}")
+            for row in diff.changed:
+                self.stdout.write(f"~ {row.catalog_number}  {row.product_name}")
+            for number in diff.removed:
+                self.stdout.write(f"- {number}")
+            self.stdout.write(self.style.WARNING("\n🧪 Dry run – nothing written"))
+            return
+
+        # Dropped rows are only deleted on request; otherwise they keep
+        # their fingerprints and show up as removed again next time.
+        removed = diff.removed if options["remove_missing"] else []
+        kept = len(diff.removed) - len(removed)
+        if kept:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Keeping {kept} variants no longer in the sheet "
+                f"(pass --remove-missing to delete them)"
+            ))
+
+        importer = CatalogImporter(chunk_size=options["chunk_size"])
+        stats = importer.run(diff.added + diff.changed)
+        stats["variants_removed"] = remove_variants(removed)
+        stats["variants_kept"] = kept
+        stats["variants_unchanged"] += diff.unchanged
+
+        save_fingerprints(diff.added + diff.changed, removed=removed)
+        CatalogImportRun.objects.create(
+            file_digest=digest, mode="incremental", stats=dict(stats)
+        )
+        self.report(stats)
+        self.write_snapshot()
 
+    def report(self, stats):
         self.stdout.write(
             self.style.SUCCESS(
                 f"\n🎉 Import complete!\n"
-                f"Products created: {created_products}\n"
-                f"Variants created: {created_variants}\n"
+                f"Products created: {stats['products_created']}\n"
+                f"Variants created: {stats['variants_created']}\n"
+                f"Variants updated: {stats['variants_updated']}\n"
+                f"Variants unchanged: {stats['variants_unchanged']}\n"
+                f"Variants removed: {stats['variants_removed']}\n"
+                f"Rows skipped: {stats['rows_skipped']}\n"
             )
         )
+
+    def write_snapshot(self):
+        manifest = write_catalog_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"📦 Catalog snapshot: {manifest['url']}")
+        )
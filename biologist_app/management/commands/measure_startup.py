@@ -0,0 +1,162 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that must never be imported while a worker boots.
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+PROBE_TIMEOUT = 120
+
+# Runs in a fresh interpreter: import the app, then time two requests.
+PROBE = r"""
+import asyncio, io, json, sys, time
+
+kind, path, host, heavy = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4].split(",")
+started = time.perf_counter()
+if kind == "wsgi":
+    from biologist_project.wsgi import application
+else:
+    from biologist_project.asgi import application
+imported = time.perf_counter()
+
+
+def call_wsgi():
+    status = []
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+        "SERVER_NAME": host, "SERVER_PORT": "443", "HTTP_HOST": host,
+        "HTTP_X_FORWARDED_PROTO": "https", "wsgi.url_scheme": "https",
+        "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.version": (1, 0), "wsgi.multithread": False,
+        "wsgi.multiprocess": True, "wsgi.run_once": False,
+    }
+    result = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    b"".join(result)
+    if hasattr(result, "close"):
+        result.close()
+    return int(status[0].split()[0])
+
+
+def call_asgi():
+    messages = []
+    pending = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await asyncio.Event().wait()  # client stays connected
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "https", "path": path,
+        "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", host.encode()), (b"x-forwarded-proto", b"https")],
+        "client": ("127.0.0.1", 0), "server": (host, 443),
+    }
+    asyncio.run(application(scope, receive, send))
+    return messages[0]["status"]
+
+
+call = call_wsgi if kind == "wsgi" else call_asgi
+status = call()
+first = time.perf_counter()
+call()
+second = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (first - imported) * 1000,
+    "warm_response_ms": (second - first) * 1000,
+    "status": status,
+    "heavy_modules": [name for name in heavy if name in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure import time and time-to-first-response of the WSGI and ASGI apps"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/products/",
+            help="Request path used for the first response"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Fresh interpreters per app (the median is reported)"
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print machine-readable results"
+        )
+
+    def handle(self, *args, **options):
+        host = next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost"
+        )
+        results = {
+            kind: self.measure(kind, options["path"], host, options["repeat"])
+            for kind in ("wsgi", "asgi")
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"📊 Startup – median of {options['repeat']} run(s), GET {options['path']}\n"
+        )
+        for kind, result in results.items():
+            self.stdout.write(
+                f"{kind.upper()}  process {result['process_ms']:.0f} ms | "
+                f"import {result['import_ms']:.0f} ms | "
+                f"first response {result['first_response_ms']:.0f} ms "
+                f"({result['status']}) | warm {result['warm_response_ms']:.1f} ms"
+            )
+            if result["heavy_modules"]:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️  {kind.upper()} loaded at startup: {', '.join(result['heavy_modules'])}"
+                ))
+
+    def measure(self, kind, path, host, repeat):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        runs = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-c", PROBE, kind, path, host, ",".join(HEAVY_MODULES)],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    timeout=PROBE_TIMEOUT,
+                )
+            except subprocess.TimeoutExpired:
+                raise CommandError(f"❌ {kind} probe timed out after {PROBE_TIMEOUT}s")
+            elapsed = (time.perf_counter() - started) * 1000
+            if proc.returncode != 0:
+                raise CommandError(f"❌ {kind} probe failed:\n{proc.stderr}")
+            run = json.loads(proc.stdout.strip().splitlines()[-1])
+            run["process_ms"] = elapsed
+            runs.append(run)
+
+        summary = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("process_ms", "import_ms", "first_response_ms", "warm_response_ms")
+        }
+        summary["status"] = runs[-1]["status"]
+        summary["heavy_modules"] = sorted({m for run in runs for m in run["heavy_modules"]})
+        return summary
@@ -0,0 +1,291 @@
+import atexit
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    le TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels, le)
+)
+"""
+UPSERT = """
+INSERT INTO metrics (name, labels, le, value) VALUES (?, ?, ?, ?)
+ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value
+"""
+
+# Upper bounds (inclusive); the +Inf bucket is the observation count.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# name → (type, help); histograms are keyed by their base name
+FAMILIES = {
+    "biologist_http_requests_total": (
+        "counter", "Requests by route, method and status."
+    ),
+    "biologist_http_request_duration_seconds": (
+        "histogram", "Request latency by route (whole middleware stack)."
+    ),
+    "biologist_db_queries_per_request": (
+        "histogram", "SQL queries per instrumented request, by route."
+    ),
+    "biologist_cache_lookups_total": (
+        "counter", "Cache lookups on instrumented requests, by cache and result."
+    ),
+    "biologist_db_connection_checkout_seconds": (
+        "histogram", "Time to get a DB connection, by alias and mode (pool / connect)."
+    ),
+    "biologist_db_pool_checkouts_total": (
+        "counter", "Connections handed out by the pool."
+    ),
+    "biologist_db_pool_waits_total": (
+        "counter", "Pool checkouts that had to wait for a free connection."
+    ),
+    "biologist_db_pool_wait_seconds_total": (
+        "counter", "Time spent waiting for a free pooled connection."
+    ),
+    "biologist_db_pool_timeouts_total": (
+        "counter", "Pool checkouts that failed (no connection within DB_POOL_TIMEOUT)."
+    ),
+    "biologist_db_pool_connections_opened_total": (
+        "counter", "Connections the pool opened to the server."
+    ),
+    "biologist_db_pool_connections_lost_total": (
+        "counter", "Pooled connections found dead by the health check."
+    ),
+}
+HISTOGRAM_BUCKETS = {
+    "biologist_http_request_duration_seconds": LATENCY_BUCKETS,
+    "biologist_db_queries_per_request": QUERY_BUCKETS,
+    "biologist_db_connection_checkout_seconds": CHECKOUT_BUCKETS,
+}
+
+
+def store_path():
+    return Path(settings.METRICS_STORE_PATH)
+
+
+def _connect():
+    path = store_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # losing a few samples is fine
+    conn.execute(STORE_SCHEMA)
+    return conn
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bucket(value, bounds):
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+# ==============================
+# PER-PROCESS AGGREGATION
+# ==============================
+class MetricsRegistry:
+    """
+    Each worker adds into an in-memory dict (a few increments under an
+    uncontended lock) and a daemon thread merges the deltas into the
+    shared SQLite store every METRICS_FLUSH_INTERVAL seconds, so the
+    request path never touches the disk.
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._collectors = []
+        self._started = False
+
+    def start(self):
+        """
+        Flush in the background and at exit. Called by wsgi.py / asgi.py
+        only: tests and management commands keep their figures in memory
+        and leave the shared store alone.
+        """
+        if not self._started:
+            self._started = True
+            atexit.register(self.flush)
+            self._ensure_thread()
+
+    def _observe(self, pending, name, labels, value, bounds):
+        pending[(f"{name}_bucket", labels, _bucket(value, bounds))] += 1
+        pending[(f"{name}_sum", labels, "")] += value
+        pending[(f"{name}_count", labels, "")] += 1
+
+    def record_request(self, route, method, status, seconds, metrics=None):
+        """One finished request; ``metrics`` when it was instrumented."""
+        route_labels = f'route="{_escape(route)}"'
+        with self._lock:
+            pending = self._pending
+            pending[(
+                "biologist_http_requests_total",
+                f'{route_labels},method="{_escape(method)}",status="{status}"',
+                "",
+            )] += 1
+            self._observe(
+                pending, "biologist_http_request_duration_seconds",
+                route_labels, seconds, LATENCY_BUCKETS,
+            )
+            if metrics is not None:
+                self._observe(
+                    pending, "biologist_db_queries_per_request",
+                    route_labels, metrics.queries, QUERY_BUCKETS,
+                )
+                for cache_name, result in metrics.caches.items():
+                    pending[(
+                        "biologist_cache_lookups_total",
+                        f'cache="{_escape(cache_name)}",result="{result}"',
+                        "",
+                    )] += 1
+        self._ensure_thread()
+
+    def record_checkout(self, alias, mode, seconds):
+        """One DB connection checkout (``mode``: "pool" or "connect")."""
+        labels = f'alias="{_escape(alias)}",mode="{mode}"'
+        with self._lock:
+            self._observe(
+                self._pending, "biologist_db_connection_checkout_seconds",
+                labels, seconds, CHECKOUT_BUCKETS,
+            )
+        self._ensure_thread()
+
+    def add_collector(self, collect):
+        """
+        ``collect()`` is polled on every flush and returns ``(name, labels,
+        value)`` counter increments accumulated since the previous poll.
+        """
+        if collect not in self._collectors:
+            self._collectors.append(collect)
+
+    def _collect(self):
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collect)
+                continue
+            with self._lock:
+                for name, labels, value in samples:
+                    self._pending[(name, labels, "")] += value
+
+    def _ensure_thread(self):
+        if not self._started or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="metrics-flusher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.METRICS_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Merge this worker's pending deltas into the shared store."""
+        self._collect()
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        if not pending:
+            return
+        try:
+            with closing(_connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    UPSERT, [(*key, value) for key, value in pending.items()]
+                )
+                conn.execute("COMMIT")
+        except sqlite3.Error:  # keep the deltas for the next pass
+            logger.exception("Metrics flush failed")
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+
+
+registry = MetricsRegistry()
+
+
+# ==============================
+# PROMETHEUS TEXT EXPOSITION
+# ==============================
+def _family(name):
+    for suffix in ("_bucket", "_sum", "_count"):
+        base = name[: -len(suffix)]
+        if name.endswith(suffix) and base in HISTOGRAM_BUCKETS:
+            return base
+    return name
+
+
+def _series(name, labels, value, le=None):
+    parts = [labels] if labels else []
+    if le is not None:
+        parts.append(f'le="{le}"')
+    label_text = "{" + ",".join(parts) + "}" if parts else ""
+    number = int(value) if float(value).is_integer() else value
+    return f"{name}{label_text} {number}"
+
+
+def render_prometheus():
+    """All workers' metrics in Prometheus text format (version 0.0.4)."""
+    registry.flush()
+    if not store_path().exists():
+        rows = []
+    else:
+        with closing(_connect()) as conn:
+            rows = conn.execute(
+                "SELECT name, labels, le, value FROM metrics ORDER BY name, labels"
+            ).fetchall()
+
+    by_family = defaultdict(list)
+    for row in rows:
+        by_family[_family(row[0])].append(row)
+
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        family_rows = by_family.get(family, [])
+        if kind != "histogram":
+            lines.extend(_series(name, labels, value) for name, labels, _, value in family_rows)
+            continue
+
+        buckets = defaultdict(dict)
+        totals = defaultdict(dict)
+        for name, labels, le, value in family_rows:
+            if le:
+                buckets[labels][le] = value
+            else:
+                totals[labels][name] = value
+        for labels in sorted(totals):
+            cumulative = 0
+            for bound in HISTOGRAM_BUCKETS[family]:
+                cumulative += buckets[labels].get(str(bound), 0)
+                lines.append(_series(f"{family}_bucket", labels, cumulative, bound))
+            count = totals[labels].get(f"{family}_count", 0)
+            lines.append(_series(f"{family}_bucket", labels, count, "+Inf"))
+            lines.append(_series(f"{family}_sum", labels, totals[labels].get(f"{family}_sum", 0)))
+            lines.append(_series(f"{family}_count", labels, count))
+    return "\n".join(lines) + "\n"
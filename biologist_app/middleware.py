@@ -0,0 +1,64 @@
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http.response import HttpResponseBase
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .snapshot import SNAPSHOT_PREFIX
+
+HASHED_SNAPSHOT_RE = re.compile(re.escape(SNAPSHOT_PREFIX) + r"[0-9a-f]{16}\.json$")
+
+
+# =========================
+# STATIC FILES + CATALOG SNAPSHOTS
+# =========================
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also serves catalog snapshots (and their .gz/.br
+    variants). Snapshots are written after WhiteNoise's startup scan, so
+    unknown snapshot URLs are looked up on disk once and then remembered.
+    Content-hashed snapshot names are served as immutable. Async-capable,
+    so an ASGI stack does not drop to a thread for every request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.snapshot_prefix = settings.CATALOG_SNAPSHOT_URL.rstrip("/") + "/"
+        self.snapshot_root = os.path.abspath(settings.CATALOG_SNAPSHOT_ROOT)
+        if os.path.isdir(self.snapshot_root):
+            self.add_files(self.snapshot_root, prefix=self.snapshot_prefix)
+
+    def __call__(self, request):
+        url = request.path_info
+        if (
+            url.startswith(self.snapshot_prefix)
+            and url not in self.files
+            and HASHED_SNAPSHOT_RE.search(url)
+            and self.url_is_canonical(url)
+        ):
+            path = os.path.join(self.snapshot_root, url[len(self.snapshot_prefix):])
+            if os.path.isfile(path):
+                self.files[url] = self.get_static_file(path, url)
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # WhiteNoise returns a file response, or get_response()'s coroutine
+        response = super().__call__(request)
+        if not isinstance(response, HttpResponseBase):
+            response = await response
+        return response
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            return bool(HASHED_SNAPSHOT_RE.search(url))
+        return super().immutable_file_test(path, url)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:30
+
+from django.db import migrations, models
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Value, When, Window
+from django.db.models.functions import RowNumber
+
+
+def mark_canonical_products(apps, schema_editor):
+    Product = apps.get_model("biologist_app", "Product")
+    ProductVariant = apps.get_model("biologist_app", "ProductVariant")
+
+    has_variants = Exists(ProductVariant.objects.filter(product=OuterRef("pk")))
+    winners = (
+        Product.objects.annotate(
+            canonical_rank=Window(
+                RowNumber(),
+                partition_by=F("name"),
+                order_by=[
+                    Case(
+                        When(has_variants, then=Value(0)),
+                        default=Value(1),
+                        output_field=IntegerField(),
+                    ).asc(),
+                    F("id").asc(),
+                ],
+            )
+        )
+        .filter(canonical_rank=1)
+        .values("pk")
+    )
+    Product.objects.filter(pk__in=winners).update(is_canonical=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0005_alter_enquiry_phone_alter_enquiry_product_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_canonical',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_canonical_products, migrations.RunPython.noop),
+    ]
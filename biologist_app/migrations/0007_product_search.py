@@ -0,0 +1,94 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:33
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# GIN indexes are Postgres-only, so they are created here rather than in
+# Product.Meta (which would break the SQLite fallback used in tests).
+POSTGRES_INDEXES = [
+    (
+        "product_search_vector_gin",
+        "CREATE INDEX IF NOT EXISTS product_search_vector_gin "
+        "ON biologist_app_product USING gin (search_vector)",
+    ),
+    (
+        "product_name_trgm",
+        "CREATE INDEX IF NOT EXISTS product_name_trgm "
+        "ON biologist_app_product USING gin (name gin_trgm_ops)",
+    ),
+    (
+        "product_search_document_trgm",
+        "CREATE INDEX IF NOT EXISTS product_search_document_trgm "
+        # UPPER() matches the expression Django emits for __icontains
+        "ON biologist_app_product USING gin (UPPER(search_document) gin_trgm_ops)",
+    ),
+]
+
+POSTGRES_VECTOR_SQL = """
+UPDATE biologist_app_product SET search_vector =
+    setweight(to_tsvector('english', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(search_document, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(description, '')), 'C')
+"""
+
+
+def fill_search_documents(apps, schema_editor):
+    Product = apps.get_model("biologist_app", "Product")
+
+    batch = []
+    products = (
+        Product.objects.select_related("category", "subcategory")
+        .prefetch_related("variants")
+        .order_by("pk")
+    )
+    for product in products.iterator(chunk_size=500):
+        parts = [v.catalog_number for v in product.variants.all()]
+        parts.append(product.category.name)
+        if product.subcategory_id:
+            parts.append(product.subcategory.name)
+        product.search_document = " ".join(parts)
+        batch.append(product)
+        if len(batch) >= 500:
+            Product.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    Product.objects.bulk_update(batch, ["search_document"])
+
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_VECTOR_SQL)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for _, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0006_product_is_canonical'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+def fill_normalized_catalog_numbers(apps, schema_editor):
+    ProductVariant = apps.get_model("biologist_app", "ProductVariant")
+
+    batch = []
+    for variant in ProductVariant.objects.only("catalog_number").iterator(chunk_size=2000):
+        variant.catalog_number_normalized = "".join(variant.catalog_number.split()).upper()
+        batch.append(variant)
+        if len(batch) >= 2000:
+            ProductVariant.objects.bulk_update(batch, ["catalog_number_normalized"])
+            batch = []
+    ProductVariant.objects.bulk_update(batch, ["catalog_number_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0007_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvariant',
+            name='catalog_number_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_normalized_catalog_numbers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0008_productvariant_catalog_number_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_digest', models.CharField(max_length=64)),
+                ('mode', models.CharField(max_length=20)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('catalog_number', models.CharField(max_length=255, unique=True)),
+                ('fingerprint', models.CharField(max_length=40)),
+            ],
+        ),
+    ]
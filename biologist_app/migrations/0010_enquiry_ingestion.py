@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0009_catalog_import_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enquiry',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='enquiry',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0010_enquiry_ingestion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enquiry',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def keep_one_default_variant(apps, schema_editor):
+    """
+    Products with several ``is_default`` variants keep the one the list
+    shows (lowest quantity, then id) so the unique index can be built.
+    """
+    ProductVariant = apps.get_model("biologist_app", "ProductVariant")
+
+    seen = set()
+    extra = []
+    defaults = (
+        ProductVariant.objects.filter(is_default=True)
+        .order_by("product_id", "quantity", "id")
+        .values_list("product_id", "id")
+    )
+    for product_id, variant_id in defaults.iterator(chunk_size=2000):
+        if product_id in seen:
+            extra.append(variant_id)
+        seen.add(product_id)
+    for i in range(0, len(extra), 500):
+        ProductVariant.objects.filter(pk__in=extra[i:i + 500]).update(is_default=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0011_enquiry_created_at_index'),
+    ]
+
+    # New indexes first, then drop the single-column ones they cover
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_canonical', True)), fields=['name', 'id'], name='product_canonical_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_canonical', True)), fields=['category', 'name', 'id'], name='product_canon_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_canonical', True)), fields=['subcategory', 'name', 'id'], name='product_canon_subcat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['product', 'quantity'], name='variant_product_qty_idx'),
+        ),
+        migrations.AlterField(
+            model_name='productvariant',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='biologist_app.product'),
+        ),
+        migrations.RunPython(keep_one_default_variant, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productvariant',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('product',), name='unique_default_variant', violation_error_message='This product already has a default variant – untick it first.'),
+        ),
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(fields=['created_at', 'id'], name='enquiry_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='enquiry',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
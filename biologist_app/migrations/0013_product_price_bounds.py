@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:31
+
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+
+# ?ordering=-price sorts by max_price DESC NULLS LAST; walking
+# product_canon_max_price_idx backwards gives NULLS FIRST on Postgres, and
+# SQLite indexes can't declare NULLS LAST, so this one is Postgres-only.
+POSTGRES_MAX_PRICE_INDEX = "product_canon_max_price_desc_idx"
+POSTGRES_MAX_PRICE_SQL = (
+    f"CREATE INDEX IF NOT EXISTS {POSTGRES_MAX_PRICE_INDEX} "
+    "ON biologist_app_product (max_price DESC NULLS LAST, id DESC) "
+    "WHERE is_canonical"
+)
+
+
+def fill_price_bounds(apps, schema_editor):
+    """Same UPDATE as ProductQuerySet.refresh_price_bounds, for every product."""
+    Product = apps.get_model("biologist_app", "Product")
+    ProductVariant = apps.get_model("biologist_app", "ProductVariant")
+
+    priced = (
+        ProductVariant.objects
+        .filter(product=OuterRef("pk"), price__isnull=False)
+        .order_by()
+        .values("product")
+    )
+    Product.objects.update(
+        min_price=Subquery(priced.annotate(bound=Min("price")).values("bound")),
+        max_price=Subquery(priced.annotate(bound=Max("price")).values("bound")),
+    )
+
+
+def create_max_price_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_MAX_PRICE_SQL)
+
+
+def drop_max_price_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_MAX_PRICE_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biologist_app', '0012_catalog_query_indexes'),
+    ]
+
+    # Fill before indexing, so the backfill doesn't maintain the indexes
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.RunPython(fill_price_bounds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_canonical', True)), fields=['min_price', 'id'], name='product_canon_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_canonical', True)), fields=['max_price', 'id'], name='product_canon_max_price_idx'),
+        ),
+        migrations.RunPython(create_max_price_index, drop_max_price_index),
+    ]
@@ -1,4 +1,25 @@
-from django.db import models
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -38,127 +59,170 @@ class SubCategory(models.Model):
 # ==============================
 # PRODUCT
 # ==============================
-class Product(models.Model):
-    name = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=220, unique=True, blank=True)
-
-    category = models.ForeignKey(
-        Category,
-        related_name="products",
-        on_delete=models.PROTECT
-    )
-
-    subcategory = models.ForeignKey(
-        SubCategory,
-        related_name="products",
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True
-    )
-
-    description = models.TextField(blank=True)
-    image = models.ImageField(upload_to="products/", blank=True, null=True)
-    is_new = models.BooleanField(default=False)
-
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        ordering = ["name"]
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.name)
+# Bases per slug query; keeps the OR / regex alternation small enough
+# for SQLite's expression-depth limit.
+SLUG_QUERY_BATCH = 100
+SLUG_SAVE_RETRIES = 5
+
+
+class ProductQuerySet(models.QuerySet):
+    def taken_slugs(self, bases, exclude_pks=()):
+        """
+        Existing slugs of the form ``base`` or ``base-<n>`` – one query
+        per batch of bases instead of one ``.exists()`` per candidate.
+        """
+        bases = sorted(set(bases))
+        taken = set()
+        for i in range(0, len(bases), SLUG_QUERY_BATCH):
+            batch = bases[i:i + SLUG_QUERY_BATCH]
+            # The prefix OR lets an index narrow the scan; the regex
+            # drops unrelated slugs such as "taq-polymerase-kit".
+            prefixes = reduce(or_, (
+                Q(slug=base) | Q(slug__startswith=f"{base}-") for base in batch
+            ))
+            pattern = "^(%s)(-[0-9]+)?$" % "|".join(re.escape(b) for b in batch)
+            taken.update(
+                self.model.objects
+                .filter(prefixes, slug__regex=pattern)
+                .exclude(pk__in=[pk for pk in exclude_pks if pk is not None])
+                .order_by()
+                .values_list("slug", flat=True)
+            )
+        return taken
+
+    def allocate_slugs(self, products):
+        """
+        Give every product without a slug the first free ``base`` /
+        ``base-1`` / ``base-2`` … in order, as repeated saves would.
+        Batch API for the bulk importer; Product.save() uses it too.
+        """
+        products = [p for p in products if not p.slug]
+        taken = self.taken_slugs(
+            (slugify(p.name) for p in products),
+            exclude_pks=[p.pk for p in products],
+        )
+        for product in products:
+            base = slugify(product.name)
             slug = base
             counter = 1
-            while Product.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+            while slug in taken:
                 slug = f"{base}-{counter}"
                 counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
-
-    def __str__(self):
-        return self.name
-
-
-# ==============================
-# PRODUCT VARIANT  ✅ FIXED
-# ==============================
-class ProductVariant(models.Model):
-    product = models.ForeignKey(
-        Product,
-        related_name="variants",
-        on_delete=models.CASCADE
-    )
-
-    # 🔥 FIXED LENGTH (was 50)
-    catalog_number = models.CharField(
-        max_length=255,
-        unique=True
-    )
-
-    # 🔥 FIXED LENGTHS
-    quantity = models.CharField(max_length=100)
-    unit = models.CharField(max_length=50, blank=True)
-
-    price = models.DecimalField(
-        max_digits=12,
-        decimal_places=2,
-        null=True,
-        blank=True
-    )
-
-    is_default = models.BooleanField(default=False)
-
-    class Meta:
-        ordering = ["quantity"]
-
-    def __str__(self):
-        return f"{self.product.name} [{self.catalog_number}]"
-
-
-# ==============================
-# ENQUIRY
-# ==============================
-from django.db import models
-from django.utils.text import slugify
+            taken.add(slug)
+            product.slug = slug
+
+    def with_default_catalog_number(self):
+        """
+        Annotate ``default_catalog_number`` (same pick as
+        Product.default_variant) so list pages need no variant prefetch.
+        """
+        return self.annotate(
+            default_catalog_number=Subquery(
+                ProductVariant.objects
+                .filter(product=OuterRef("pk"))
+                .order_by("-is_default", "quantity", "id")
+                .values("catalog_number")[:1]
+            )
+        )
+
+    def canonical(self):
+        """One product per name – the rows the public list shows."""
+        return self.filter(is_canonical=True)
+
+    def canonical_ranking(self):
+        """
+        Rank products sharing a name: products with variants first,
+        then lowest id. Rank 1 is the canonical product of its name.
+        """
+        has_variants = Exists(
+            ProductVariant.objects.filter(product=OuterRef("pk"))
+        )
+        return self.annotate(
+            canonical_rank=Window(
+                RowNumber(),
+                partition_by=F("name"),
+                order_by=[
+                    Case(
+                        When(has_variants, then=Value(0)),
+                        default=Value(1),
+                        output_field=IntegerField(),
+                    ).asc(),
+                    F("id").asc(),
+                ],
+            )
+        )
+
+    def refresh_canonical(self, names=None):
+        """
+        Recompute ``is_canonical`` for the given names (all when None)
+        with two set-based UPDATEs – nothing is loaded into Python.
+        """
+        scope = self.model.objects.all()
+        if names is not None:
+            scope = scope.filter(name__in=set(names))
+
+        winners = (
+            scope.canonical_ranking()
+            .filter(canonical_rank=1)
+            .values("pk")
+        )
+        scope.filter(is_canonical=True).exclude(pk__in=winners).update(
+            is_canonical=False
+        )
+        scope.filter(is_canonical=False, pk__in=winners).update(
+            is_canonical=True
+        )
+
+    def refresh_price_bounds(self):
+        """
+        Recompute ``min_price`` / ``max_price`` of the products in this
+        queryset from their priced variants (NULL when every variant is
+        price on request) with one UPDATE.
+        """
+        priced = (
+            ProductVariant.objects
+            .filter(product=OuterRef("pk"), price__isnull=False)
+            .order_by()
+            .values("product")
+        )
+        self.update(
+            min_price=Subquery(priced.annotate(bound=Min("price")).values("bound")),
+            max_price=Subquery(priced.annotate(bound=Max("price")).values("bound")),
+        )
+
+    def refresh_search(self, batch_size=500):
+        """
+        Rebuild ``search_document`` for the products in this queryset and,
+        on Postgres, their weighted ``search_vector``. Documents are only
+        written when they changed; the vector also covers name and
+        description, so it is rebuilt for every product in scope.
+        """
+        from .search import search_vector_expression
+
+        model = self.model
+        products = (
+            self.select_related("category", "subcategory")
+            .prefetch_related("variants")
+            .order_by("pk")
+        )
+
+        batch = []
+        for product in products.iterator(chunk_size=batch_size):
+            document = product.build_search_document()
+            if document == product.search_document:
+                continue
+            product.search_document = document
+            batch.append(product)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ["search_document"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["search_document"])
+
+        if connections[self.db].vendor == "postgresql":
+            self.update(search_vector=search_vector_expression())
 
 
-# ==============================
-# CATEGORY
-# ==============================
-class Category(models.Model):
-    name = models.CharField(max_length=200, unique=True)
-    slug = models.SlugField(max_length=220, unique=True)
-
-    class Meta:
-        ordering = ["name"]
-
-    def __str__(self):
-        return self.name
-
-
-# ==============================
-# SUBCATEGORY
-# ==============================
-class SubCategory(models.Model):
-    category = models.ForeignKey(
-        Category,
-        related_name="subcategories",
-        on_delete=models.CASCADE
-    )
-    name = models.CharField(max_length=200)
-
-    class Meta:
-        unique_together = ("category", "name")
-        ordering = ["name"]
-
-    def __str__(self):
-        return f"{self.category.name} → {self.name}"
-
-
-# ==============================
-# PRODUCT
-# ==============================
 class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
@@ -181,21 +245,99 @@ class Product(models.Model):
     image = models.ImageField(upload_to="products/", blank=True, null=True)
     is_new = models.BooleanField(default=False)
 
+    # Maintained by signals / import – see ProductQuerySet.refresh_canonical
+    is_canonical = models.BooleanField(default=False, editable=False)
+
+    # Denormalized search text (catalog numbers + category names) and its
+    # Postgres tsvector; GIN / trigram indexes live in migration 0007.
+    search_document = models.TextField(blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Lowest / highest variant price; variants without a price (price on
+    # request) are left out, so both are NULL when none is priced.
+    # Maintained by signals / import – see refresh_price_bounds.
+    min_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+    max_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Public list: canonical products by name (id breaks ties for
+            # cursor pages), optionally within one category / subcategory
+            models.Index(
+                fields=["name", "id"],
+                condition=Q(is_canonical=True),
+                name="product_canonical_name_idx",
+            ),
+            models.Index(
+                fields=["category", "name", "id"],
+                condition=Q(is_canonical=True),
+                name="product_canon_category_idx",
+            ),
+            models.Index(
+                fields=["subcategory", "name", "id"],
+                condition=Q(is_canonical=True),
+                name="product_canon_subcat_idx",
+            ),
+            # ?ordering=price (cheapest first) and the price range filters;
+            # ?ordering=-price has a Postgres-only index in migration 0013
+            models.Index(
+                fields=["min_price", "id"],
+                condition=Q(is_canonical=True),
+                name="product_canon_min_price_idx",
+            ),
+            models.Index(
+                fields=["max_price", "id"],
+                condition=Q(is_canonical=True),
+                name="product_canon_max_price_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.name)
-            slug = base
-            counter = 1
-            while Product.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # A concurrent save can grab the same slug between allocation and
+        # INSERT; the unique index rejects it and we allocate again.
+        for _ in range(SLUG_SAVE_RETRIES):
+            Product.objects.allocate_slugs([self])
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                clash = Product.objects.filter(slug=self.slug).exclude(pk=self.pk)
+                if not clash.exists():
+                    raise
+                self.slug = ""
+        raise IntegrityError(f"Could not allocate a unique slug for {self.name!r}")
+
+    def build_search_document(self):
+        parts = [v.catalog_number for v in self.variants.all()]
+        parts.append(self.category.name)
+        if self.subcategory_id:
+            parts.append(self.subcategory.name)
+        return " ".join(parts)
+
+    @property
+    def default_variant(self):
+        """
+        The variant flagged ``is_default``, else the first by quantity.
+        Reads ``variants.all()`` so a ``prefetch_related("variants")``
+        cache is used instead of issuing new queries.
+        """
+        variants = list(self.variants.all())
+        for variant in variants:
+            if variant.is_default:
+                return variant
+        return variants[0] if variants else None
 
     def __str__(self):
         return self.name
@@ -204,11 +346,18 @@ class Product(models.Model):
 # ==============================
 # PRODUCT VARIANT  ✅ FIXED
 # ==============================
+def normalize_catalog_number(value):
+    """Case- and whitespace-insensitive key: ' tq-001 500 ' → 'TQ-001500'."""
+    return "".join((value or "").split()).upper()
+
+
 class ProductVariant(models.Model):
+    # indexed by variant_product_qty_idx below
     product = models.ForeignKey(
         Product,
         related_name="variants",
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     # 🔥 FIXED LENGTH (was 50)
@@ -217,6 +366,13 @@ class ProductVariant(models.Model):
         unique=True
     )
 
+    # Indexed lookup key for batch catalog-number matching
+    catalog_number_normalized = models.CharField(
+        max_length=255,
+        db_index=True,
+        editable=False
+    )
+
     # 🔥 FIXED LENGTHS
     quantity = models.CharField(max_length=100)
     unit = models.CharField(max_length=50, blank=True)
@@ -232,6 +388,28 @@ class ProductVariant(models.Model):
 
     class Meta:
         ordering = ["quantity"]
+        indexes = [
+            # A product's variants in display order (prefetch, default pick)
+            models.Index(fields=["product", "quantity"], name="variant_product_qty_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=Q(is_default=True),
+                name="unique_default_variant",
+                violation_error_message=(
+                    "This product already has a default variant – "
+                    "untick it first."
+                ),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.catalog_number_normalized = normalize_catalog_number(self.catalog_number)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "catalog_number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "catalog_number_normalized"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.product.name} [{self.catalog_number}]"
@@ -262,10 +440,21 @@ class Enquiry(models.Model):
     phone = models.CharField(max_length=50, blank=True)
     message = models.TextField(blank=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the enquiry is received (buffered enquiries are written later)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    # Client-supplied or derived; a replayed / double-clicked submission
+    # hits the unique constraint and is dropped.
+    idempotency_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Newest first; the admin adds -pk to make its order total
+            models.Index(fields=["created_at", "id"], name="enquiry_created_idx"),
+        ]
 
     def __str__(self):
         if self.product:
@@ -290,17 +479,25 @@ class TeamMember(models.Model):
 
 
 # ==============================
-# TEAM MEMBER
+# CATALOG IMPORT (INCREMENTAL STATE)
 # ==============================
-class TeamMember(models.Model):
-    name = models.CharField(max_length=100)
-    role = models.CharField(max_length=100)
-    image = models.ImageField(upload_to="team/", blank=True, null=True)
-    order = models.IntegerField(default=0)
-    is_active = models.BooleanField(default=True)
+class CatalogImportRun(models.Model):
+    file_digest = models.CharField(max_length=64)
+    mode = models.CharField(max_length=20)
+    stats = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["order", "name"]
+        ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.name} - {self.role}"
+        return f"{self.mode} import @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class ImportFingerprint(models.Model):
+    """Hash of the sheet row last imported for each catalog number."""
+    catalog_number = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f"{self.catalog_number} ({self.fingerprint[:8]})"
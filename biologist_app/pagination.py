@@ -0,0 +1,79 @@
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .caching import cached_count
+
+
+# =========================
+# PAGE NUMBERS (CACHED COUNT)
+# =========================
+class CachedCountPaginator(DjangoPaginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """Default pagination, minus the COUNT(*) on every cache miss."""
+    django_paginator_class = CachedCountPaginator
+
+
+# =========================
+# CURSOR (KEYSET) – OPT-IN
+# =========================
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (name, id). The list holds one product per
+    name, so the cursor position is exact and no OFFSET or COUNT is run.
+    """
+    ordering = ("name", "id")
+    page_size_query_param = None
+
+    @staticmethod
+    def requested(request):
+        params = request.query_params
+        return "cursor" in params or params.get("pagination") == "cursor"
+
+
+# =========================
+# ADMIN (ESTIMATED COUNT)
+# =========================
+# Exact counts are only worth their cost on small result sets.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_row_count(queryset):
+    """Planner row estimate for the whole table (Postgres), else None."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 = never vacuumed / analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """
+    Changelist paginator whose COUNT never scans more than
+    ADMIN_EXACT_COUNT_LIMIT + 1 rows. Past that, an unfiltered list
+    reports the planner estimate; a filtered one reports the capped count
+    (narrow the filter to reach later pages).
+    """
+
+    @cached_property
+    def count(self):
+        capped = self.object_list.order_by()[:ADMIN_EXACT_COUNT_LIMIT + 1].count()
+        if capped <= ADMIN_EXACT_COUNT_LIMIT:
+            return capped
+        if not self.object_list.query.has_filters():
+            estimate = estimated_row_count(self.object_list)
+            if estimate:
+                return max(estimate, capped)
+        return capped
@@ -0,0 +1,177 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = "english"
+
+# The SQLite fallback orders by an explicit CASE, so cap how many hits it
+# ranks; Postgres has no such limit.
+FALLBACK_RESULT_LIMIT = 1000
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def search_vector_expression():
+    """Weighted tsvector stored in ``Product.search_vector`` (Postgres)."""
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("search_document", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+# =========================
+# POSTGRES (GIN + TRIGRAM)
+# =========================
+class PostgresSearchBackend:
+    def search(self, queryset, term):
+        query = SearchQuery(term, search_type="websearch", config=SEARCH_CONFIG)
+        return (
+            queryset
+            .annotate(
+                search_rank=(
+                    SearchRank(F("search_vector"), query)
+                    + TrigramSimilarity("name", term)
+                )
+            )
+            .filter(
+                Q(search_vector=query)
+                | Q(name__trigram_similar=term)
+                | Q(search_document__icontains=term)
+            )
+            .order_by("-search_rank", "name")
+        )
+
+
+# =========================
+# FALLBACK (IN-PROCESS INVERTED INDEX)
+# =========================
+class InvertedIndex:
+    """token → {product_id: weight}, plus a sorted vocabulary for prefixes."""
+
+    FIELD_WEIGHTS = (
+        ("name", 3),
+        ("search_document", 2),
+        ("description", 1),
+    )
+
+    def __init__(self, rows):
+        postings = defaultdict(dict)
+        for row in rows:
+            pk = row["id"]
+            for field, weight in self.FIELD_WEIGHTS:
+                for token in tokenize(row[field]):
+                    if postings[token].get(pk, 0) < weight:
+                        postings[token][pk] = weight
+        self.postings = dict(postings)
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, token):
+        start = bisect_left(self.vocabulary, token)
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(token):
+                break
+            yield candidate
+
+    def rank(self, term):
+        """Product ids matching every query token, best first."""
+        scores = None
+        for token in tokenize(term):
+            token_scores = defaultdict(int)
+            for candidate in self._expand(token):
+                exact = 2 if candidate == token else 1
+                for pk, weight in self.postings[candidate].items():
+                    token_scores[pk] = max(token_scores[pk], weight * exact)
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {
+                    pk: score + token_scores[pk]
+                    for pk, score in scores.items()
+                    if pk in token_scores
+                }
+            if not scores:
+                return []
+        if not scores:
+            return []
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+class InvertedIndexSearchBackend:
+    _lock = threading.Lock()
+    _cached = {}  # db alias → (catalog version, InvertedIndex)
+
+    def get_index(self, queryset):
+        from .caching import get_catalog_version
+
+        version = get_catalog_version()
+        cached = self._cached.get(queryset.db)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            # another request may have built it while this one waited
+            cached = self._cached.get(queryset.db)
+            if cached and cached[0] == version:
+                return cached[1]
+            rows = (
+                queryset.model._default_manager.using(queryset.db)
+                .values("id", "name", "search_document", "description")
+                .iterator(chunk_size=2000)
+            )
+            index = InvertedIndex(rows)
+            self._cached[queryset.db] = (version, index)
+        return index
+
+    def search(self, queryset, term):
+        ranked = self.get_index(queryset).rank(term)[:FALLBACK_RESULT_LIMIT]
+        if not ranked:
+            return queryset.none()
+        position = Case(
+            *[When(pk=pk, then=Value(i)) for i, pk in enumerate(ranked)],
+            output_field=IntegerField(),
+        )
+        return (
+            queryset
+            .filter(pk__in=ranked)
+            .annotate(search_rank=position)
+            .order_by("search_rank", "name")
+        )
+
+
+def get_search_backend(using):
+    if connections[using].vendor == "postgresql":
+        return PostgresSearchBackend()
+    return InvertedIndexSearchBackend()
+
+
+# =========================
+# DRF FILTER BACKEND
+# =========================
+class ProductSearchFilter(SearchFilter):
+    """
+    Relevance-ranked product search over name, catalog numbers,
+    category/subcategory names and description.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, "")
+        term = term.replace("\x00", "").strip()
+        if not term:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, term)
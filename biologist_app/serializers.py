@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 
+from .instrumentation import TimedListSerializer, TimedSerializerMixin
 from .models import (
     Product,
     ProductVariant,
@@ -41,13 +42,14 @@ class SubCategorySerializer(serializers.ModelSerializer):
 # =========================
 # CATEGORY SERIALIZER
 # =========================
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_count = serializers.IntegerField(read_only=True)
     subcategories = SubCategorySerializer(many=True, read_only=True)
 
     class Meta:
         model = Category
         fields = ["id", "name", "slug", "product_count", "subcategories"]
+        list_serializer_class = TimedListSerializer
 
 
 # =========================
@@ -72,10 +74,30 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         return f"{obj.quantity} {obj.unit}" if obj.unit else obj.quantity
 
 
+# =========================
+# SPARSE FIELDSETS
+# =========================
+class SparseFieldsMixin:
+    """Optional ``fields=[...]`` kwarg drops every other declared field."""
+
+    def __init__(self, *args, **kwargs):
+        only = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if only is not None:
+            for name in set(self.fields) - set(only):
+                self.fields.pop(name)
+
+
+def _split_param(value):
+    return {part.strip() for part in (value or "").split(",") if part.strip()}
+
+
 # =========================
 # PRODUCT SERIALIZER
 # =========================
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     variants = ProductVariantSerializer(many=True, read_only=True)
 
     category_name = serializers.CharField(source="category.name", read_only=True)
@@ -100,24 +122,111 @@ class ProductSerializer(serializers.ModelSerializer):
             "category_slug",
             "subcategory",
             "subcategory_name",
+            "min_price",
+            "max_price",
             "variants",
         ]
+        list_serializer_class = TimedListSerializer
+
+    # Slim shape for listing grids; heavy fields only via ?expand=
+    LIST_FIELDS = [
+        "id",
+        "name",
+        "slug",
+        "catalog_number",
+        "image",
+        "category",
+        "category_name",
+        "category_slug",
+        "subcategory",
+        "subcategory_name",
+        "min_price",
+        "max_price",
+    ]
+    EXPANDABLE_FIELDS = ["description", "variants"]
+
+    # Product columns each field reads – drives .only() in the view
+    FIELD_COLUMNS = {
+        "id": ["id"],
+        "name": ["name"],
+        "slug": ["slug"],
+        "description": ["description"],
+        "image": ["image"],
+        "category": ["category"],
+        "category_name": ["category__name"],
+        "category_slug": ["category__slug"],
+        "subcategory": ["subcategory"],
+        "subcategory_name": ["subcategory__name"],
+        "min_price": ["min_price"],
+        "max_price": ["max_price"],
+    }
+
+    @classmethod
+    def select_fields(cls, params, default=None):
+        """
+        Resolve ``?fields=`` / ``?omit=`` / ``?expand=`` against
+        ``default`` (all fields when None), in Meta order.
+        """
+        requested = _split_param(params.get("fields"))
+        chosen = requested or set(default or cls.Meta.fields)
+        chosen |= _split_param(params.get("expand")) & set(cls.EXPANDABLE_FIELDS)
+        chosen -= _split_param(params.get("omit"))
+        return [name for name in cls.Meta.fields if name in chosen] or ["id"]
 
     def get_catalog_number(self, obj):
-        variants = obj.variants.all()
-        if not variants.exists():
-            return None
-        default = variants.filter(is_default=True).first()
-        return default.catalog_number if default else variants.first().catalog_number
+        if hasattr(obj, "default_catalog_number"):
+            return obj.default_catalog_number
+        default = obj.default_variant
+        return default.catalog_number if default else None
+
+
+# =========================
+# CATALOG NUMBER LOOKUP (BATCH)
+# =========================
+class CatalogLookupRequestSerializer(serializers.Serializer):
+    catalog_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=255, allow_blank=True),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
+class LookupProductSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source="category.name", read_only=True)
+    subcategory_name = serializers.CharField(
+        source="subcategory.name", read_only=True
+    )
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "slug",
+            "image",
+            "category",
+            "category_name",
+            "subcategory",
+            "subcategory_name",
+        ]
+
+
+class LookupVariantSerializer(TimedSerializerMixin, ProductVariantSerializer):
+    product = LookupProductSerializer(read_only=True)
+
+    class Meta(ProductVariantSerializer.Meta):
+        fields = ProductVariantSerializer.Meta.fields + ["product"]
+        list_serializer_class = TimedListSerializer
 
 
 # =========================
 # TEAM MEMBER SERIALIZER
 # =========================
-class TeamMemberSerializer(serializers.ModelSerializer):
+class TeamMemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = TeamMember
         fields = ["id", "name", "role", "image", "order", "is_active"]
+        list_serializer_class = TimedListSerializer
 
 
 # =========================
@@ -131,3 +240,16 @@ class EnquirySerializer(serializers.ModelSerializer):
             "product": {"required": False, "allow_null": True},
             "variant": {"required": False, "allow_null": True},
         }
+
+
+class BufferedEnquirySerializer(EnquirySerializer):
+    """
+    Same payload, validated without touching the database: product /
+    variant ids are checked when the spool is flushed.
+    """
+    product = serializers.IntegerField(
+        source="product_id", min_value=1, required=False, allow_null=True
+    )
+    variant = serializers.IntegerField(
+        source="variant_id", min_value=1, required=False, allow_null=True
+    )
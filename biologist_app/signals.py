@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_catalog_version, bump_team_version
+from .ingestion import RESUME_UID, resume_spooled
+from .models import Category, Product, ProductVariant, SubCategory, TeamMember
+from .snapshot import builder as snapshot_builder
+
+
+# ==============================
+# CANONICAL PRODUCT (DEDUP BY NAME)
+# ==============================
+@receiver(pre_save, sender=Product)
+def remember_previous_name(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._previous_name = None
+        return
+    instance._previous_name = (
+        Product.objects.filter(pk=instance.pk)
+        .values_list("name", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    names = {instance.name}
+    previous = getattr(instance, "_previous_name", None)
+    if previous:
+        names.add(previous)
+    Product.objects.refresh_canonical(names)
+    Product.objects.filter(pk=instance.pk).refresh_search()
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    Product.objects.refresh_canonical([instance.name])
+
+
+@receiver(pre_save, sender=ProductVariant)
+def remember_previous_product(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._previous_product_id = None
+        return
+    instance._previous_product_id = (
+        ProductVariant.objects.filter(pk=instance.pk)
+        .values_list("product_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def variant_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    product_ids = {
+        instance.product_id,
+        getattr(instance, "_previous_product_id", None),
+    } - {None}
+    names = Product.objects.filter(pk__in=product_ids).values_list(
+        "name", flat=True
+    )
+    Product.objects.refresh_canonical(names)
+    Product.objects.filter(pk__in=product_ids).refresh_search()
+    Product.objects.filter(pk__in=product_ids).refresh_price_bounds()
+
+
+# ==============================
+# SEARCH DOCUMENT (CATEGORY NAMES)
+# ==============================
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Product.objects.filter(category=instance).refresh_search()
+
+
+@receiver(post_save, sender=SubCategory)
+def subcategory_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Product.objects.filter(subcategory=instance).refresh_search()
+
+
+# ==============================
+# CATALOG VERSION (CACHE INVALIDATION)
+# ==============================
+CATALOG_MODELS = (Category, SubCategory, Product, ProductVariant)
+
+
+def catalog_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    # After commit, so no request can cache pre-commit data under the
+    # new version.
+    transaction.on_commit(bump_catalog_version)
+    transaction.on_commit(snapshot_builder.wake)
+
+
+for _model in CATALOG_MODELS:
+    post_save.connect(
+        catalog_changed, sender=_model, dispatch_uid=f"catalog_save_{_model.__name__}"
+    )
+    post_delete.connect(
+        catalog_changed, sender=_model, dispatch_uid=f"catalog_delete_{_model.__name__}"
+    )
+
+
+# ==============================
+# TEAM VERSION (ETAGS)
+# ==============================
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def team_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(bump_team_version)
+
+
+# ==============================
+# ENQUIRY SPOOL (RESUME AFTER RESTART)
+# ==============================
+if settings.ENQUIRY_INGESTION == "buffered":
+    request_started.connect(resume_spooled, dispatch_uid=RESUME_UID)
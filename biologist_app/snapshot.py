@@ -0,0 +1,335 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.utils.encoders import JSONEncoder
+
+from .caching import CATALOG_CACHE_TIMEOUT, get_catalog_version
+from .models import Category, Product
+from .serializers import ProductSerializer
+
+try:
+    import brotli
+except ImportError:  # optional – gzip is always written
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "catalog."
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_LOCK_KEY = "catalog:snapshot:lock"
+# A superseded snapshot stays on disk this long after it left the
+# manifest: cached manifests (and WhiteNoise's file list) may still point
+# at it until then.
+SNAPSHOT_RETENTION = CATALOG_CACHE_TIMEOUT
+CHUNK_SIZE = 500
+
+
+# ==============================
+# PATHS
+# ==============================
+def snapshot_root():
+    return Path(settings.CATALOG_SNAPSHOT_ROOT)
+
+
+def snapshot_url(name):
+    return settings.CATALOG_SNAPSHOT_URL.rstrip("/") + "/" + name
+
+
+def manifest_cache_key(version):
+    return f"catalog:v{version}:snapshot"
+
+
+# ==============================
+# BUILD
+# ==============================
+class _HashingWriter:
+    """File wrapper that feeds everything written into a sha256."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.digest.update(data)
+        self.fh.write(data)
+        self.size += len(data)
+
+    def write_json(self, value):
+        self.write(json.dumps(
+            value, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ))
+
+
+def _category_tree():
+    return [
+        {
+            "id": category.id,
+            "name": category.name,
+            "slug": category.slug,
+            "subcategories": [
+                {"id": sub.id, "name": sub.name}
+                for sub in category.subcategories.all()
+            ],
+        }
+        for category in Category.objects.prefetch_related("subcategories").order_by("name")
+    ]
+
+
+def _write_catalog(out):
+    """Stream {"categories": [...], "products": [...]} a chunk at a time."""
+    out.write('{"categories":')
+    out.write_json(_category_tree())
+    out.write(',"products":[')
+
+    products = (
+        Product.objects
+        .select_related("category", "subcategory")
+        .prefetch_related("variants")
+        .order_by("pk")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    count = 0
+    batch = []
+
+    def flush():
+        nonlocal count
+        data = ProductSerializer(batch, many=True).data
+        for product, item in zip(batch, data):
+            item["is_canonical"] = product.is_canonical
+            if count:
+                out.write(",")
+            out.write_json(item)
+            count += 1
+        batch.clear()
+
+    for product in products:
+        batch.append(product)
+        if len(batch) >= CHUNK_SIZE:
+            flush()
+    flush()
+
+    out.write("]}")
+    return count
+
+
+def _publish(path, write):
+    """Write ``path`` through a temp file, so readers never see it half done."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            write(dst)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _compress(src_path, path):
+    """Write ``path``.gz (and .br) from the uncompressed ``src_path``."""
+    def write_gzip(dst):
+        with open(src_path, "rb") as src, gzip.GzipFile(fileobj=dst, mode="wb", mtime=0) as gz:
+            shutil.copyfileobj(src, gz)
+
+    def write_brotli(dst):
+        compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+        with open(src_path, "rb") as src:
+            for block in iter(lambda: src.read(1 << 20), b""):
+                dst.write(compressor.process(block))
+        dst.write(compressor.finish())
+
+    _publish(path + ".gz", write_gzip)
+    if brotli is not None:
+        _publish(path + ".br", write_brotli)
+
+
+def _manifest_snapshot_name(manifest):
+    return manifest["url"].rsplit("/", 1)[-1] if manifest else None
+
+
+def _retire(root, name):
+    """Start ``name``'s retention period: its mtime is when it was superseded."""
+    try:
+        os.utime(root / name)
+    except FileNotFoundError:
+        pass
+
+
+def _prune(root, keep_names):
+    """
+    Delete snapshots that left the manifest more than SNAPSHOT_RETENTION
+    seconds ago. ``keep_names`` (the current and previous generation) are
+    never deleted.
+    """
+    cutoff = time.time() - SNAPSHOT_RETENTION
+    for old in root.glob(f"{SNAPSHOT_PREFIX}*.json"):
+        if old.name in keep_names:
+            continue
+        try:
+            if old.stat().st_mtime >= cutoff:
+                continue
+        except FileNotFoundError:  # pruned by another worker
+            continue
+        for path in (old, Path(f"{old}.gz"), Path(f"{old}.br")):
+            path.unlink(missing_ok=True)
+
+
+def write_catalog_snapshot(version=None):
+    """
+    Write the full catalog as ``catalog.<content hash>.json`` (+ .gz/.br)
+    under CATALOG_SNAPSHOT_ROOT, update manifest.json, and return the
+    manifest. Memory stays flat: products are serialized in chunks.
+    """
+    # Read the version first: a change during the build bumps it again,
+    # so the next manifest request rebuilds.
+    if version is None:
+        version = get_catalog_version()
+
+    root = snapshot_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            out = _HashingWriter(fh)
+            product_count = _write_catalog(out)
+        content_hash = out.digest.hexdigest()
+        name = f"{SNAPSHOT_PREFIX}{content_hash[:16]}.json"
+        final_path = root / name
+        if final_path.exists():
+            os.unlink(tmp_path)
+        else:
+            # Variants first: WhiteNoise remembers a snapshot URL (and
+            # which encodings it has) the first time it is requested.
+            _compress(tmp_path, str(final_path))
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    manifest = {
+        "version": str(version),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "url": snapshot_url(name),
+        "sha256": content_hash,
+        "size": out.size,
+        "product_count": product_count,
+        "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+    }
+
+    previous = _manifest_snapshot_name(read_manifest_file())
+    fd, tmp_manifest = tempfile.mkstemp(dir=root, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp_manifest, root / MANIFEST_NAME)
+    if previous and previous != name:
+        _retire(root, previous)
+
+    cache.set(manifest_cache_key(version), manifest, CATALOG_CACHE_TIMEOUT)
+    _prune(root, {name, previous})
+    return manifest
+
+
+# ==============================
+# LOOKUP
+# ==============================
+def read_manifest_file():
+    try:
+        with open(snapshot_root() / MANIFEST_NAME) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def rebuild_snapshot():
+    """
+    Write a snapshot for the current catalog version unless one exists
+    or another worker holds the build lock. Returns the new manifest.
+    """
+    version = get_catalog_version()
+    on_disk = read_manifest_file()
+    if on_disk and on_disk.get("version") == str(version):
+        return None
+    if not cache.add(SNAPSHOT_LOCK_KEY, version, timeout=300):
+        return None
+    try:
+        return write_catalog_snapshot(version)
+    finally:
+        cache.delete(SNAPSHOT_LOCK_KEY)
+
+
+def current_snapshot_manifest():
+    """
+    Manifest for the current catalog version. Requests never build: when
+    the catalog changed since the last snapshot, the previous manifest
+    (whose files are still on disk) is returned and the builder thread
+    is woken. None only before the first snapshot exists.
+    """
+    version = get_catalog_version()
+    manifest = cache.get(manifest_cache_key(version))
+    if manifest is not None:
+        return manifest
+
+    on_disk = read_manifest_file()
+    if on_disk and on_disk.get("version") == str(version):
+        cache.set(manifest_cache_key(version), on_disk, CATALOG_CACHE_TIMEOUT)
+        return on_disk
+
+    builder.wake()
+    return on_disk
+
+
+# ==============================
+# BACKGROUND BUILD
+# ==============================
+class SnapshotBuilder:
+    """
+    Per-process daemon thread that rebuilds the snapshot after catalog
+    changes. It waits CATALOG_SNAPSHOT_REBUILD_DELAY seconds first, so a
+    burst of admin saves costs one build; the cache lock keeps gunicorn
+    workers from building at the same time.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="snapshot-builder", daemon=True
+                )
+                self._thread.start()
+        self._event.set()
+
+    def _run(self):
+        while True:
+            self._event.wait()
+            time.sleep(settings.CATALOG_SNAPSHOT_REBUILD_DELAY)  # debounce
+            self._event.clear()
+            try:
+                rebuild_snapshot()
+            except Exception:  # the previous snapshot keeps being served
+                logger.exception("Catalog snapshot build failed")
+            finally:
+                connections.close_all()  # this thread's connections only
+
+
+builder = SnapshotBuilder()
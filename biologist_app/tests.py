@@ -1,3 +1,1880 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import runpy
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    OperationalError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import Exists, OuterRef
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .async_views import viewset_for
+from .benchmarking import generate_catalog, synthetic_catalog_rows
+from . import bootstrap, caching, ingestion, snapshot
+from .admin import ProductVariantInline
+from .caching import (
+    CATALOG_VERSION_KEY,
+    bump_catalog_version,
+    cached_count,
+    catalog_cache_key,
+    get_catalog_version,
+)
+from .exports import CATALOG_COLUMNS
+from .importing import CatalogImporter, CatalogRow
+from .metrics import registry
+from .models import (
+    CatalogImportRun,
+    Category,
+    Enquiry,
+    ImportFingerprint,
+    Product,
+    ProductQuerySet,
+    ProductVariant,
+    SubCategory,
+    TeamMember,
+)
+from .pagination import estimated_row_count
+from .search import InvertedIndexSearchBackend
+from .serializers import ProductSerializer
+from .views import ProductViewSet, build_category_tree
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Large enough that, with fresh statistics, a full scan + sort costs more
+# than the index on both SQLite and PostgreSQL.
+PLAN_PRODUCTS = 3000
+PLAN_ENQUIRIES = 3000
+# A handful of rows each – scanning them is the right plan
+LOOKUP_TABLES = {Category._meta.db_table, SubCategory._meta.db_table}
+
+
+def full_scans(plan):
+    """Tables (or aliases) a query plan reads without an index."""
+    if connection.vendor == "postgresql":
+        tables = re.findall(r"Seq Scan on (\w+)", plan)
+    else:
+        tables = re.findall(r"\bSCAN (\w+)\b(?! USING)", plan)
+    return [table for table in tables if table not in LOOKUP_TABLES]
+
+
+def sorts(plan):
+    """Whether the outer query sorts rows instead of reading them in index order."""
+    if connection.vendor == "postgresql":
+        return "Sort Key" in plan.split("SubPlan")[0]
+    # SQLite rows are "id parent notused detail"; subqueries have a parent
+    return any(
+        line.split(maxsplit=3)[1] == "0" and "TEMP B-TREE FOR ORDER BY" in line
+        for line in plan.splitlines()
+    )
+
+
+def python_dedup():
+    """The list's dedup before is_canonical: first product per name,
+    products with variants before those without, then lowest id."""
+    products = Product.objects.annotate(
+        has_variants=Exists(ProductVariant.objects.filter(product=OuterRef("pk")))
+    ).order_by("name", "-has_variants", "id")
+    picked, seen = set(), set()
+    for product in products:
+        if product.name not in seen:
+            seen.add(product.name)
+            picked.add(product.pk)
+    return picked
+
+
+# ==============================
+# CANONICAL PRODUCT (DEDUP BY NAME)
+# ==============================
+class CanonicalProductTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Enzymes", slug="enzymes")
+
+    def product(self, name, catalog_number=None):
+        product = Product.objects.create(name=name, category=self.category)
+        if catalog_number:
+            ProductVariant.objects.create(
+                product=product, catalog_number=catalog_number, quantity="1 ml"
+            )
+        return product
+
+    def assertCanonical(self, *products):
+        canonical = set(Product.objects.canonical().values_list("pk", flat=True))
+        self.assertEqual(canonical, {p.pk for p in products})
+        self.assertEqual(canonical, python_dedup())
+
+    def test_duplicate_name_without_variants(self):
+        bare = self.product("Taq Polymerase")
+        self.assertCanonical(bare)
+        stocked = self.product("Taq Polymerase", "TQ-1")
+        self.assertCanonical(stocked)
+        self.product("Taq Polymerase")
+        self.assertCanonical(stocked)
+
+    def test_moving_variants_off_the_canonical_row(self):
+        bare = self.product("Taq Polymerase")
+        stocked = self.product("Taq Polymerase", "TQ-1")
+        other = self.product("Pfu Polymerase")
+
+        variant = stocked.variants.get()
+        variant.product = other
+        variant.save()
+        # Neither Taq row has variants now: lowest id wins
+        self.assertCanonical(bare, other)
+
+        variant.product = stocked
+        variant.save()
+        self.assertCanonical(stocked, other)
+
+    def test_renaming_away_from_a_shared_name(self):
+        bare = self.product("Taq Polymerase")
+        stocked = self.product("Taq Polymerase", "TQ-1")
+        stocked.name = "Hot-Start Taq"
+        stocked.save()
+        self.assertCanonical(bare, stocked)
+
+    def test_deleting_the_canonical_row(self):
+        first = self.product("Taq Polymerase")
+        second = self.product("Taq Polymerase")
+        stocked = self.product("Taq Polymerase", "TQ-1")
+        self.assertCanonical(stocked)
+        stocked.delete()
+        self.assertCanonical(first)
+        first.delete()
+        self.assertCanonical(second)
+
+
+# ==============================
+# QUERY PLANS OF THE HOT PATHS
+# ==============================
+class CatalogQueryPlanTests(TestCase):
+    """
+    EXPLAIN the list / detail / admin queries on a synthetic catalog and
+    fail when one stops using its index (migration 0012).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(PLAN_PRODUCTS, seed=7)
+        product = Product.objects.order_by("pk").first()
+        now = timezone.now()
+        Enquiry.objects.bulk_create(
+            Enquiry(
+                product=product,
+                name=f"Buyer {i}",
+                email=f"buyer{i}@example.com",
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(PLAN_ENQUIRIES)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        canonical = Product.objects.canonical()
+        cls.category_id = canonical.values_list("category_id", flat=True)[0]
+        cls.subcategory_id = (
+            canonical.exclude(subcategory=None)
+            .values_list("subcategory_id", flat=True)[0]
+        )
+
+    def list_queryset(self, **params):
+        """The product list's queryset, built by the viewset itself."""
+        request = RequestFactory().get("/api/products/", params)
+        view = viewset_for(ProductViewSet, request, "list")
+        return view.filter_queryset(view.get_queryset())
+
+    def assertIndexed(self, queryset, ordered=False):
+        plan = queryset.explain()
+        self.assertEqual(full_scans(plan), [], f"full scan in:\n{plan}")
+        if ordered:
+            self.assertFalse(sorts(plan), f"sort instead of index order in:\n{plan}")
+
+    def test_product_list_page(self):
+        self.assertIndexed(self.list_queryset()[48:72], ordered=True)
+
+    def test_product_list_cursor_page(self):
+        queryset = self.list_queryset().filter(name__gt="M").order_by("name", "id")
+        self.assertIndexed(queryset[:24], ordered=True)
+
+    def test_product_list_by_category(self):
+        queryset = self.list_queryset(category=self.category_id)
+        self.assertIndexed(queryset[:24], ordered=True)
+
+    def test_product_list_by_subcategory(self):
+        queryset = self.list_queryset(subcategory=self.subcategory_id)
+        self.assertIndexed(queryset[:24], ordered=True)
+
+    def test_product_list_by_price(self):
+        self.assertIndexed(self.list_queryset(ordering="price")[:24], ordered=True)
+
+    def test_product_list_by_price_descending(self):
+        self.assertIndexed(self.list_queryset(ordering="-price")[:24], ordered=True)
+
+    def test_product_detail_by_slug(self):
+        slug = Product.objects.values_list("slug", flat=True)[0]
+        self.assertIndexed(Product.objects.filter(slug=slug))
+
+    def test_variant_prefetch(self):
+        ids = list(self.list_queryset().values_list("pk", flat=True)[:24])
+        self.assertIndexed(ProductVariant.objects.filter(product__in=ids))
+
+    def test_default_variant_probe(self):
+        product_id = ProductVariant.objects.values_list("product_id", flat=True)[0]
+        self.assertIndexed(
+            ProductVariant.objects.filter(product_id=product_id, is_default=True)
+        )
+
+    def test_enquiry_admin_page(self):
+        # The changelist appends -pk to ("-created_at",)
+        self.assertIndexed(Enquiry.objects.order_by("-created_at", "-pk")[:100], ordered=True)
+
+
+# ==============================
+# DEFAULT VARIANT
+# ==============================
+class DefaultVariantTests(TestCase):
+    def test_one_default_variant_per_product(self):
+        generate_catalog(1)
+        product = Product.objects.get()
+        first = product.variants.first()
+        first.is_default = True
+        first.save()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductVariant.objects.create(
+                product=product, catalog_number="SECOND-DEFAULT",
+                quantity="1 kg", is_default=True,
+            )
+        # Non-default variants are unaffected
+        ProductVariant.objects.create(
+            product=product, catalog_number="NOT-DEFAULT", quantity="2 kg"
+        )
+
+
+# ==============================
+# PRICE BOUNDS
+# ==============================
+class PriceBoundsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(1)
+        cls.product = Product.objects.get()
+        cls.product.variants.all().delete()
+
+    def add_variant(self, number, price):
+        return ProductVariant.objects.create(
+            product=self.product, catalog_number=number, quantity=number, price=price
+        )
+
+    def assertBounds(self, low, high):
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.min_price, self.product.max_price), (low, high))
+
+    def test_bounds_follow_variants(self):
+        cheap = self.add_variant("B-1", Decimal("10.00"))
+        dear = self.add_variant("B-2", Decimal("250.00"))
+        self.add_variant("B-3", None)  # price on request
+        self.assertBounds(Decimal("10.00"), Decimal("250.00"))
+
+        cheap.price = None
+        cheap.save()
+        self.assertBounds(Decimal("250.00"), Decimal("250.00"))
+
+        dear.delete()
+        self.assertBounds(None, None)
+
+    def test_price_filters(self):
+        self.add_variant("F-1", Decimal("10.00"))
+        self.add_variant("F-2", Decimal("250.00"))
+        self.product.refresh_from_db()
+
+        def matches(**params):
+            request = RequestFactory().get("/api/products/", params)
+            view = viewset_for(ProductViewSet, request, "list")
+            return view.filter_queryset(view.get_queryset()).filter(pk=self.product.pk).exists()
+
+        # A product matches when any of its variants is priced in range
+        self.assertTrue(matches(price_min=100, price_max=300))
+        self.assertTrue(matches(price_min=5, price_max=10))
+        self.assertTrue(matches(price_max=10))
+        self.assertFalse(matches(price_min=251))
+        self.assertFalse(matches(price_on_request="true"))
+        # The bounds (10..250) overlap 100–200, but no variant costs that
+        self.assertFalse(matches(price_min=100, price_max=200))
+
+
+# ==============================
+# RESPONSE CACHE / CONDITIONAL GET
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name="Enzymes", slug="enzymes")
+        cls.staff = User.objects.create_user("staffer", password="x", is_staff=True)
+
+    def setUp(self):
+        self.token = str(AccessToken.for_user(self.staff))
+
+    def bearer(self):
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+
+    def test_json_is_shared(self):
+        response = self.client.get("/api/categories/", **self.bearer())
+        self.assertEqual(response.status_code, 200)
+        request = RequestFactory().get("/api/categories/")
+        self.assertIsNotNone(cache.get(catalog_cache_key(request)))
+
+    def test_browsable_api_page_is_not_shared(self):
+        html = {"HTTP_ACCEPT": "text/html"}
+        staff_page = self.client.get("/api/categories/", **html, **self.bearer())
+        self.assertContains(staff_page, "staffer")
+
+        anonymous_page = self.client.get("/api/categories/", **html)
+        self.assertEqual(anonymous_page.status_code, 200)
+        self.assertNotContains(anonymous_page, "staffer")
+
+    def test_etag_depends_on_the_viewer(self):
+        html = {"HTTP_ACCEPT": "text/html"}
+        staff_page = self.client.get("/api/categories/", **html, **self.bearer())
+        # Logged out, the cached staff page must not be revalidated
+        revalidated = self.client.get(
+            "/api/categories/", **html, HTTP_IF_NONE_MATCH=staff_page["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertNotContains(revalidated, "staffer")
+
+        same_viewer = self.client.get(
+            "/api/categories/", **html, **self.bearer(),
+            HTTP_IF_NONE_MATCH=staff_page["ETag"],
+        )
+        self.assertEqual(same_viewer.status_code, 304)
+
+    def test_cached_response_revalidates_per_viewer(self):
+        staff = self.client.get("/api/categories/", **self.bearer())
+        anonymous = self.client.get("/api/categories/")  # served from the cache
+        self.assertNotEqual(anonymous["ETag"], staff["ETag"])
+
+        for etag, auth in ((staff["ETag"], self.bearer()), (anonymous["ETag"], {})):
+            revalidated = self.client.get(
+                "/api/categories/", **auth, HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(revalidated.status_code, 304)
+
+        foreign = self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=staff["ETag"])
+        self.assertEqual(foreign.status_code, 200)
+        self.assertEqual(foreign["ETag"], anonymous["ETag"])
+
+    def test_last_modified_waits_for_the_second_to_pass(self):
+        # A bump later in this second would share its Last-Modified
+        second = time.time_ns() // 10**9 * 10**9
+        cache.set(CATALOG_VERSION_KEY, second, timeout=None)
+        with mock.patch.object(caching.time, "time_ns", return_value=second + 10**8):
+            fresh = self.client.get("/api/categories/")
+        self.assertFalse(fresh.has_header("Last-Modified"))
+        self.assertTrue(fresh.has_header("ETag"))
+
+        cache.set(CATALOG_VERSION_KEY, time.time_ns() - 5 * 10**9, timeout=None)
+        settled = self.client.get("/api/categories/")
+        revalidated = self.client.get(
+            "/api/categories/", HTTP_IF_MODIFIED_SINCE=settled["Last-Modified"]
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+
+# ==============================
+# SEARCH
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Enzymes", slug="enzymes")
+        cls.product = Product.objects.create(
+            name="Taq Polymerase", category=category, description="Thermostable"
+        )
+
+    def search(self, term):
+        response = self.client.get("/api/products/", {"search": term})
+        return [row["slug"] for row in response.json()["results"]]
+
+    def edit(self, **fields):
+        for name, value in fields.items():
+            setattr(self.product, name, value)
+        self.product.save()
+        # Signals bump the version (rebuilding the fallback index) on commit
+        bump_catalog_version()
+
+    def test_rename_is_searchable(self):
+        self.assertEqual(self.search("taq"), [self.product.slug])
+        self.edit(name="Pfu Polymerase")
+        self.assertEqual(self.search("pfu"), [self.product.slug])
+        self.assertEqual(self.search("taq"), [])
+
+    def test_description_edit_is_searchable(self):
+        self.edit(description="Proofreading")
+        self.assertEqual(self.search("proofreading"), [self.product.slug])
+
+    def test_fallback_index_is_built_once_per_version(self):
+        backend = InvertedIndexSearchBackend()
+        version = get_catalog_version()
+        built = mock.sentinel.index
+
+        class Contended:
+            # another request finishes the build while this one waits
+            def __enter__(self):
+                backend._cached[DEFAULT_DB_ALIAS] = (version, built)
+
+            def __exit__(self, *exc_info):
+                return False
+
+        self.enterContext(mock.patch.dict(InvertedIndexSearchBackend._cached, clear=True))
+        self.enterContext(mock.patch.object(InvertedIndexSearchBackend, "_lock", Contended()))
+        rebuild = self.enterContext(mock.patch("biologist_app.search.InvertedIndex"))
+
+        self.assertIs(backend.get_index(Product.objects.all()), built)
+        rebuild.assert_not_called()
+
+
+# ==============================
+# CATALOG NUMBER LOOKUP
+# ==============================
+class CatalogNumberLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Enzymes", slug="enzymes")
+        taq = Product.objects.create(name="Taq Polymerase", category=category)
+        pfu = Product.objects.create(name="Pfu Polymerase", category=category)
+        for product, number, quantity in (
+            (taq, "TQ-001", "100 U"),
+            (taq, "TQ-002", "500 U"),
+            (pfu, "PF 100", "100 U"),
+        ):
+            ProductVariant.objects.create(
+                product=product, catalog_number=number, quantity=quantity
+            )
+
+    def lookup(self, numbers):
+        return self.client.post(
+            "/api/products/lookup/", {"catalog_numbers": numbers},
+            content_type="application/json",
+        )
+
+    def test_matching_ignores_case_and_whitespace(self):
+        response = self.lookup([" tq-001 ", "Tq - 002", "pf100", "TQ-001"])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        # First spelling wins; the repeated number is answered once
+        self.assertEqual([r["query"] for r in results], ["tq-001", "Tq - 002", "pf100"])
+        self.assertEqual(
+            [[v["catalog_number"] for v in r["variants"]] for r in results],
+            [["TQ-001"], ["TQ-002"], ["PF 100"]],
+        )
+        self.assertEqual(results[0]["variants"][0]["product"]["name"], "Taq Polymerase")
+        self.assertEqual(response.json()["not_found"], [])
+
+    def test_dashes_are_significant(self):
+        response = self.lookup(["TQ001", "PF-100"]).json()
+        self.assertEqual(response["results"], [])
+        self.assertEqual(response["not_found"], ["TQ001", "PF-100"])
+
+    def test_unknown_numbers_are_reported(self):
+        response = self.lookup(["TQ-001", " XX-999 ", "  "]).json()
+        self.assertEqual([r["query"] for r in response["results"]], ["TQ-001"])
+        # Blank lines are skipped, not reported
+        self.assertEqual(response["not_found"], ["XX-999"])
+
+    def test_batch_is_validated(self):
+        for body in ([], ["TQ-001"] * 1001, "TQ-001"):
+            with self.subTest(size=len(body)):
+                response = self.lookup(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("catalog_numbers", response.json())
+        self.assertEqual(self.lookup(["TQ-001"] * 1000).status_code, 200)
+
+    def test_one_query_per_request(self):
+        numbers = [f"TQ-{i:03}" for i in range(500)] + ["PF 100"]
+        with self.assertNumQueries(1):
+            response = self.lookup(numbers)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+
+# ==============================
+# BULK IMPORT VS ROW-BY-ROW
+# ==============================
+def legacy_import(rows):
+    """The import before CatalogImporter: get_or_create / update_or_create
+    per row. Returns the same counters CatalogImporter reports."""
+    stats = Counter()
+    for row in rows:
+        if row is None:
+            stats["rows_skipped"] += 1
+            continue
+        category, _ = Category.objects.get_or_create(
+            slug=slugify(row.category_name or "Uncategorized"),
+            defaults={"name": row.category_name or "Uncategorized"},
+        )
+        subcategory = None
+        if row.subcategory_name:
+            subcategory, _ = SubCategory.objects.get_or_create(
+                name=row.subcategory_name, category=category
+            )
+        product, created = Product.objects.get_or_create(
+            name=row.product_name, category=category,
+            defaults={"subcategory": subcategory},
+        )
+        stats["products_created"] += created
+
+        values = {
+            "product_id": product.pk, "quantity": row.quantity,
+            "unit": row.unit, "price": row.price,
+        }
+        before = ProductVariant.objects.filter(
+            catalog_number=row.catalog_number
+        ).values(*values).first()
+        ProductVariant.objects.update_or_create(
+            catalog_number=row.catalog_number, defaults=values
+        )
+        if before is None:
+            stats["variants_created"] += 1
+        elif before == values:
+            stats["variants_unchanged"] += 1
+        else:
+            stats["variants_updated"] += 1
+    return stats
+
+
+def catalog_state():
+    """The imported catalog by natural keys (ids differ between runs)."""
+    return {
+        "products": sorted(Product.objects.values_list(
+            "slug", "name", "category__slug", "subcategory__name",
+            "is_canonical", "min_price", "max_price", "search_document",
+        )),
+        "variants": sorted(ProductVariant.objects.values_list(
+            "catalog_number", "product__slug", "quantity", "unit", "price",
+            "catalog_number_normalized",
+        )),
+        "subcategories": sorted(SubCategory.objects.values_list("category__slug", "name")),
+    }
+
+
+def row(name, number, category="Enzymes", subcategory="", price="10.00", quantity="1 ml"):
+    return CatalogRow(
+        product_name=name, category_name=category, subcategory_name=subcategory,
+        catalog_number=number, quantity=quantity, unit="",
+        price=Decimal(price) if price else None,
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogImporterTests(TestCase):
+    def assertMatchesLegacy(self, *imports, chunk_size=1000):
+        """Apply each list of rows in turn with both imports; same stats,
+        same catalog. Leaves the CatalogImporter result in the database."""
+        with transaction.atomic():
+            expected_stats = [legacy_import(rows) for rows in imports]
+            expected_state = catalog_state()
+            transaction.set_rollback(True)
+
+        stats = [
+            CatalogImporter(chunk_size=chunk_size).run(rows) for rows in imports
+        ]
+        self.assertEqual(stats, expected_stats)
+        self.assertEqual(catalog_state(), expected_state)
+
+    def test_fresh_import(self):
+        self.assertMatchesLegacy([
+            row("Taq Polymerase", "TQ-1", subcategory="Polymerases"),
+            row("Taq Polymerase", "TQ-5", subcategory="Polymerases", price="45.50", quantity="5 ml"),
+            row("Taq Polymerase", "TQ-B", category="Kits", price=""),  # same name, other category
+            None,
+            row("Pfu Polymerase", "PF-1", price="", subcategory="Polymerases"),
+            row("DNA Ladder", "LD-1", category="", price="3"),  # → Uncategorized
+        ])
+        self.assertEqual(
+            sorted(Product.objects.values_list("slug", flat=True)),
+            ["dna-ladder", "pfu-polymerase", "taq-polymerase", "taq-polymerase-1"],
+        )
+
+    def test_reimport_counts_updates_and_unchanged(self):
+        first = [row("Taq Polymerase", "TQ-1"), row("Taq Polymerase", "TQ-5", quantity="5 ml")]
+        second = [
+            row("Taq Polymerase", "TQ-1"),
+            row("Taq Polymerase", "TQ-5", quantity="5 ml", price="99.00"),
+            row("Taq Polymerase", "TQ-10", quantity="10 ml"),
+        ]
+        self.assertMatchesLegacy(first, second)
+
+    def test_catalog_number_repeated_in_one_chunk(self):
+        # Later rows win, even when they move the variant to another product
+        self.assertMatchesLegacy([
+            row("Taq Polymerase", "TQ-1", price="10.00"),
+            row("Pfu Polymerase", "TQ-1", price="20.00"),
+            row("Pfu Polymerase", "TQ-1", price="20.00"),
+        ])
+        variant = ProductVariant.objects.get()
+        self.assertEqual(variant.product.name, "Pfu Polymerase")
+
+    def test_product_reused_across_chunks(self):
+        self.assertMatchesLegacy([
+            row("Taq Polymerase", "TQ-1", subcategory="Polymerases"),
+            row("Taq Polymerase", "TQ-5", subcategory="Polymerases", quantity="5 ml"),
+            row("Taq Polymerase", "TQ-B", category="Kits"),
+            row("Taq Polymerase", "TQ-10", quantity="10 ml"),
+        ], chunk_size=1)
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_variant_moved_to_another_product(self):
+        self.assertMatchesLegacy(
+            [
+                row("Taq Polymerase", "TQ-1", price="10.00"),
+                row("Taq Polymerase", "TQ-B", category="Kits", price="80.00"),
+            ],
+            [row("Taq Polymerase", "TQ-1", category="Kits", price="12.00")],
+        )
+        enzyme = Product.objects.get(category__slug="enzymes")
+        kit = Product.objects.get(category__slug="kits")
+        # The enzyme row lost its only variant: the kit is canonical now
+        self.assertEqual((enzyme.is_canonical, kit.is_canonical), (False, True))
+        self.assertEqual((enzyme.min_price, enzyme.max_price), (None, None))
+        self.assertEqual((kit.min_price, kit.max_price), (Decimal("12.00"), Decimal("80.00")))
+
+
+# ==============================
+# INCREMENTAL IMPORT
+# ==============================
+CATALOG_TABLES = {
+    Product._meta.db_table,
+    ProductVariant._meta.db_table,
+    ImportFingerprint._meta.db_table,
+}
+
+
+def catalog_writes(queries):
+    """Catalog tables written to by the captured statements."""
+    written = set()
+    for query in queries:
+        match = re.match(
+            r'\s*(?:INSERT INTO|UPDATE|DELETE FROM)\s+"?(\w+)"?', query["sql"], re.I
+        )
+        if match and match.group(1) in CATALOG_TABLES:
+            written.add(match.group(1))
+    return written
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IncrementalImportTests(TestCase):
+    SHEET = [
+        row("Taq Polymerase", "TQ-1"),
+        row("Taq Polymerase", "TQ-5", quantity="5 ml", price="40.00"),
+        row("Pfu Polymerase", "PF-1"),
+    ]
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        self.enterContext(override_settings(CATALOG_SNAPSHOT_ROOT=root.name))
+        self.enterContext(mock.patch.object(snapshot.builder, "wake"))
+
+    def import_sheet(self, rows, **options):
+        path = os.path.join(self.root, "catalog.csv")
+        with open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(header for header, _ in CATALOG_COLUMNS)
+            for r in rows:
+                writer.writerow([
+                    r.product_name, r.category_name, r.subcategory_name,
+                    r.catalog_number, r.quantity, r.unit, r.price,
+                ])
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                "import_products", file=path, incremental=True, stdout=out, **options
+            )
+        return out.getvalue(), catalog_writes(queries.captured_queries)
+
+    def variants(self):
+        return dict(ProductVariant.objects.values_list("catalog_number", "price"))
+
+    def test_unchanged_sheet_writes_nothing(self):
+        self.import_sheet(self.SHEET)
+        fingerprints = list(ImportFingerprint.objects.values_list())
+
+        output, writes = self.import_sheet(self.SHEET)
+        self.assertIn("unchanged since last import", output)
+        self.assertEqual(writes, set())
+
+        # Same rows in another order: a different file, still no changes
+        output, writes = self.import_sheet(self.SHEET[::-1])
+        self.assertIn("0 added, 0 changed, 0 removed, 3 unchanged", output)
+        self.assertEqual(writes, set())
+        self.assertEqual(list(ImportFingerprint.objects.values_list()), fingerprints)
+
+    def test_changed_row_updates_only_that_variant(self):
+        self.import_sheet(self.SHEET)
+        before = dict(ImportFingerprint.objects.values_list("catalog_number", "fingerprint"))
+
+        sheet = list(self.SHEET)
+        sheet[1] = sheet[1]._replace(price=Decimal("45.50"))
+        with mock.patch.object(
+            CatalogImporter, "run", autospec=True, side_effect=CatalogImporter.run
+        ) as run:
+            output, _ = self.import_sheet(sheet)
+        self.assertEqual([r.catalog_number for r in run.call_args.args[1]], ["TQ-5"])
+        self.assertIn("Variants updated: 1\nVariants unchanged: 2", output)
+        self.assertEqual(
+            self.variants(),
+            {"TQ-1": Decimal("10.00"), "TQ-5": Decimal("45.50"), "PF-1": Decimal("10.00")},
+        )
+
+        after = dict(ImportFingerprint.objects.values_list("catalog_number", "fingerprint"))
+        self.assertNotEqual(after.pop("TQ-5"), before.pop("TQ-5"))
+        self.assertEqual(after, before)
+
+    def test_dropped_row_is_kept_without_remove_missing(self):
+        self.import_sheet(self.SHEET)
+        output, writes = self.import_sheet(self.SHEET[:2])
+        self.assertIn("Keeping 1 variants", output)
+        self.assertEqual(writes, set())
+        self.assertIn("PF-1", self.variants())
+        self.assertTrue(ImportFingerprint.objects.filter(catalog_number="PF-1").exists())
+
+        # The same sheet again, now allowed to remove: not skipped as unchanged
+        output, _ = self.import_sheet(self.SHEET[:2], remove_missing=True)
+        self.assertIn("Variants removed: 1", output)
+        self.assertNotIn("PF-1", self.variants())
+
+    def test_dropped_row_is_removed_with_remove_missing(self):
+        self.import_sheet(self.SHEET)
+        output, _ = self.import_sheet(self.SHEET[:2], remove_missing=True)
+        self.assertIn("Variants removed: 1", output)
+        self.assertEqual(set(self.variants()), {"TQ-1", "TQ-5"})
+        self.assertEqual(
+            set(ImportFingerprint.objects.values_list("catalog_number", flat=True)),
+            {"TQ-1", "TQ-5"},
+        )
+
+    def test_dry_run_writes_nothing(self):
+        output, writes = self.import_sheet(self.SHEET, dry_run=True)
+        self.assertIn("+ TQ-1", output)
+        self.assertEqual(writes, set())
+        self.assertFalse(ProductVariant.objects.exists())
+        self.assertFalse(CatalogImportRun.objects.exists())
+
+        self.import_sheet(self.SHEET)
+        runs = CatalogImportRun.objects.count()
+        fingerprints = list(ImportFingerprint.objects.values_list())
+        sheet = [self.SHEET[0]._replace(price=Decimal("12.00")), row("DNA Ladder", "LD-1")]
+
+        output, writes = self.import_sheet(sheet, dry_run=True, remove_missing=True)
+        for line in ("+ LD-1", "~ TQ-1", "- PF-1", "- TQ-5"):
+            self.assertIn(line, output)
+        self.assertEqual(writes, set())
+        self.assertEqual(CatalogImportRun.objects.count(), runs)
+        self.assertEqual(list(ImportFingerprint.objects.values_list()), fingerprints)
+        self.assertEqual(self.variants()["TQ-1"], Decimal("10.00"))
+
+
+class SyntheticCatalogTests(TestCase):
+    def catalog(self):
+        return sorted(
+            ProductVariant.objects.values_list(
+                "catalog_number", "product__name", "product__category__name",
+                "product__subcategory__name", "quantity", "price",
+            )
+        )
+
+    def test_rows_are_deterministic_for_a_seed(self):
+        rows = list(synthetic_catalog_rows(40, seed=3))
+
+        self.assertEqual(rows, list(synthetic_catalog_rows(40, seed=3)))
+        self.assertNotEqual(rows, list(synthetic_catalog_rows(40, seed=4)))
+        self.assertEqual(len({(r.product_name, r.category_name) for r in rows}), 40)
+        self.assertEqual(len({r.catalog_number for r in rows}), len(rows))
+
+    def test_command_writes_the_requested_catalog(self):
+        rows = list(synthetic_catalog_rows(25, seed=3))
+        call_command("generate_catalog", products=25, seed=3, stdout=io.StringIO())
+
+        self.assertEqual(Product.objects.count(), 25)
+        self.assertEqual(
+            self.catalog(),
+            sorted(
+                (r.catalog_number, r.product_name, r.category_name,
+                 r.subcategory_name or None, r.quantity, r.price)
+                for r in rows
+            ),
+        )
+        first = self.catalog()
+
+        Product.objects.all().delete()
+        call_command("generate_catalog", products=25, seed=3, stdout=io.StringIO())
+        self.assertEqual(self.catalog(), first)
+
+    def test_command_refuses_a_non_empty_catalog(self):
+        generate_catalog(2, seed=3)
+        with self.assertRaises(CommandError):
+            call_command("generate_catalog", products=2, stdout=io.StringIO())
+        self.assertEqual(Product.objects.count(), 2)
+
+
+# ==============================
+# SLUGS
+# ==============================
+class SlugAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Enzymes", slug="enzymes")
+
+    def product(self, name, slug=""):
+        return Product.objects.create(name=name, slug=slug, category=self.category)
+
+    def test_longer_names_are_not_suffixes(self):
+        self.product("Taq Polymerase Kit")
+        self.product("Taq Polymerase Kit")
+        self.assertEqual(
+            Product.objects.taken_slugs(["taq-polymerase"]), set()
+        )
+        self.assertEqual(self.product("Taq Polymerase").slug, "taq-polymerase")
+        self.assertEqual(self.product("Taq Polymerase").slug, "taq-polymerase-1")
+
+    def test_first_free_suffix_fills_gaps(self):
+        self.product("Taq Polymerase", slug="taq-polymerase")
+        self.product("Taq Polymerase", slug="taq-polymerase-2")
+        self.assertEqual(self.product("Taq Polymerase").slug, "taq-polymerase-1")
+        self.assertEqual(self.product("Taq Polymerase").slug, "taq-polymerase-3")
+
+    def test_batch_allocation_in_one_query(self):
+        self.product("Taq Polymerase")
+        batch = [
+            Product(name=name, category=self.category)
+            for name in ("Taq Polymerase", "Pfu Polymerase", "Taq Polymerase")
+        ]
+        with self.assertNumQueries(1):
+            Product.objects.allocate_slugs(batch)
+        self.assertEqual(
+            [p.slug for p in batch],
+            ["taq-polymerase-1", "pfu-polymerase", "taq-polymerase-2"],
+        )
+
+    def test_retries_when_a_concurrent_insert_takes_the_slug(self):
+        allocate = ProductQuerySet.allocate_slugs
+        calls = []
+
+        def allocate_then_lose_race(queryset, products):
+            allocate(queryset, products)
+            if not calls:
+                # Another request inserts the same slug before our INSERT
+                Product.objects.bulk_create([
+                    Product(name="Taq Polymerase", slug=products[0].slug, category=self.category)
+                ])
+            calls.append(products[0].slug)
+
+        with mock.patch.object(ProductQuerySet, "allocate_slugs", allocate_then_lose_race):
+            product = self.product("Taq Polymerase")
+        self.assertEqual(calls, ["taq-polymerase", "taq-polymerase-1"])
+        self.assertEqual(product.slug, "taq-polymerase-1")
+
+
+# ==============================
+# PAGINATION
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProductPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Enzymes", slug="enzymes")
+        for i in range(0, 60, 2):  # odd numbers are left free for inserts
+            Product.objects.create(name=f"Product {i:02}", category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, response):
+        return [p["name"] for p in response.json()["results"]]
+
+    def test_cursor_pages_survive_inserts(self):
+        first = self.client.get("/api/products/", {"pagination": "cursor"})
+        page = self.names(first)
+        self.assertEqual(page[-1], "Product 38")
+
+        # One row lands on the page already read, one on the next page
+        Product.objects.create(name="Product 01", category=self.category)
+        Product.objects.create(name="Product 41", category=self.category)
+        bump_catalog_version()
+
+        second = self.names(self.client.get(first.json()["next"]))
+        self.assertEqual(
+            second, ["Product 40", "Product 41"] + [f"Product {i}" for i in range(42, 60, 2)]
+        )
+        self.assertFalse(set(page) & set(second))
+
+    def test_count_is_cached_per_catalog_version(self):
+        self.assertEqual(self.client.get("/api/products/").json()["count"], 30)
+        queryset = Product.objects.canonical()
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_count(queryset), 30)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count(queryset), 30)
+
+        Product.objects.create(name="Product 01", category=self.category)
+        # Signals bump the version on commit
+        bump_catalog_version()
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_count(queryset), 31)
+        self.assertEqual(self.client.get("/api/products/").json()["count"], 31)
+
+
+# ==============================
+# SPARSE FIELDSETS
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProductFieldSelectionTests(TestCase):
+    PRODUCT = Product._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(3, seed=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = "\n".join(query["sql"] for query in queries.captured_queries)
+        return response.json(), sql
+
+    def column(self, name):
+        return f'"{self.PRODUCT}"."{name}"'
+
+    def list_keys(self, **params):
+        data, sql = self.get("/api/products/", **params)
+        return list(data["results"][0]), sql
+
+    def test_list_defaults_to_the_slim_shape(self):
+        keys, sql = self.list_keys()
+        self.assertEqual(keys, ProductSerializer.LIST_FIELDS)
+        self.assertIn(self.column("image"), sql)
+        for column in ("description", "search_document", "search_vector"):
+            self.assertNotIn(self.column(column), sql)
+
+    def test_fields(self):
+        keys, sql = self.list_keys(fields="name,min_price,nonsense")
+        self.assertEqual(keys, ["name", "min_price"])
+        self.assertIn(self.column("min_price"), sql)
+        self.assertNotIn(self.column("slug"), sql)
+        self.assertNotIn(self.column("image"), sql)
+        self.assertNotIn('JOIN "biologist_app_category"', sql)
+
+        keys, _ = self.list_keys(fields="nonsense")
+        self.assertEqual(keys, ["id"])
+
+    def test_omit(self):
+        keys, sql = self.list_keys(omit="image,category_name,category_slug")
+        self.assertEqual(
+            keys,
+            [f for f in ProductSerializer.LIST_FIELDS
+             if f not in ("image", "category_name", "category_slug")],
+        )
+        self.assertNotIn(self.column("image"), sql)
+        self.assertNotIn('"biologist_app_category"."name"', sql)
+
+    def test_expand(self):
+        keys, sql = self.list_keys(expand="description,variants")
+        expanded = ProductSerializer.LIST_FIELDS + ["description", "variants"]
+        self.assertEqual(keys, [f for f in ProductSerializer.Meta.fields if f in expanded])
+        self.assertIn(self.column("description"), sql)
+
+        keys, _ = self.list_keys(fields="id", expand="variants")
+        self.assertEqual(keys, ["id", "variants"])
+
+    def test_detail_has_every_field(self):
+        product = Product.objects.canonical().first()
+        data, _ = self.get(f"/api/products/{product.pk}/")
+        self.assertEqual(list(data), ProductSerializer.Meta.fields)
+
+        data, sql = self.get(f"/api/products/{product.pk}/", omit="variants,description")
+        self.assertNotIn("variants", data)
+        self.assertNotIn(self.column("description"), sql)
+
+
+# ==============================
+# CATALOG SNAPSHOT
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(3)
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(CATALOG_SNAPSHOT_ROOT=root.name))
+        self.wake = self.enterContext(mock.patch.object(snapshot.builder, "wake"))
+        cache.clear()
+
+    def manifest(self):
+        return self.client.get("/api/catalog/snapshot/")
+
+    def test_requests_never_build(self):
+        with mock.patch.object(snapshot, "write_catalog_snapshot") as build:
+            response = self.manifest()
+        self.assertEqual(response.status_code, 503)
+        build.assert_not_called()
+        self.wake.assert_called_once()
+
+    def test_previous_snapshot_is_served_until_rebuilt(self):
+        previous = snapshot.rebuild_snapshot()
+        self.assertEqual(self.manifest().json()["url"], previous["url"])
+        self.wake.assert_not_called()
+
+        bump_catalog_version()
+        self.assertEqual(self.manifest().json()["url"], previous["url"])
+        self.wake.assert_called_once()
+
+        current = snapshot.rebuild_snapshot()
+        self.assertEqual(self.manifest().json()["version"], current["version"])
+        self.assertNotEqual(current["version"], previous["version"])
+        self.assertIsNone(snapshot.rebuild_snapshot())  # already current
+
+    def test_compressed_variants_exist_before_the_snapshot(self):
+        compress = snapshot._compress
+        published = []
+
+        def compress_and_check(src_path, path):
+            published.append(os.path.exists(path))
+            compress(src_path, path)
+
+        with mock.patch.object(snapshot, "_compress", compress_and_check):
+            manifest = snapshot.write_catalog_snapshot()
+        self.assertEqual(published, [False])
+
+        path = os.path.join(snapshot.snapshot_root(), manifest["url"].rsplit("/", 1)[1])
+        with open(path, "rb") as fh, gzip.open(path + ".gz") as gz:
+            self.assertEqual(gz.read(), fh.read())
+
+    def test_superseded_snapshots_outlive_cached_manifests(self):
+        product = Product.objects.first()
+
+        def generation(i):
+            Product.objects.filter(pk=product.pk).update(description=f"Generation {i}")
+            manifest = snapshot.write_catalog_snapshot()
+            return os.path.join(snapshot.snapshot_root(), manifest["url"].rsplit("/", 1)[1])
+
+        def age(path):
+            expired = time.time() - snapshot.SNAPSHOT_RETENTION - 60
+            os.utime(path, (expired, expired))
+
+        first, second = generation(1), generation(2)
+        age(first)
+        age(second)
+
+        third = generation(3)
+        self.assertFalse(os.path.exists(first))
+        self.assertFalse(os.path.exists(first + ".gz"))
+        self.assertTrue(os.path.exists(second))  # the previous generation
+
+        generation(4)
+        # superseded just now: cached manifests may still point at it
+        self.assertTrue(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+
+
+# ==============================
+# CATEGORY TREE
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class CategoryTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        enzymes = Category.objects.create(name="Enzymes", slug="enzymes")
+        kits = Category.objects.create(name="Kits", slug="kits")
+        polymerases = SubCategory.objects.create(category=enzymes, name="Polymerases")
+        cls.ligases = SubCategory.objects.create(category=enzymes, name="Ligases")
+        extraction = SubCategory.objects.create(category=kits, name="Extraction")
+
+        taq = Product.objects.create(
+            name="Taq Polymerase", category=enzymes, subcategory=polymerases
+        )
+        ProductVariant.objects.create(product=taq, catalog_number="TQ-1", quantity="1 ml")
+        # Same name: the variant-less copy is not canonical and not counted
+        Product.objects.create(name="Taq Polymerase", category=kits, subcategory=extraction)
+        Product.objects.create(name="Pfu Polymerase", category=enzymes, subcategory=polymerases)
+        Product.objects.create(name="DNA Ladder", category=enzymes)
+        Product.objects.create(name="Mini Kit", category=kits, subcategory=extraction)
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        tree = self.client.get("/api/categories/tree/").json()
+        return {
+            category["name"]: (
+                category["product_count"],
+                {sub["name"]: sub["product_count"] for sub in category["subcategories"]},
+            )
+            for category in tree
+        }
+
+    def test_counts_canonical_products_per_level(self):
+        self.assertEqual(self.counts(), {
+            "Enzymes": (3, {"Ligases": 0, "Polymerases": 2}),
+            "Kits": (1, {"Extraction": 1}),
+        })
+
+    def test_counts_match_the_list(self):
+        for category in self.client.get("/api/categories/tree/").json():
+            listed = self.client.get("/api/products/", {"category": category["id"]})
+            self.assertEqual(listed.json()["count"], category["product_count"])
+            for sub in category["subcategories"]:
+                listed = self.client.get("/api/products/", {"subcategory": sub["id"]})
+                self.assertEqual(listed.json()["count"], sub["product_count"])
+
+    def test_two_queries_however_many_categories(self):
+        with self.assertNumQueries(2):
+            build_category_tree()
+        for i in range(5):
+            category = Category.objects.create(name=f"Extra {i}", slug=f"extra-{i}")
+            SubCategory.objects.create(category=category, name="Misc")
+        with self.assertNumQueries(2):
+            self.assertEqual(len(build_category_tree()), 7)
+
+        self.client.get("/api/categories/tree/")
+        with self.assertNumQueries(0):  # materialized for this version
+            self.client.get("/api/categories/tree/")
+
+    def test_rebuilt_after_a_catalog_change(self):
+        self.counts()
+        Product.objects.create(
+            name="T4 Ligase", category=self.ligases.category, subcategory=self.ligases
+        )
+        self.assertEqual(self.counts()["Enzymes"][1]["Ligases"], 0)
+        # Signals bump the version on commit
+        bump_catalog_version()
+        self.assertEqual(self.counts()["Enzymes"], (4, {"Ligases": 1, "Polymerases": 2}))
+
+
+# ==============================
+# FACETS
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProductFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        enzymes = Category.objects.create(name="Enzymes", slug="enzymes")
+        kits = Category.objects.create(name="Kits", slug="kits")
+        cls.enzymes = enzymes
+        cls.polymerases = SubCategory.objects.create(category=enzymes, name="Polymerases")
+        ligases = SubCategory.objects.create(category=enzymes, name="Ligases")
+        extraction = SubCategory.objects.create(category=kits, name="Extraction")
+
+        for name, category, subcategory, price in (
+            ("Taq Polymerase", enzymes, cls.polymerases, "5000"),
+            ("Pfu Polymerase", enzymes, cls.polymerases, "20000"),
+            ("T4 Ligase", enzymes, ligases, "30000"),
+            ("Mini Kit", kits, extraction, "5000"),
+            ("DNA Ladder", enzymes, None, None),  # price on request
+        ):
+            product = Product.objects.create(
+                name=name, category=category, subcategory=subcategory
+            )
+            ProductVariant.objects.create(
+                product=product, catalog_number=f"{name[:3]}-1", quantity="1 ml",
+                price=Decimal(price) if price else None,
+            )
+        # Not canonical (same name, no variants): never counted
+        Product.objects.create(name="Taq Polymerase", category=kits, subcategory=extraction)
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get("/api/products/", params)
+        counts = {}
+        for name, values in response.json()["facets"].items():
+            counts[name] = {
+                value.get("name", value.get("key")): value["count"]
+                for value in values if value["count"]
+            }
+        return counts
+
+    def test_each_facet_ignores_its_own_filter(self):
+        counts = self.facets(category=self.enzymes.pk, facets="all")
+        self.assertEqual(counts, {
+            "category": {"Enzymes": 4, "Kits": 1},
+            "subcategory": {"Polymerases": 2, "Ligases": 1},
+            "price": {"under_10000": 1, "10000_25000": 1, "25000_50000": 1, "on_request": 1},
+        })
+
+    def test_subcategory_filter(self):
+        counts = self.facets(subcategory=self.polymerases.pk, facets="category,subcategory")
+        self.assertEqual(counts, {
+            "category": {"Enzymes": 4, "Kits": 1},
+            "subcategory": {"Polymerases": 2, "Ligases": 1, "Extraction": 1},
+        })
+
+    def test_price_filter(self):
+        counts = self.facets(price_max=9999, facets="category,price")
+        self.assertEqual(counts, {
+            "category": {"Enzymes": 1, "Kits": 1},
+            "price": {
+                "under_10000": 2, "10000_25000": 1, "25000_50000": 1, "on_request": 1,
+            },
+        })
+
+    def test_no_facets_no_extra_queries(self):
+        def queries(**params):
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get("/api/products/", params)
+            return len(captured), response.json()
+
+        baseline, data = queries(category=self.enzymes.pk)
+        self.assertNotIn("facets", data)
+        for facets in ("", "unknown"):
+            count, data = queries(category=self.enzymes.pk, facets=facets)
+            self.assertEqual(count, baseline)
+            self.assertNotIn("facets", data)
+
+        # Unfiltered, both taxonomy facets come from one GROUP BY
+        baseline, _ = queries()
+        count, _ = queries(facets="category,subcategory")
+        self.assertEqual(count, baseline + 1)
+
+
+# ==============================
+# BUFFERED ENQUIRIES
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE, ENQUIRY_INGESTION="buffered")
+class BufferedEnquiryTests(TestCase):
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.enterContext(override_settings(
+            ENQUIRY_SPOOL_PATH=os.path.join(spool.name, "enquiries.sqlite3")
+        ))
+        self.wake = self.enterContext(mock.patch.object(ingestion.flusher, "wake"))
+
+    def submit(self, name="Ada", **headers):
+        response = self.client.post(
+            "/api/enquiry/", {"name": name, "email": "ada@example.com"}, **headers
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.json()["id"]
+
+    def test_resubmission_with_idempotency_key(self):
+        self.submit(HTTP_IDEMPOTENCY_KEY="order-1")
+        self.submit(HTTP_IDEMPOTENCY_KEY="order-1")
+        self.assertEqual(ingestion.pending_count(), 1)
+        self.assertEqual(ingestion.flush_spool(), 1)
+
+        # Already written: spooled again, dropped by the unique key
+        self.submit(HTTP_IDEMPOTENCY_KEY="order-1")
+        ingestion.flush_spool()
+        self.assertEqual(Enquiry.objects.filter(idempotency_key="order-1").count(), 1)
+
+    def test_idempotency_key_reused_for_another_enquiry(self):
+        self.submit(HTTP_IDEMPOTENCY_KEY="order-1")
+        response = self.client.post(
+            "/api/enquiry/", {"name": "Grace", "email": "ada@example.com"},
+            HTTP_IDEMPOTENCY_KEY="order-1",
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ingestion.pending_count(), 1)
+
+    def test_resubmission_inside_the_dedup_window(self):
+        start = ingestion.time.time()
+
+        def submit_at(offset, **kwargs):
+            with mock.patch.object(ingestion.time, "time", return_value=start + offset):
+                return self.submit(**kwargs)
+
+        first = submit_at(0)
+        self.assertNotEqual(submit_at(1, name="Grace"), first)
+        # Each repeat restarts the window, wherever a fixed window would end
+        window = ingestion.DEDUP_WINDOW
+        self.assertEqual(submit_at(window - 1), first)
+        self.assertEqual(submit_at(2 * window - 2), first)
+        self.assertEqual(ingestion.pending_count(), 2)
+
+        self.assertNotEqual(submit_at(3 * window), first)
+        self.assertEqual(ingestion.pending_count(), 3)
+
+    def test_failed_flush_keeps_rows_spooled(self):
+        self.submit()
+        self.submit(name="Grace")
+        with mock.patch.object(
+            Enquiry.objects, "bulk_create", side_effect=OperationalError("gone away")
+        ):
+            with self.assertRaises(OperationalError):
+                ingestion.flush_spool()
+        self.assertEqual(ingestion.pending_count(), 2)
+
+        self.assertEqual(ingestion.flush_spool(), 2)
+        self.assertEqual(ingestion.pending_count(), 0)
+        self.assertEqual(Enquiry.objects.count(), 2)
+
+    def test_rejected_row_goes_to_dead_letter(self):
+        self.submit()
+        # Validated by an older release, now refused by the database
+        ingestion.spool_enquiry({"name": None, "email": "x@example.com"}, "bad")
+        self.submit(name="Grace")
+
+        self.assertEqual(ingestion.flush_spool(batch_size=10), 2)
+        self.assertEqual(ingestion.pending_count(), 0)
+        self.assertEqual(ingestion.pending_count("dead_letter"), 1)
+        self.assertEqual(
+            sorted(Enquiry.objects.values_list("name", flat=True)), ["Ada", "Grace"]
+        )
+
+    def test_first_request_resumes_a_leftover_spool(self):
+        # Earlier requests in this process already used the receiver up;
+        # like the test client, keep Django from closing the connection
+        request_started.connect(ingestion.resume_spooled, dispatch_uid=ingestion.RESUME_UID)
+        request_started.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        ingestion.spool_enquiry({"name": "Ada", "email": "ada@example.com"}, "left-over")
+        self.wake.reset_mock()
+
+        request_started.send(sender=None)
+        self.wake.assert_called_once_with(full_batch=True)
+        request_started.send(sender=None)  # only the first request checks
+        self.wake.assert_called_once_with(full_batch=True)
+
+
+# ==============================
+# ADMIN EXPORTS
+# ==============================
+class EnquiryExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(1)
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        Enquiry.objects.create(
+            name='=HYPERLINK("http://evil.example","Click")',
+            email="@SUM(1+1)@example.com",
+            phone="+91 98765 43210",
+            message="-2+3",
+            product=Product.objects.get(),
+        )
+        Enquiry.objects.create(name="\tTab", email="plain@example.com", message="\rCR")
+        Enquiry.objects.create(name="Ada", email="ada@example.com", phone="-1+cmd|' /C calc'!A0")
+
+    def export(self, fmt):
+        self.client.force_login(self.admin)
+        url = reverse("admin:biologist_app_enquiry_export")
+        response = self.client.get(url, {"format": fmt})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_csv_escapes_formulas(self):
+        content = b"".join(self.export("csv").streaming_content).decode()
+        header, first, second, third = csv.reader(io.StringIO(content))
+        self.assertEqual(first[1:3], [
+            '\'=HYPERLINK("http://evil.example","Click")',
+            "'@SUM(1+1)@example.com",
+        ])
+        self.assertEqual(first[6], "'-2+3")
+        self.assertEqual((second[1], second[2], second[6]), ("'\tTab", "plain@example.com", "'\rCR"))
+        # Only a phone number that is nothing but a phone number is kept
+        self.assertEqual(third[3], "'-1+cmd|' /C calc'!A0")
+        # Staff-controlled catalog columns are left alone
+        self.assertEqual(first[4], Product.objects.get().name)
+
+    def test_plain_phone_is_not_escaped(self):
+        content = b"".join(self.export("csv").streaming_content).decode()
+        first = list(csv.reader(io.StringIO(content)))[1]
+        self.assertEqual(first[3], "+91 98765 43210")
+
+    def test_xlsx_stores_text_not_formulas(self):
+        from openpyxl import load_workbook
+
+        response = self.export("xlsx")
+        sheet = load_workbook(io.BytesIO(b"".join(response.streaming_content))).active
+        cells = list(sheet.iter_rows(min_row=2, max_row=2))[0]
+        # Typed string cells: stored as entered, never run as a formula
+        self.assertEqual(cells[1].data_type, "s")
+        self.assertEqual(cells[1].value, '=HYPERLINK("http://evil.example","Click")')
+        self.assertEqual(cells[3].value, "+91 98765 43210")
+        self.assertEqual(cells[6].value, "-2+3")
+
+
+# ==============================
+# ADMIN CHANGELISTS AT SCALE
+# ==============================
+# Admin pages run dozens of queries; keep them out of the slow-request log
+@override_settings(SLOW_REQUEST_QUERIES=1000)
+class ScalableAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(40, seed=11)
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.category = Category.objects.order_by("pk").first()
+        cls.product = Product.objects.get(pk=Product.objects.order_by("pk").first().pk)
+        ProductVariant.objects.bulk_create(
+            ProductVariant(
+                product=cls.product, catalog_number=f"BULK-{i:03}", quantity=f"{i} ml"
+            )
+            for i in range(60)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:biologist_app_product_changelist"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries.captured_queries]
+
+    def test_autocomplete_filter_restricts_the_changelist(self):
+        response, _ = self.changelist(category__id__exact=self.category.pk)
+        changelist = response.context["cl"]
+        expected = Product.objects.filter(category=self.category)
+        self.assertEqual(changelist.result_count, expected.count())
+        self.assertEqual(
+            {p.category_id for p in changelist.result_list}, {self.category.pk}
+        )
+        # The selected category is rendered in the widget, not as a link per row
+        other = Category.objects.exclude(pk=self.category.pk).first()
+        self.assertContains(response, f'value="{self.category.pk}" selected')
+        self.assertNotContains(response, f"category__id__exact={other.pk}")
+
+    def test_changelist_count_is_bounded(self):
+        with mock.patch("biologist_app.pagination.ADMIN_EXACT_COUNT_LIMIT", 10):
+            response, queries = self.changelist()
+        # Capped at the limit + 1, or the planner's estimate (Postgres)
+        estimate = estimated_row_count(Product.objects.all()) or 0
+        self.assertEqual(response.context["cl"].paginator.count, max(estimate, 11))
+        counts = [sql for sql in queries if "COUNT(" in sql.upper()]
+        self.assertTrue(counts)
+        for sql in counts:
+            self.assertIn("LIMIT", sql.upper(), sql)
+
+    def test_variant_inline_is_paginated(self):
+        url = reverse("admin:biologist_app_product_change", args=[self.product.pk])
+        total = self.product.variants.count()
+        per_page = ProductVariantInline.per_page
+
+        response = self.client.get(url)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), per_page)
+
+        last_page = -(-total // per_page)
+        response = self.client.get(url, {f"{formset.prefix}_page": last_page})
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), total - (last_page - 1) * per_page)
+        self.assertEqual(formset.page.number, last_page)
+
+
+# ==============================
+# BOOTSTRAP (SEED AN EMPTY CATALOG ONCE)
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class BootstrapCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.import_products = self.enterContext(
+            mock.patch.object(bootstrap, "call_command")
+        )
+
+    def test_seeds_an_empty_catalog(self):
+        out = io.StringIO()
+        call_command("bootstrap_catalog", file="seed.xlsx", stdout=out)
+        self.import_products.assert_called_once_with(
+            "import_products", file="seed.xlsx", stdout=mock.ANY, stderr=mock.ANY
+        )
+        self.assertIn("seeded successfully", out.getvalue())
+
+    def test_leaves_a_seeded_catalog_alone(self):
+        generate_catalog(1)
+        out = io.StringIO()
+        call_command("bootstrap_catalog", file="seed.xlsx", stdout=out)
+        self.import_products.assert_not_called()
+        self.assertIn("already seeded", out.getvalue())
+
+    @skipIf(connection.vendor == "postgresql", "uses the advisory lock")
+    def test_waits_for_another_process_then_skips(self):
+        # Another instance holds the lock and seeds while this one waits
+        cache.add(bootstrap.BOOTSTRAP_LOCK_KEY, 1)
+
+        def other_instance_finishes(seconds):
+            generate_catalog(1)
+            cache.delete(bootstrap.BOOTSTRAP_LOCK_KEY)
+
+        with mock.patch.object(
+            bootstrap.time, "sleep", side_effect=other_instance_finishes
+        ) as sleep:
+            self.assertFalse(bootstrap.seed_catalog("seed.xlsx"))
+        sleep.assert_called_once()
+        self.import_products.assert_not_called()
+        self.assertIsNone(cache.get(bootstrap.BOOTSTRAP_LOCK_KEY))
+
+    @skipIf(connection.vendor == "postgresql", "uses the advisory lock")
+    def test_lock_is_released_on_failure(self):
+        self.import_products.side_effect = CommandError("bad sheet")
+        with self.assertRaises(CommandError):
+            bootstrap.seed_catalog("seed.xlsx")
+        self.assertTrue(cache.add(bootstrap.BOOTSTRAP_LOCK_KEY, 1))
+
+    @skipUnless(connection.vendor == "postgresql", "Postgres advisory lock")
+    def test_advisory_lock_excludes_other_sessions(self):
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+
+        def try_lock():
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_try_advisory_lock(%s)", [bootstrap.BOOTSTRAP_LOCK_ID]
+                )
+                locked = cursor.fetchone()[0]
+                if locked:
+                    cursor.execute(
+                        "SELECT pg_advisory_unlock(%s)", [bootstrap.BOOTSTRAP_LOCK_ID]
+                    )
+            return locked
+
+        with bootstrap.bootstrap_lock():
+            self.assertFalse(try_lock())
+        self.assertTrue(try_lock())
+
+
+# ==============================
+# REQUEST INSTRUMENTATION
+# ==============================
+@override_settings(
+    CACHES=LOCMEM_CACHE, SERVER_TIMING="staff", REQUEST_METRICS_SAMPLE_RATE=0,
+    SLOW_REQUEST_MS=60000, SLOW_REQUEST_QUERIES=1000,
+)
+class RequestInstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(5, seed=2)
+        cls.staff = User.objects.create_user("staffer", password="x", is_staff=True)
+        cls.customer = User.objects.create_user("customer", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user=None, url="/api/products/"):
+        headers = {}
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        return self.client.get(url, **headers)
+
+    def slow_log(self, **params):
+        with self.assertLogs("biologist_app.requests", "WARNING") as logs:
+            self.get(**params)
+        [line] = logs.records
+        return json.loads(line.getMessage())
+
+    def test_server_timing_for_staff_only(self):
+        timing = self.get(self.staff)["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("total;dur=", timing)
+        self.assertFalse(self.get(self.customer).has_header("Server-Timing"))
+        self.assertFalse(self.get().has_header("Server-Timing"))
+
+    @override_settings(SERVER_TIMING="all")
+    def test_server_timing_for_everyone(self):
+        self.assertTrue(self.get().has_header("Server-Timing"))
+
+    @override_settings(SERVER_TIMING="off")
+    def test_server_timing_off(self):
+        self.assertFalse(self.get(self.staff).has_header("Server-Timing"))
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_unsampled_requests_are_logged_without_detail(self):
+        entry = self.slow_log()
+        self.assertEqual(entry["event"], "slow_request")
+        self.assertEqual((entry["path"], entry["status"]), ("/api/products/", 200))
+        self.assertFalse(entry["sampled"])
+        self.assertNotIn("queries", entry)
+
+    @override_settings(SLOW_REQUEST_MS=0, REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_requests_are_logged_with_queries(self):
+        entry = self.slow_log()
+        self.assertTrue(entry["sampled"])
+        self.assertGreater(entry["queries"], 0)
+        self.assertEqual(entry["cache"]["response"], "miss")
+        self.assertTrue(entry["worst_queries"])
+
+    @override_settings(SLOW_REQUEST_QUERIES=1, REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_query_count_threshold(self):
+        worst = self.slow_log()["worst_queries"]
+        self.assertLessEqual(len(worst), settings.SLOW_REQUEST_WORST_QUERIES)
+        self.assertEqual(worst, sorted(worst, key=lambda q: q["ms"], reverse=True))
+        # Served from the response cache: no queries, nothing logged
+        with self.assertNoLogs("biologist_app.requests", "WARNING"):
+            self.get()
+
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs("biologist_app.requests", "WARNING"):
+            self.get(self.staff)
+
+
+# ==============================
+# METRICS ENDPOINT
+# ==============================
+@override_settings(CACHES=LOCMEM_CACHE)
+class MetricsEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(3, seed=4)
+        cls.admin = User.objects.create_user("ops", password="x", is_staff=True)
+        cls.customer = User.objects.create_user("customer", password="x")
+
+    def setUp(self):
+        store = tempfile.TemporaryDirectory()
+        self.addCleanup(store.cleanup)
+        self.store = os.path.join(store.name, "metrics.sqlite3")
+        self.enterContext(override_settings(METRICS_STORE_PATH=self.store))
+
+    def scrape(self):
+        response = self.client.get(
+            "/api/metrics/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def sample(self, text, series):
+        match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.M)
+        return float(match.group(1)) if match else 0
+
+    def test_per_route_prometheus_text(self):
+        requests = 'biologist_http_requests_total{route="products-list",method="GET",status="200"}'
+        latency = 'biologist_http_request_duration_seconds_count{route="products-list"}'
+        before = self.scrape()
+        self.client.get("/api/products/")
+        self.client.get("/api/products/")
+        self.client.get("/api/categories/")
+        after = self.scrape()
+
+        self.assertIn("# TYPE biologist_http_requests_total counter", after)
+        self.assertIn("# TYPE biologist_http_request_duration_seconds histogram", after)
+        self.assertEqual(self.sample(after, requests) - self.sample(before, requests), 2)
+        self.assertEqual(self.sample(after, latency) - self.sample(before, latency), 2)
+        self.assertIn('route="categories-list"', after)
+        self.assertRegex(
+            after,
+            r'biologist_http_request_duration_seconds_bucket'
+            r'\{route="products-list",le="\+Inf"\} \d+',
+        )
+
+    def test_admin_only(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        response = self.client.get(
+            "/api/metrics/",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.customer)}",
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_only_servers_flush_in_the_background(self):
+        self.client.get("/api/products/")
+        self.assertFalse(registry._started)
+        self.assertIsNone(registry._thread)
+        self.assertFalse(os.path.exists(self.store))
+
+
+class ConnectionPoolTests(TestCase):
+    def load_settings(self, **env):
+        """The project settings module, evaluated against ``env``."""
+        env = {
+            "DATABASE_URL": "postgres://shop:x@db.example:5432/shop",
+            "DB_POOL": "1",
+            **env,
+        }
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(import_module(settings.SETTINGS_MODULE).__file__)
+
+    def test_pool_options_come_from_the_environment(self):
+        database = self.load_settings(
+            DB_POOL_MIN_SIZE="2", DB_POOL_MAX_SIZE="8", DB_POOL_TIMEOUT="2.5"
+        )["DATABASES"]["default"]
+
+        self.assertEqual(database["ENGINE"], "biologist_app.db_backends.postgresql")
+        self.assertEqual(
+            database["OPTIONS"]["pool"], {"min_size": 2, "max_size": 8, "timeout": 2.5}
+        )
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+    def test_persistent_connections_without_the_pool(self):
+        for env in (
+            {"DB_POOL": "0", "DB_CONN_MAX_AGE": "120"},
+            {"DATABASE_URL": "sqlite:///shop.sqlite3", "DB_CONN_MAX_AGE": "120"},
+        ):
+            with self.subTest(**env):
+                database = self.load_settings(**env)["DATABASES"]["default"]
+                self.assertNotIn("pool", database.get("OPTIONS", {}))
+                self.assertEqual(database["CONN_MAX_AGE"], 120)
+                self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+    def checkouts(self):
+        prefix = f'alias="{DEFAULT_DB_ALIAS}",'
+        return sum(
+            value
+            for (name, labels, _), value in list(registry._pending.items())
+            if name == "biologist_db_connection_checkout_seconds_count"
+            and labels.startswith(prefix)
+        )
+
+    def test_checkouts_reach_the_metrics_registry(self):
+        before = self.checkouts()
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            other.ensure_connection()
+            pooled = getattr(other, "pool", None) is not None
+        finally:
+            other.close()
+
+        self.assertEqual(self.checkouts() - before, 1)
+        mode = "pool" if pooled else "connect"
+        self.assertIn(
+            (
+                "biologist_db_connection_checkout_seconds_count",
+                f'alias="{DEFAULT_DB_ALIAS}",mode="{mode}"',
+                "",
+            ),
+            registry._pending,
+        )
+        if pooled:  # the pool's own counters are merged in on flush
+            registry._collect()
+            self.assertGreaterEqual(
+                registry._pending[(
+                    "biologist_db_pool_checkouts_total", f'alias="{DEFAULT_DB_ALIAS}"', ""
+                )],
+                1,
+            )
+
+
+# ==============================
+# ASYNC READ PATH
+# ==============================
+class AsyncURLConf:
+    """The project's URLs as the ASGI profile mounts them."""
+    from biologist_project import urls as project_urls
+    from . import urls as app_urls
+
+    urlpatterns = app_urls.async_urlpatterns + project_urls.urlpatterns
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncCatalogViewTests(TestCase):
+    """Each async twin answers exactly like the sync view it shadows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(30, seed=3)
+        TeamMember.objects.create(name="Ada", role="Founder", order=1)
+        TeamMember.objects.create(name="Grace", role="Chemist", order=2)
+        cls.product = Product.objects.canonical().order_by("name").first()
+
+    def setUp(self):
+        cache.clear()
+        # Versions from an earlier second, so both responses carry Last-Modified
+        past = time.time_ns() - 5 * 10**9
+        for scope in (caching.CATALOG, caching.TEAM):
+            cache.set(f"{scope}:version", past, timeout=None)
+
+    def async_get(self, url, **headers):
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            response = async_to_sync(self.async_client.get)(url, headers=headers)
+            response.view_module = response.resolver_match.func.__module__  # lazy
+        return response
+
+    def assertSameResponse(self, url):
+        # Drop only the cached response: the cache also holds the version
+        key = catalog_cache_key(RequestFactory().get(url))
+        with self.subTest(url=url):
+            cache.delete(key)
+            expected = self.client.get(url)
+            cache.delete(key)
+            actual = self.async_get(url)
+            self.assertEqual(actual.view_module, "biologist_app.async_views")
+            self.assertEqual(actual.status_code, expected.status_code)
+            self.assertEqual(actual.content, expected.content)
+            self.assertEqual(actual["Content-Type"], expected["Content-Type"])
+            if expected.status_code == 200:
+                self.assertEqual(actual["ETag"], expected["ETag"])
+                self.assertEqual(actual["Last-Modified"], expected["Last-Modified"])
+                revalidated = self.async_get(url, if_none_match=expected["ETag"])
+                self.assertEqual(revalidated.status_code, 304)
+
+    def assertCachedAfterFirstHit(self, url):
+        self.async_get(url)
+        request = RequestFactory().get(url)
+        self.assertIsNotNone(cache.get(catalog_cache_key(request)))
+        # ... and is what the sync view would then serve from the cache
+        self.assertEqual(self.client.get(url).content, self.async_get(url).content)
+
+    def test_product_list(self):
+        category = self.product.category_id
+        for url in (
+            "/api/products/",
+            "/api/products/?page=2",
+            "/api/products/?page=99",
+            f"/api/products/?category={category}&facets=category,price",
+            "/api/products/?ordering=-price&price_min=10",
+            "/api/products/?fields=id,name,min_price",
+            "/api/products/?pagination=cursor",
+            f"/api/products/?search={self.product.name.split()[0]}",
+        ):
+            self.assertSameResponse(url)
+        self.assertCachedAfterFirstHit("/api/products/")
+
+    def test_product_list_cursor_pages(self):
+        first = self.client.get("/api/products/?pagination=cursor").json()
+        self.assertSameResponse(first["next"].replace("http://testserver", ""))
+
+    def test_product_detail_by_slug(self):
+        url = f"/api/products/slug/{self.product.slug}/"
+        self.assertSameResponse(url)
+        self.assertSameResponse("/api/products/slug/no-such-product/")
+        self.assertCachedAfterFirstHit(url)
+
+    def test_category_list(self):
+        self.assertSameResponse("/api/categories/")
+        self.assertCachedAfterFirstHit("/api/categories/")
+
+    def test_category_tree(self):
+        self.assertSameResponse("/api/categories/tree/")
+
+    def test_team_list(self):
+        self.assertSameResponse("/api/team/")
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
+
 from .views import (
     ProductViewSet,
     TeamMemberViewSet,
     CategoryViewSet,
     EnquiryCreateView,
     ProductDetailBySlug,
+    CatalogNumberLookupView,
+    CatalogSnapshotManifestView,
+    MetricsView,
     RegisterView,
     home,
 )
@@ -18,8 +24,12 @@ router.register("team", TeamMemberViewSet, basename="team")
 
 urlpatterns = [
     # ================= API =================
+    # Before the router, which would treat "lookup" as a product pk
+    path("api/products/lookup/", CatalogNumberLookupView.as_view(), name="catalog-lookup"),
     path("api/", include(router.urls)),
+    path("api/catalog/snapshot/", CatalogSnapshotManifestView.as_view(), name="catalog-snapshot"),
     path("api/enquiry/", EnquiryCreateView.as_view()),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
 
     # ================= AUTH (CUSTOMER) =================
     path("api/auth/register/", RegisterView.as_view(), name="register"),
@@ -36,3 +46,17 @@ urlpatterns = [
     # Catch-all (keep last)
     path("<path:path>/", home),
 ]
+
+# ================= ASYNC READ PATH (ASGI PROFILE) =================
+# Same URLs and responses, served by async views; listed first so they
+# shadow the router's sync list / tree routes.
+async_urlpatterns = [
+    path("api/products/", async_views.product_list, name="products-list"),
+    path("api/products/slug/<slug:slug>/", async_views.product_detail_by_slug),
+    path("api/categories/", async_views.category_list, name="categories-list"),
+    path("api/categories/tree/", async_views.category_tree, name="categories-tree"),
+    path("api/team/", async_views.team_list, name="team-list"),
+]
+
+if settings.ASYNC_CATALOG_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
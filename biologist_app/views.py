@@ -1,26 +1,45 @@
+import copy
+
 from rest_framework import viewsets, status, generics, permissions
+from rest_framework.decorators import action
+from rest_framework.request import Request
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
 
-from django.db.models import Count, Exists, OuterRef, Case, When, IntegerField
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.models import User
 
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 
+from .caching import TEAM, cached_for_catalog, catalog_cache_page, versioned_condition
+from .facets import facet_counts, requested_facets
+from .filters import ProductFilter, ProductOrderingFilter
+from .ingestion import IdempotencyConflict, client_idempotency_key, spool_enquiry
+from .metrics import render_prometheus
+from .pagination import CachedCountPageNumberPagination, ProductCursorPagination
+from .search import ProductSearchFilter
+from .snapshot import current_snapshot_manifest
 from .models import (
     Product,
     ProductVariant,
     TeamMember,
     Category,
+    SubCategory,
     Enquiry,
+    normalize_catalog_number,
 )
 
 from .serializers import (
     ProductSerializer,
+    BufferedEnquirySerializer,
+    CatalogLookupRequestSerializer,
+    LookupVariantSerializer,
     TeamMemberSerializer,
     CategorySerializer,
     EnquirySerializer,
@@ -46,45 +65,122 @@ class RegisterView(generics.CreateAPIView):
 # =========================
 # PRODUCTS (LIST + DETAIL)
 # =========================
-@method_decorator(cache_page(60 * 10), name='list')   # ⭐ Cache list API for 10 min
+@method_decorator(versioned_condition(), name="list")      # 304 before any query
+@method_decorator(versioned_condition(), name="retrieve")
+@method_decorator(catalog_cache_page(), name="list")   # ⭐ Invalidated on catalog change
+@method_decorator(catalog_cache_page(), name="retrieve")
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductSerializer
 
-    filter_backends = [SearchFilter, DjangoFilterBackend]
-    search_fields = ["name"]
-    filterset_fields = ["category", "subcategory"]
+    # Relevance-ranked: name, catalog numbers, category names, description
+    # (an explicit ?ordering= wins over relevance)
+    filter_backends = [ProductSearchFilter, DjangoFilterBackend, ProductOrderingFilter]
+    search_fields = ["name", "search_document", "description"]
+    filterset_class = ProductFilter
+
+    pagination_class = CachedCountPageNumberPagination
+
+    @property
+    def paginator(self):
+        """
+        ``?pagination=cursor`` (or a ``cursor`` param) switches the list to
+        keyset pagination; searches and price orderings keep page numbers
+        so their order is preserved.
+        """
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            if (
+                request is not None
+                and ProductCursorPagination.requested(request)
+                and not request.query_params.get(ProductSearchFilter.search_param)
+                and ProductOrderingFilter.requested(request) not in ("price", "-price")
+            ):
+                self._paginator = ProductCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_product_fields(self):
+        """Fields to render: slim for lists, full for detail, per query params."""
+        if not hasattr(self, "_product_fields"):
+            default = ProductSerializer.LIST_FIELDS if self.action == "list" else None
+            self._product_fields = ProductSerializer.select_fields(
+                self.request.query_params, default
+            )
+        return self._product_fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_product_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
-        base_qs = (
-            Product.objects
-            .select_related("category", "subcategory")
-            .prefetch_related("variants")
-        )
+        # Load only the columns / relations the chosen fields read
+        fields = self.get_product_fields()
+        columns = {"id", "name"}
+        for field in fields:
+            columns.update(ProductSerializer.FIELD_COLUMNS.get(field, ()))
+
+        base_qs = Product.objects.only(*columns)
+        related = [
+            relation for relation in ("category", "subcategory")
+            if any(column.startswith(f"{relation}__") for column in columns)
+        ]
+        if related:
+            base_qs = base_qs.select_related(*related)
+        if "variants" in fields:
+            base_qs = base_qs.prefetch_related("variants")
+        elif "catalog_number" in fields:
+            base_qs = base_qs.with_default_catalog_number()
 
         if self.action == "list":
-            qs = base_qs.annotate(
-                has_variants=Exists(
-                    ProductVariant.objects.filter(product=OuterRef("pk"))
-                )
-            ).annotate(
-                priority=Case(
-                    When(has_variants=True, then=0),
-                    default=1,
-                    output_field=IntegerField(),
-                )
-            ).order_by("name", "priority", "id")
+            # One product per name; is_canonical is maintained on write
+            # (ProductQuerySet.refresh_canonical) so dedup stays in SQL.
+            return base_qs.canonical().order_by("name")
 
-            picked_ids = []
-            seen = set()
+        return base_qs.order_by("name")
 
-            for product in qs:
-                if product.name not in seen:
-                    seen.add(product.name)
-                    picked_ids.append(product.id)
+    def list(self, request, *args, **kwargs):
+        """
+        Same as ListModelMixin.list, plus ``?facets=category,subcategory,price``
+        counts over the filtered list (cached with the page).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
 
-            return base_qs.filter(id__in=picked_ids).order_by("name")
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
 
-        return base_qs.order_by("name")
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        facets = requested_facets(request.query_params)
+        if facets:
+            response.data["facets"] = facet_counts(self.facet_source(queryset), facets)
+        return response
+
+    def facet_source(self, queryset):
+        """
+        ``filtered(ignore)`` for facet_counts: the list's ``queryset``
+        filtered again without the ``ignore`` params, when any is set.
+        """
+        params = self.request.query_params
+        querysets = {(): queryset}
+
+        def filtered(ignore):
+            active = tuple(param for param in ignore if param in params)
+            if active not in querysets:
+                request = copy.copy(self.request._request)
+                request.GET = params.copy()
+                for param in active:
+                    del request.GET[param]
+                view = type(self)(
+                    action=self.action, format_kwarg=None, args=(), kwargs={}
+                )
+                view.request = Request(request)
+                querysets[active] = view.filter_queryset(view.get_queryset())
+            return querysets[active]
+
+        return filtered
 
 
 # =========================
@@ -93,6 +189,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
 class ProductDetailBySlug(APIView):
     permission_classes = [permissions.AllowAny]
 
+    @method_decorator(versioned_condition())
+    @method_decorator(catalog_cache_page())
     def get(self, request, slug):
         product = get_object_or_404(
             Product.objects
@@ -104,9 +202,111 @@ class ProductDetailBySlug(APIView):
         return Response(serializer.data)
 
 
+# =========================
+# CATALOG NUMBER LOOKUP (BATCH)
+# =========================
+class CatalogNumberLookupView(APIView):
+    """
+    POST {"catalog_numbers": [...]} → every matching variant with its
+    product, plus the inputs that matched nothing. One indexed query.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = CatalogLookupRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # normalized key → first spelling the customer used
+        requested = {}
+        for raw in serializer.validated_data["catalog_numbers"]:
+            key = normalize_catalog_number(raw)
+            if key:
+                requested.setdefault(key, raw.strip())
+
+        variants = (
+            ProductVariant.objects
+            .filter(catalog_number_normalized__in=requested)
+            .select_related("product__category", "product__subcategory")
+            .order_by("catalog_number_normalized", "id")
+        )
+
+        matches = {}
+        for variant in variants:
+            matches.setdefault(variant.catalog_number_normalized, []).append(variant)
+
+        results = []
+        not_found = []
+        for key, raw in requested.items():
+            if key not in matches:
+                not_found.append(raw)
+                continue
+            results.append({
+                "query": raw,
+                "variants": LookupVariantSerializer(matches[key], many=True).data,
+            })
+
+        return Response({"results": results, "not_found": not_found})
+
+
+# =========================
+# FULL CATALOG SNAPSHOT (MANIFEST)
+# =========================
+class CatalogSnapshotManifestView(APIView):
+    """
+    Points at the current content-hashed catalog snapshot; the snapshot
+    itself is a static file served (precompressed, immutable) by WhiteNoise.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        manifest = current_snapshot_manifest()
+        if manifest is None:
+            response = Response(
+                {"detail": "Catalog snapshot is being built, retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "5"
+            return response
+        response = Response(manifest)
+        response["Cache-Control"] = "no-cache"
+        return response
+
+
 # =========================
 # CATEGORIES
 # =========================
+def build_category_tree():
+    """
+    Categories → subcategories with counts of canonical products – what
+    the list shows for each – in two grouped queries. Cached per catalog
+    version by CategoryViewSet.tree.
+    """
+    canonical = Q(products__is_canonical=True)
+    subcategories = {}
+    for sub in (
+        SubCategory.objects
+        .annotate(product_count=Count("products", filter=canonical))
+        .order_by("name")
+        .values("id", "category_id", "name", "product_count")
+    ):
+        category_id = sub.pop("category_id")
+        subcategories.setdefault(category_id, []).append(sub)
+
+    return [
+        {**category, "subcategories": subcategories.get(category["id"], [])}
+        for category in (
+            Category.objects
+            .annotate(product_count=Count("products", filter=canonical))
+            .order_by("name")
+            .values("id", "name", "slug", "product_count")
+        )
+    ]
+
+
+@method_decorator(versioned_condition(), name="list")
+@method_decorator(versioned_condition(), name="retrieve")
+@method_decorator(versioned_condition(), name="tree")
+@method_decorator(catalog_cache_page(), name="list")
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
 
@@ -116,13 +316,20 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             .annotate(
                 product_count=Count("products__name", distinct=True)
             )
+            .prefetch_related("subcategories")
             .order_by("name")
         )
 
+    @action(detail=False, pagination_class=None)
+    def tree(self, request):
+        """Whole navigation tree with per-(sub)category product counts."""
+        return Response(cached_for_catalog("category-tree", build_category_tree))
+
 
 # =========================
 # TEAM
 # =========================
+@method_decorator(versioned_condition(TEAM), name="list")
 class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = TeamMember.objects.order_by("order")
     serializer_class = TeamMemberSerializer
@@ -133,6 +340,9 @@ class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
 # =========================
 class EnquiryCreateView(APIView):
     def post(self, request):
+        if settings.ENQUIRY_INGESTION == "buffered":
+            return self.post_buffered(request)
+
         serializer = EnquirySerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -141,3 +351,38 @@ class EnquiryCreateView(APIView):
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def post_buffered(self, request):
+        """Validate, spool locally and answer 202 – no database round trip."""
+        serializer = BufferedEnquirySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            key, _ = spool_enquiry(
+                serializer.validated_data, client_idempotency_key(request)
+            )
+        except IdempotencyConflict:
+            return Response(
+                {"detail": "Idempotency-Key was already used for a different enquiry."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            {"message": "Enquiry submitted successfully", "id": key},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+# =========================
+# METRICS (PROMETHEUS, ADMIN ONLY)
+# =========================
+class MetricsView(APIView):
+    """Request / latency / query / cache metrics of all workers."""
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'biologist_project.settings')
+# ASGI profile: catalog reads go through the async views (see
+# biologist_app/async_views.py); set ASYNC_CATALOG_VIEWS=0 to opt out.
+os.environ.setdefault('ASYNC_CATALOG_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Server processes only: flush per-route metrics to METRICS_STORE_PATH
+from biologist_app.metrics import registry  # noqa: E402
+
+registry.start()
@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 import dj_database_url
 from corsheaders.defaults import default_headers
 
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",   # full-text + trigram product search
 
     # Third-party
     "rest_framework",
@@ -50,9 +52,10 @@ INSTALLED_APPS = [
 # MIDDLEWARE (ORDER MATTERS)
 # ──────────────────────────────────────
 MIDDLEWARE = [
+    "biologist_app.instrumentation.RequestMetricsMiddleware",   # first: times the whole stack
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "biologist_app.middleware.SnapshotWhiteNoiseMiddleware",   # WhiteNoise + catalog snapshots
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -88,12 +91,28 @@ WSGI_APPLICATION = "biologist_project.wsgi.application"
 # ──────────────────────────────────────
 # DATABASE
 # ──────────────────────────────────────
+# Connections: with DB_POOL on (default) each worker process keeps a
+# psycopg pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections – keep
+# workers × max size under the server's max_connections; a request waits
+# at most DB_POOL_TIMEOUT seconds for one. With DB_POOL=0, or on SQLite,
+# connections persist for DB_CONN_MAX_AGE seconds instead (don't use that
+# under ASGI: every request runs its queries on a fresh thread, so
+# persistent connections pile up). Either way a connection is checked
+# before reuse, so one the server dropped is replaced, not a 500.
+DB_POOL = os.environ.get("DB_POOL", "1") == "1"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 4))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+# Render's external Postgres URLs need TLS; a local one usually has none
+DB_SSL_REQUIRE = os.environ.get("DB_SSL_REQUIRE", "1") == "1"
+
 if os.environ.get("DATABASE_URL"):
     DATABASES = {
         "default": dj_database_url.parse(
             os.environ["DATABASE_URL"],
-            conn_max_age=600,
-            ssl_require=True,
+            ssl_require=DB_SSL_REQUIRE
+            and not os.environ["DATABASE_URL"].startswith("sqlite"),
         )
     }
 else:
@@ -107,6 +126,23 @@ else:
             "PORT": "5432",
         }
     }
+
+# Django's backends plus connection checkout timing (biologist_app/db_backends)
+DATABASES["default"]["ENGINE"] = {
+    "django.db.backends.postgresql": "biologist_app.db_backends.postgresql",
+    "django.db.backends.sqlite3": "biologist_app.db_backends.sqlite3",
+}.get(DATABASES["default"]["ENGINE"], DATABASES["default"]["ENGINE"])
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DB_POOL and DATABASES["default"]["ENGINE"].endswith(".postgresql"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0  # the pool owns the connections
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": DB_POOL_TIMEOUT,
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+
 # ──────────────────────────────────────
 # STATIC & MEDIA
 # ──────────────────────────────────────
@@ -120,6 +156,33 @@ STATICFILES_STORAGE = (
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Full-catalog JSON snapshots (content-hashed, served by WhiteNoise)
+CATALOG_SNAPSHOT_URL = "/snapshots/"
+CATALOG_SNAPSHOT_ROOT = os.environ.get(
+    "CATALOG_SNAPSHOT_ROOT", str(BASE_DIR / "snapshots")
+)
+# Seconds a worker waits after a catalog change before rebuilding the
+# snapshot (the previous one is served meanwhile)
+CATALOG_SNAPSHOT_REBUILD_DELAY = float(os.environ.get("CATALOG_SNAPSHOT_REBUILD_DELAY", 10))
+
+# Sheet `manage.py bootstrap_catalog` seeds an empty catalog from
+CATALOG_SEED_FILE = os.environ.get(
+    "CATALOG_SEED_FILE", str(BASE_DIR / "biologist_app" / "data" / "product_7.xlsx")
+)
+
+# Enquiry ingestion: "direct" (INSERT per request, 201) or "buffered"
+# (validate, spool locally, 202; flushed in batches – see drain_enquiries)
+ENQUIRY_INGESTION = os.environ.get("ENQUIRY_INGESTION", "direct")
+ENQUIRY_SPOOL_PATH = os.environ.get(
+    "ENQUIRY_SPOOL_PATH", str(BASE_DIR / "spool" / "enquiries.sqlite3")
+)
+ENQUIRY_FLUSH_BATCH = int(os.environ.get("ENQUIRY_FLUSH_BATCH", 200))
+ENQUIRY_FLUSH_INTERVAL = float(os.environ.get("ENQUIRY_FLUSH_INTERVAL", 5))
+
+# Serve product list / slug detail / categories / team from async views.
+# biologist_project/asgi.py turns this on; WSGI keeps the sync viewsets.
+ASYNC_CATALOG_VIEWS = os.environ.get("ASYNC_CATALOG_VIEWS", "0") == "1"
+
 # ──────────────────────────────────────
 # CORS (JWT + REACT SAFE)
 # ──────────────────────────────────────
@@ -170,6 +233,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "biologist_app.instrumentation.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
 }
@@ -187,12 +254,58 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 
 # ──────────────────────────────────────
-# CACHING (to speed up products API)
+# CACHING (shared by all gunicorn workers on the instance)
 # ──────────────────────────────────────
+# File-based so every worker shares hits without an external service.
+# Catalog responses are keyed on a version bumped by model signals
+# (see biologist_app/caching.py), so edits never wait for the TTL.
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-cache",
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "biologist_cache"),
+        ),
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+        },
     }
 }
 
+
+# ──────────────────────────────────────
+# REQUEST METRICS (see biologist_app/instrumentation.py)
+# ──────────────────────────────────────
+# Share of requests that get query / serialize / cache instrumentation
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get("REQUEST_METRICS_SAMPLE_RATE", 0.1))
+# Server-Timing header: "staff" (staff users only), "all" or "off"
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "staff")
+# A request this slow, or issuing this many queries, is logged with its
+# slowest statements on the "biologist_app.requests" logger
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 500))
+SLOW_REQUEST_QUERIES = int(os.environ.get("SLOW_REQUEST_QUERIES", 30))
+SLOW_REQUEST_WORST_QUERIES = 5
+
+# Per-route metrics (/api/metrics/): workers merge their counters into
+# this SQLite file every METRICS_FLUSH_INTERVAL seconds
+METRICS_STORE_PATH = os.environ.get(
+    "METRICS_STORE_PATH",
+    os.path.join(tempfile.gettempdir(), "biologist_metrics.sqlite3"),
+)
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 10))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # one JSON object per line – ready for the log drain to parse
+        "biologist_app.requests": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'biologist_project.settings')
 
 application = get_wsgi_application()
+
+# Server processes only: flush per-route metrics to METRICS_STORE_PATH
+from biologist_app.metrics import registry  # noqa: E402
+
+registry.start()